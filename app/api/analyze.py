@@ -1,7 +1,12 @@
 # app/api/analyze.py
 
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse
+from typing import List, Literal
+
+import asyncio
+import time
+import orjson
 
 from app.schemas.inputs import AnalyzeRequest
 from app.schemas.outputs import (
@@ -18,7 +23,8 @@ from app.schemas.outputs import (
     PenaltyReport
 )
 
-from app.services.crawler import fetch_html, parse_onpage
+from app.services.crawler import fetch_page, parse_onpage
+from app.services.content_extractor import page_text
 from app.services.brand import enrich_brand_context
 
 # keywords
@@ -27,6 +33,7 @@ from app.services.keywords_advanced_engine import keyword_contextual_score
 
 # scoring & engines
 from app.services.scoring import (
+    to_int,
     score_onpage,
     score_technical,
     score_content,
@@ -40,36 +47,122 @@ from app.services.penalties import compute_penalties
 from app.services.ux import compute_ux_score
 
 # other services
-from app.services.performance import get_performance
+from app.services.performance import FALLBACK_PERFORMANCE, get_performance
 from app.services.location_benchmarks import apply_location_context
 from app.services.search import get_serp_competitors
 from app.services.llm import analyze_content_llm
+from app.services.content_heuristics import analyze_content_local
 from app.services.benchmarks_v2 import compute_benchmark_deltas
+from app.services.records import (
+    BenchmarkRecord,
+    KeywordRecord,
+    PenaltyRecord,
+    ScoreBreakdownRecord,
+    UXRecord,
+)
+from app.services.snapshots import (
+    ensure_result,
+    is_valid_id,
+    latest_snapshot,
+    load_result,
+    save_result,
+    save_snapshot,
+)
+from app.services.score_history import record_analysis
+from app.services.incremental import (
+    content_hash,
+    context_changes,
+    performance_measured_at,
+    plan_incremental,
+)
 from app.core.config import settings
+from app.core.admission import AdmissionRejected, get_admission, resolve_caller, stage_slot
+from app.core.deadline import Deadline, current_deadline
+from app.core.compression import accepts_encoding
+from app.core.responses import etag_matches, model_response
 
 router = APIRouter(prefix="/api", tags=["analyze"])
 
+# Kept back from every stage so the response can still be assembled in budget
+RESPONSE_RESERVE_SECS = 0.3
+
+
+async def _value(value):
+    """Already-known stage result (reused from a snapshot), awaitable like the others."""
+    return value
+
+
+async def _llm_analysis(**kwargs):
+    async with stage_slot("llm"):
+        return await asyncio.to_thread(analyze_content_llm, **kwargs)
+
+
+async def admitted(
+    request: Request,
+    priority: Literal["interactive", "bulk", "scheduled"] | None = Query(
+        None, description="Scheduling class (default: X-Priority header, else interactive)"
+    ),
+    x_priority: str | None = Header(None),
+    x_tenant_id: str | None = Header(None),
+):
+    """Admission control: waits for a pipeline slot, or answers 429 + Retry-After."""
+    try:
+        cls, tenant = resolve_caller(
+            request.client.host if request.client else None,
+            priority or x_priority,
+            x_tenant_id,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    try:
+        async with get_admission().slot(tenant, cls) as admitted_class:
+            yield admitted_class
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+def search_query(req: AnalyzeRequest) -> str:
+    query_parts = list(
+        filter(None, [req.company_name, req.product, req.industry, req.location])
+    )
+    return " ".join(query_parts) if query_parts else str(req.url)
+
 
-def to_int(value):
-    """Normalize many possible LLM numeric formats to int (0-100)."""
+def _serp_competitors(query: str) -> list:
     try:
-        if value is None:
-            return 50
-        if isinstance(value, int):
-            return value
-        if isinstance(value, float):
-            return int(value)
-        if isinstance(value, str):
-            clean = value.strip().replace("%", "")
-            if "-" in clean:
-                clean = clean.split("-")[0]
-            return int(float(clean))
+        return get_serp_competitors(query) or []
     except Exception:
-        return 50
+        return []
 
 
 @router.post("/analyze", response_model=AnalyzeResponse)
-async def analyze(req: AnalyzeRequest):
+async def analyze(
+    req: AnalyzeRequest,
+    incremental: bool = Query(False, description="Reuse unchanged stages from the last snapshot of this URL"),
+    include_debug: bool = Query(True, alias="debug", description="Set false to drop the debug payload"),
+    tier: Literal["full", "fast"] = Query(
+        "full", description="fast: score content with the local heuristic engine instead of the LLM"
+    ),
+    budget_ms: int | None = Query(
+        None, ge=1000, le=settings.ANALYZE_MAX_BUDGET_MS,
+        description="Time budget for the whole analysis; stages still running when it expires are skipped",
+    ),
+    priority_class: str = Depends(admitted),
+):
+    exclude = None if include_debug else {"debug"}
+
+    # Every stage below (and the crawler / performance / LLM timeouts
+    # inside them) is bounded by this
+    deadline = Deadline(budget_ms or settings.ANALYZE_BUDGET_MS)
+    current_deadline.set(deadline)
+
+    # Dumped once; reused for the echo, incremental diff and snapshot
+    request_fields = req.model_dump(mode="json")
+
     # 1) Brand context
     brand_ctx = enrich_brand_context(
         req.company_name, req.location, req.product, req.industry
@@ -77,9 +170,23 @@ async def analyze(req: AnalyzeRequest):
 
     # 2) Crawl with Graceful Fallback
     html = None
+    rendered_metrics = None
     crawl_error = None
     try:
-        html = await fetch_html(str(req.url), timeout=settings.TIMEOUT_SECS)
+        page = await deadline.run(
+            "crawl",
+            fetch_page(
+                str(req.url),
+                timeout=settings.TIMEOUT_SECS,
+                collect_metrics=settings.RENDERED_METRICS_ENABLED,
+            ),
+            reserve=RESPONSE_RESERVE_SECS,
+        )
+        if page is None:
+            crawl_error = f"Time budget of {deadline.budget_ms} ms ran out while fetching the page"
+        else:
+            html = page["html"]
+            rendered_metrics = page["metrics"]
     except Exception as e:
         crawl_error = str(e)
         print(f"Crawl failed: {e}")
@@ -87,8 +194,8 @@ async def analyze(req: AnalyzeRequest):
     # --- BLOCKING HANDLER START ---
     if not html:
         # If HTML is empty (blocked or failed), return a "Zero Score" response immediately.
-        return AnalyzeResponse(
-            input_echo=req.model_dump(),
+        blocked = AnalyzeResponse(
+            input_echo=request_fields,
             
             onpage=OnPageSummary(
                 title="Access Denied / Scan Failed",
@@ -146,42 +253,195 @@ async def analyze(req: AnalyzeRequest):
                 f"Debug info: {crawl_error or 'Unknown error'}"
             ],
             
-            debug={"error": "Blocked", "details": crawl_error}
+            debug={"error": "Blocked", "details": crawl_error},
+            partial=bool(deadline.skipped),
+            skipped_stages=deadline.skipped,
         )
+        return model_response(blocked, exclude=exclude)
     # --- BLOCKING HANDLER END ---
 
+    # Incremental mode: last stored run for this URL (if any)
+    prev_snapshot = None
+    if incremental:
+        try:
+            prev_snapshot = await asyncio.to_thread(latest_snapshot, str(req.url))
+        except Exception as e:
+            print(f"Snapshot load failed: {e}")
+
+    # 3) On-page parsing
+    onpage = await asyncio.to_thread(prepare_onpage, html)
 
-    # 3) Competitor discovery (SERP)
+    plan = plan_incremental(prev_snapshot, onpage, request_fields)
+
+    # Main content (boilerplate stripped) for the LLM / keyword / UX stages
+    main_text = page_text(onpage)
+
+    # 4) Keyword extraction (simple)
+    extracted_keywords = []
     try:
-        query_parts = list(
-            filter(None, [req.company_name, req.product, req.industry, req.location])
+        extracted_keywords = extract_keywords(main_text)
+    except Exception:
+        extracted_keywords = []
+
+    # 5–7) The slow, independent stages (SERP, performance, LLM) run
+    #      concurrently; whichever is still running when the budget
+    #      expires is cancelled and replaced by its fallback.
+    # 5) Competitor discovery (SERP)
+    if prev_snapshot and "competitors" in prev_snapshot and not context_changes(prev_snapshot, request_fields):
+        competitors_stage = _value(prev_snapshot["competitors"] or [])
+    else:
+        competitors_stage = deadline.run(
+            "competitors",
+            asyncio.to_thread(_serp_competitors, search_query(req)),
+            default=[],
+            reserve=RESPONSE_RESERVE_SECS,
         )
-        search_query = " ".join(query_parts) if query_parts else str(req.url)
+
+    # 6) Performance metrics
+    if plan["reuse_performance"]:
+        performance_stage = _value(prev_snapshot["performance"])
+        measured_at = performance_measured_at(prev_snapshot)
+    else:
+        measured_at = time.time()
+        performance_stage = deadline.run(
+            "performance",
+            get_performance(str(req.url), rendered_metrics=rendered_metrics),
+            default=dict(FALLBACK_PERFORMANCE),
+            reserve=RESPONSE_RESERVE_SECS,
+        )
+
+    # 7) LLM analysis (content insights). The fast tier, and any LLM call
+    #    that fails or runs past LLM_TIMEOUT_SECS / the budget, uses the
+    #    local scorer.
+    llm_error = None
+    content_engine = "llm"
+    if plan["reuse_llm"]:
+        llm_stage = _value(prev_snapshot["llm_raw"])
+        content_engine = "reused"
+    elif tier == "full":
+        llm_stage = deadline.run(
+            "llm",
+            asyncio.wait_for(
+                _llm_analysis(
+                    content_text=main_text,
+                    company=brand_ctx.get("company_name"),
+                    product=brand_ctx.get("product"),
+                    industry=brand_ctx.get("industry"),
+                    location=brand_ctx.get("location"),
+                    title=onpage.get("title"),
+                    meta_description=onpage.get("meta_description"),
+                    headings=onpage.get("headings"),
+                ),
+                timeout=settings.LLM_TIMEOUT_SECS,
+            ),
+            reserve=RESPONSE_RESERVE_SECS,
+        )
+    else:
+        llm_stage = _value(None)
+
+    competitors_raw, performance, llm_raw = await asyncio.gather(
+        competitors_stage, performance_stage, llm_stage, return_exceptions=True
+    )
+
+    if isinstance(competitors_raw, BaseException):
         competitors_raw = []
-        try:
-            competitors_raw = get_serp_competitors(search_query) or []
-        except Exception as se:
-            competitors_raw = []
-        
-        # normalize to Competitor models
-        competitors: List[Competitor] = []
-        for c in competitors_raw:
-            try:
-                if isinstance(c, dict):
-                    title = c.get("title") or c.get("name") or c.get("site") or "Unknown"
-                    url = c.get("url") or c.get("link") or ""
-                    competitors.append(Competitor(title=title, url=url))
-                else:
-                    competitors.append(Competitor(title=str(c), url=""))
-            except Exception:
-                continue
-    except Exception:
-        competitors = []
 
-    # 4) On-page parsing
+    if isinstance(performance, BaseException):
+        print(f"Performance failed: {performance}")
+        performance = dict(FALLBACK_PERFORMANCE)
+
+    if isinstance(llm_raw, asyncio.TimeoutError):
+        llm_error = f"LLM timed out after {settings.LLM_TIMEOUT_SECS}s"
+        print(llm_error)
+        llm_raw = None
+    elif isinstance(llm_raw, BaseException):
+        llm_error = str(llm_raw)
+        print(f"LLM analysis failed: {llm_raw}")
+        llm_raw = None
+    elif llm_raw is None and "llm" in deadline.skipped:
+        llm_error = f"LLM cut off by the {deadline.budget_ms} ms time budget"
+    if not llm_raw:
+        content_engine = "heuristic"
+        llm_raw = analyze_content_local(
+            onpage,
+            company=req.company_name,
+            product=req.product,
+            industry=req.industry,
+            location=req.location,
+        )
+
+    competitors = competitor_models(competitors_raw)
+
+    debug = {"content_engine": content_engine, "priority": priority_class}
+    debug["budget_ms"] = deadline.budget_ms
+    debug["elapsed_ms"] = deadline.elapsed_ms()
+    if llm_error:
+        debug["llm_error"] = llm_error
+    if incremental:
+        debug["incremental"] = {
+            "base_analysis_id": plan["base_analysis_id"],
+            "changed": plan["changed"],
+            "reused": [
+                stage for stage, flag in [
+                    ("performance", plan["reuse_performance"]),
+                    ("llm", plan["reuse_llm"]),
+                    ("competitors", plan["reuse_competitors"]),
+                ] if flag
+            ],
+        }
+
+    # 8–18) Scores, penalties, benchmarks, recommendations → response
+    response = build_response(
+        req,
+        request_fields,
+        onpage=onpage,
+        performance=performance,
+        llm_raw=llm_raw,
+        competitors=competitors,
+        main_text=main_text,
+        extracted_keywords=extracted_keywords,
+        debug=debug,
+        skipped_stages=deadline.skipped,
+    )
+
+    # 19) Persist snapshot for offline rescoring, plus the serialized result
+    #     (served with an ETag by GET /api/analyze/{analysis_id})
+    payload = response.model_dump(mode="json")
+    stored = None
+    if settings.SNAPSHOTS_ENABLED:
+        try:
+            stored = await asyncio.to_thread(
+                save_analysis,
+                request_fields,
+                payload,
+                html=html,
+                onpage=onpage,
+                performance=performance,
+                llm_raw=llm_raw,
+                competitors=competitors,
+                extracted_keywords=extracted_keywords,
+                performance_measured_at=measured_at,
+            )
+        except Exception as e:
+            print(f"Snapshot save failed: {e}")
+
+    # 20) Score history (queued; written in batches off the request path)
+    record_analysis(request_fields["url"], payload, source="analyze")
+
+    if stored and include_debug:
+        _, body, etag = stored
+        return Response(body, media_type="application/json", headers=_cache_headers(etag))
+    if not include_debug:
+        payload.pop("debug", None)
+    return ORJSONResponse(payload)
+
+
+# ---------------------------------------------------------
+#  PIPELINE STEPS (shared with the queue workers in job_worker)
+# ---------------------------------------------------------
+def prepare_onpage(html: str) -> dict:
+    """parse_onpage() with headings flattened to a list for Pydantic."""
     onpage = parse_onpage(html) or {}
-    
-    # FIX HEADINGS FORMAT for Pydantic
     raw_headings = onpage.get("headings", []) or []
     if isinstance(raw_headings, dict):
         flat_headings = []
@@ -191,29 +451,37 @@ async def analyze(req: AnalyzeRequest):
         onpage["headings"] = flat_headings
     else:
         onpage["headings"] = raw_headings
+    return onpage
 
-    # 5) Keyword extraction (simple)
-    extracted_keywords = []
-    try:
-        extracted_keywords = extract_keywords(onpage.get("content_text", "") or "")
-    except Exception:
-        extracted_keywords = []
-
-    # 6) Performance metrics
-    performance = await get_performance(str(req.url))
-
-    # 7) LLM analysis (content insights)
-    try:
-        llm_raw = analyze_content_llm(
-            content_text=onpage.get("content_text", ""),
-            company=brand_ctx.get("company_name"),
-            product=brand_ctx.get("product"),
-            industry=brand_ctx.get("industry"),
-            location=brand_ctx.get("location"),
-        ) or {}
-    except Exception:
-        llm_raw = {}
 
+def competitor_models(competitors_raw: list) -> List[Competitor]:
+    competitors: List[Competitor] = []
+    for c in competitors_raw or []:
+        try:
+            if isinstance(c, dict):
+                title = c.get("title") or c.get("name") or c.get("site") or "Unknown"
+                url = c.get("url") or c.get("link") or ""
+                competitors.append(Competitor(title=title, url=url))
+            else:
+                competitors.append(Competitor(title=str(c), url=""))
+        except Exception:
+            continue
+    return competitors
+
+
+def build_response(
+    req: AnalyzeRequest,
+    request_fields: dict,
+    onpage: dict,
+    performance: dict,
+    llm_raw: dict,
+    competitors: List[Competitor],
+    main_text: str,
+    extracted_keywords: list,
+    debug: dict | None = None,
+    skipped_stages: list | None = None,
+) -> AnalyzeResponse:
+    """Steps 8–18 of analyze(): everything after the crawl / performance / LLM stages."""
     # 8) Normalize LLM numeric fields
     intent_coverage = to_int(llm_raw.get("intent_coverage"))
     expertise_score = to_int(llm_raw.get("expertise_score"))
@@ -254,13 +522,13 @@ async def analyze(req: AnalyzeRequest):
     # 12) Keyword Extraction + Contextual Scoring
     try:
         keyword_score_obj = keyword_contextual_score(
-            content_text=onpage.get("content_text", "") or "",
+            content_text=main_text,
             industry=req.industry or "default",
             product=req.product or "",
             company=req.company_name or ""
         )
     except Exception:
-        keyword_score_obj = KeywordInsights(
+        keyword_score_obj = KeywordRecord(
             keywords_used=0,
             total_suggested=0,
             missing_keywords=[],
@@ -271,7 +539,7 @@ async def analyze(req: AnalyzeRequest):
     try:
         ux_obj = compute_ux_score(onpage, performance)
     except Exception:
-        ux_obj = UXHeuristicInsights(
+        ux_obj = UXRecord(
             ux_score=60,
             cta_present=False,
             trust_signals_present=False,
@@ -283,9 +551,9 @@ async def analyze(req: AnalyzeRequest):
     # 14) Penalties
     try:
         penalties_obj = compute_penalties(onpage, performance, llm_raw)
-        penalty_total = getattr(penalties_obj, "total_penalty", 0)
+        penalty_total = penalties_obj.total_penalty
     except Exception:
-        penalties_obj = PenaltyReport(
+        penalties_obj = PenaltyRecord(
             total_penalty=0,
             meta_description_penalty=0,
             schema_penalty=0,
@@ -298,28 +566,26 @@ async def analyze(req: AnalyzeRequest):
 
     # 15) Weighted scoring engine
     try:
-        score_breakdown: ScoreBreakdown = compute_weighted_score(
+        score_breakdown = compute_weighted_score(
             base_scores, penalties_obj, ux_obj
         )
     except Exception:
-        score_breakdown = ScoreBreakdown(
+        score_breakdown = ScoreBreakdownRecord(
             seo_weighted=round(base_scores["seo_score"] * 0.3),
             technical_weighted=round(base_scores["technical_score"] * 0.3),
             content_weighted=round(base_scores["content_score"] * 0.25),
             brand_weighted=round(15),
             competitor_adjustment=len(competitors) * 2,
-            penalties=penalties_obj.notes if hasattr(penalties_obj, "notes") else [],
-            ux_score=getattr(ux_obj, "ux_score", 50),
+            penalties=penalties_obj.notes,
+            ux_score=ux_obj.ux_score,
             final_aeo=max(0, round(base_scores["aeo_score"] - penalty_total)),
         )
 
     # 16) Benchmarks
     try:
-        benchmark_obj: BenchmarkInsights = compute_benchmark_deltas(
-            req.industry, base_scores, req.location
-        )
+        benchmark_obj = compute_benchmark_deltas(base_scores, req.industry)
     except Exception:
-        benchmark_obj = BenchmarkInsights(
+        benchmark_obj = BenchmarkRecord(
             industry=req.industry,
             seo_delta=0,
             technical_delta=0,
@@ -347,11 +613,22 @@ async def analyze(req: AnalyzeRequest):
     if req.product and any("Explicit product" in s for s in (missing or [])):
         recs.append(f"Mention your product ('{req.product}') more clearly in headings and content.")
 
-    # 18) Build & return final response
+    # 18) Build & return final response (records → Pydantic happens only here).
+    # Every field is already a validated model or plain data, so skip the
+    # top-level validation pass.
     scores_int = {k: int(round(v)) for k, v in base_scores.items()}
 
-    return AnalyzeResponse(
-        input_echo=req.model_dump(),
+    skipped_stages = skipped_stages or []
+    debug = {
+        "extracted_keywords": extracted_keywords,
+        "raw_llm": llm_raw,
+        "penalties": penalties_obj.notes,
+        "base_scores_before_rounding": base_scores,
+        **(debug or {}),
+    }
+
+    return AnalyzeResponse.model_construct(
+        input_echo=request_fields,
 
         onpage=OnPageSummary(
             title=onpage.get("title"),
@@ -379,17 +656,85 @@ async def analyze(req: AnalyzeRequest):
         ),
 
         competitors=competitors,
-        score_breakdown=score_breakdown,
-        keyword_score=keyword_score_obj,
-        benchmark=benchmark_obj,
-        ux=ux_obj,
-        penalties=penalties_obj,
+        score_breakdown=score_breakdown.to_model(),
+        keyword_score=keyword_score_obj.to_model(),
+        benchmark=benchmark_obj.to_model(),
+        ux=ux_obj.to_model(),
+        penalties=penalties_obj.to_model(),
         recommendations=recs,
 
-        debug={
-            "extracted_keywords": extracted_keywords,
-            "raw_llm": llm_raw,
-            "penalties": penalties_obj.notes,
-            "base_scores_before_rounding": base_scores,
-        },
-    )
\ No newline at end of file
+        debug=debug,
+        partial=bool(skipped_stages),
+        skipped_stages=skipped_stages,
+    )
+
+
+def save_analysis(
+    request_fields: dict,
+    payload: dict,
+    html: str,
+    onpage: dict,
+    performance: dict,
+    llm_raw: dict,
+    competitors: List[Competitor],
+    extracted_keywords: list,
+    performance_measured_at: float | None = None,
+) -> tuple:
+    """Step 19: store the snapshot and the serialized result. Returns (analysis_id, body, etag)."""
+    analysis_id = save_snapshot(
+        url=request_fields["url"],
+        request=request_fields,
+        html=html,
+        onpage=onpage,
+        performance=performance,
+        llm_raw=llm_raw,
+        competitors=[c.model_dump() for c in competitors],
+        extracted_keywords=extracted_keywords,
+        content_hash=content_hash(onpage.get("content_text")),
+        performance_measured_at=performance_measured_at or time.time(),
+        response=payload,
+    )
+    payload["analysis_id"] = analysis_id
+    body = orjson.dumps(payload)
+    return analysis_id, body, save_result(analysis_id, body)
+
+
+def _cache_headers(etag: str) -> dict:
+    # Results never change, but let clients revalidate cheaply instead of caching blindly
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+@router.get("/analyze/{analysis_id}", response_model=AnalyzeResponse)
+def get_analysis(
+    analysis_id: str,
+    request: Request,
+    include_debug: bool = Query(True, alias="debug", description="Set false to drop the debug payload"),
+):
+    """
+    Stored analysis result. Send If-None-Match with the ETag from a
+    previous response to get 304 Not Modified without a body.
+    """
+    etag = ensure_result(analysis_id) if is_valid_id(analysis_id) else None
+    if etag is None:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    if not include_debug:
+        etag = etag[:-1] + '-nodebug"'
+
+    headers = _cache_headers(etag)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if include_debug and accepts_encoding(request.headers.get("accept-encoding"), "gzip"):
+        # Stored gzip bytes go out as-is (the compression middleware skips encoded bodies)
+        return Response(
+            load_result(analysis_id, compressed=True),
+            media_type="application/json",
+            headers={**headers, "Content-Encoding": "gzip", "Vary": "Accept-Encoding"},
+        )
+
+    body = load_result(analysis_id)
+    if not include_debug:
+        result = orjson.loads(body)
+        result.pop("debug", None)
+        body = orjson.dumps(result)
+    return Response(body, media_type="application/json", headers=headers)
\ No newline at end of file
@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+
+from app.services.fetch_strategy import get_strategy_table
+from app.services.proxy_pool import get_proxy_pool
+
+router = APIRouter(prefix="/api/crawler", tags=["crawler"])
+
+
+@router.get("/proxies")
+def proxy_stats():
+    """Per-proxy health: success rate, latency, attempts, cooldown."""
+    return get_proxy_pool().stats()
+
+
+@router.get("/strategies")
+def strategy_stats(host: str | None = None):
+    """Per-host fetch strategy memory (all hosts, or one with ?host=)."""
+    return get_strategy_table().stats(host)
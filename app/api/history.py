@@ -0,0 +1,60 @@
+# app/api/history.py
+"""
+Score history per URL (every analysis appends a point). URLs are matched
+after the same normalisation /api/analyze applies (lower-case host, "/"
+path for a bare domain), so "HTTPS://Example.com" finds "https://example.com/".
+
+    GET /api/history?url=&start=&end=         raw points in a time range
+    GET /api/history/latest?url=&n=           most recent points
+    GET /api/history/series?url=&period=week  daily / weekly aggregates
+"""
+
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, Query
+
+from app.core.responses import model_response
+from app.schemas.history import HistoryPoints, HistorySeries
+from app.services.score_history import get_history
+
+router = APIRouter(prefix="/api", tags=["history"])
+
+
+def _epoch(value: datetime | None) -> float | None:
+    # Naive datetimes are taken as UTC, like the stored timestamps
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return (value - datetime(1970, 1, 1)).total_seconds()
+    return value.timestamp()
+
+
+@router.get("/history", response_model=HistoryPoints)
+def history_range(
+    url: str = Query(..., description="Analyzed URL (normalised like /api/analyze)"),
+    start: datetime | None = Query(None, description="Inclusive (ISO 8601)"),
+    end: datetime | None = Query(None, description="Exclusive (ISO 8601)"),
+    limit: int = Query(1000, ge=1, le=10000),
+):
+    points = get_history().points(url, _epoch(start), _epoch(end), limit)
+    return model_response(HistoryPoints(url=url, points=points))
+
+
+@router.get("/history/latest", response_model=HistoryPoints)
+def history_latest(
+    url: str = Query(..., description="Analyzed URL (normalised like /api/analyze)"),
+    n: int = Query(10, ge=1, le=1000),
+):
+    return model_response(HistoryPoints(url=url, points=get_history().latest(url, n)))
+
+
+@router.get("/history/series", response_model=HistorySeries)
+def history_series(
+    url: str = Query(..., description="Analyzed URL (normalised like /api/analyze)"),
+    period: Literal["day", "week"] = Query("day"),
+    start: datetime | None = Query(None, description="Inclusive (ISO 8601)"),
+    end: datetime | None = Query(None, description="Exclusive (ISO 8601)"),
+):
+    buckets = get_history().series(url, period, _epoch(start), _epoch(end))
+    return model_response(HistorySeries(url=url, period=period, buckets=buckets))
@@ -0,0 +1,75 @@
+# app/api/jobs.py
+"""
+Queue-backed analyses: the API only enqueues and reports status, stage
+workers (app/services/job_worker.py) do the crawling and scoring.
+
+    POST /api/jobs            → 202 {"job_id", "status_url", ...}
+    GET  /api/jobs/{job_id}   → status per stage; result_url once done
+    GET  /api/jobs            → queue depth per stage
+"""
+
+from typing import Literal
+
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+
+from app.core.admission import resolve_caller
+from app.schemas.inputs import AnalyzeRequest
+from app.schemas.jobs import JobAccepted, JobStatus
+from app.services.job_queue import QueueFull, get_queue
+from app.services.snapshots import is_valid_id
+
+router = APIRouter(prefix="/api", tags=["jobs"])
+
+# Queued jobs are batch work unless the caller says otherwise
+DEFAULT_JOB_CLASS = "bulk"
+QUEUE_FULL_RETRY_AFTER_SECS = 60
+
+
+@router.post("/jobs", response_model=JobAccepted, status_code=202)
+def enqueue_analysis(
+    req: AnalyzeRequest,
+    request: Request,
+    tier: Literal["full", "fast"] = Query("full", description="fast: heuristic content scoring, no LLM"),
+    priority: Literal["interactive", "bulk", "scheduled"] | None = Query(
+        None, description="Scheduling class (default: X-Priority header, else bulk)"
+    ),
+    x_priority: str | None = Header(None),
+    x_tenant_id: str | None = Header(None),
+):
+    """Queue an analysis for the stage workers and return its job id at once."""
+    try:
+        cls, tenant = resolve_caller(
+            request.client.host if request.client else None,
+            priority or x_priority,
+            x_tenant_id,
+            default_class=DEFAULT_JOB_CLASS,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    payload = {"request": req.model_dump(mode="json"), "tier": tier}
+    try:
+        job_id = get_queue().enqueue(payload, priority=cls, tenant=tenant)
+    except QueueFull as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(QUEUE_FULL_RETRY_AFTER_SECS)},
+        )
+    return JobAccepted(job_id=job_id, status="queued", priority=cls, status_url=f"/api/jobs/{job_id}")
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+def get_job(job_id: str):
+    job = get_queue().get_job(job_id) if is_valid_id(job_id) else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["analysis_id"]:
+        job["result_url"] = f"/api/analyze/{job['analysis_id']}"
+    return job
+
+
+@router.get("/jobs")
+def queue_stats():
+    """Jobs by status, and waiting / leased tasks per stage."""
+    return get_queue().stats()
@@ -0,0 +1,22 @@
+import asyncio
+
+from fastapi import APIRouter
+
+from app.core.responses import model_response
+from app.schemas.rescore import RescoreRequest, RescoreResponse
+from app.services.rescore import rescore_snapshots
+
+router = APIRouter(prefix="/api", tags=["rescore"])
+
+
+@router.post("/rescore", response_model=RescoreResponse)
+async def rescore_endpoint(req: RescoreRequest):
+    """
+    Replay the scoring stages over stored snapshots with the current
+    weights/benchmarks. Nothing is re-crawled.
+    """
+    rows = await asyncio.to_thread(lambda: list(rescore_snapshots(req.analysis_ids)))
+    # Rows are validated once by to_model(); skip the response_model pass
+    return model_response(
+        RescoreResponse.model_construct(count=len(rows), results=[r.to_model() for r in rows])
+    )
@@ -0,0 +1,27 @@
+from fastapi import APIRouter
+
+from app.core.responses import model_response
+from app.schemas.site import SiteCrawlRequest, SiteReport
+from app.services.site_crawler import crawl_site
+
+router = APIRouter(prefix="/api", tags=["site"])
+
+
+@router.post("/analyze/site", response_model=SiteReport)
+async def analyze_site(req: SiteCrawlRequest):
+    """
+    Site-level AEO readiness: crawls internal links + sitemap.xml from
+    the submitted URL and aggregates per-page on-page / keyword scores.
+    """
+    report = await crawl_site(
+        str(req.url),
+        industry=req.industry,
+        product=req.product,
+        company=req.company_name,
+        max_pages=req.max_pages,
+        concurrency=req.concurrency,
+        rate_per_host=req.rate_per_host,
+        use_sitemap=req.use_sitemap,
+        include_pages=req.include_pages,
+    )
+    return model_response(SiteReport(**report))
@@ -0,0 +1,38 @@
+from datetime import timezone
+
+import orjson
+
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+
+from app.schemas.site import SitemapIngestRequest
+from app.services.sitemap import ingest_sitemap
+
+router = APIRouter(prefix="/api", tags=["sitemap"])
+
+
+@router.post("/sitemap/ingest")
+async def ingest_sitemap_endpoint(req: SitemapIngestRequest):
+    """
+    Stream a (possibly huge / gzipped) sitemap through the analysis
+    pipeline. Returns NDJSON: one line per page, then a summary line.
+    """
+    since = req.since
+    if since is not None and since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+
+    async def lines():
+        async for item in ingest_sitemap(
+            str(req.sitemap_url),
+            industry=req.industry,
+            location=req.location,
+            since=since,
+            incremental=req.incremental,
+            workers=req.workers,
+            max_urls=req.max_urls,
+            persist=req.persist,
+            rate_per_host=req.rate_per_host,
+        ):
+            yield orjson.dumps(item) + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -0,0 +1,287 @@
+# app/core/admission.py
+"""
+Admission control and priority scheduling for the analysis pipeline.
+
+Every /api/analyze request is admitted through a single scheduler
+before any work starts:
+
+  classes   interactive > bulk > scheduled (X-Priority header or
+            ?priority=). Free slots always go to the highest class with
+            waiting work. Each class also has its own cap
+            (ADMISSION_CLASS_LIMITS), so a batch can never take the slots
+            kept back for interactive users.
+  tenants   within a class, waiting requests are ordered by start-time
+            fair queuing across tenants (X-Tenant-ID, else client IP),
+            weighted by ADMISSION_TENANT_WEIGHTS. A tenant that submits
+            500 URLs takes turns with a tenant that submits 1.
+  trust     X-Tenant-ID, and asking for a class above the endpoint's
+            default, are only honoured from ADMISSION_TRUSTED_PROXIES
+            (the gateway that authenticates callers). Everyone else is
+            scheduled as their client IP and may only lower their class.
+  shedding  each class has a maximum queue depth (ADMISSION_MAX_QUEUE).
+            Past it, or after ADMISSION_QUEUE_TIMEOUT_SECS of waiting,
+            the request gets 429 with a Retry-After estimated from
+            recent service times.
+
+The admitted class is stored in a context variable. Expensive stages
+(Playwright, Lighthouse, LLM) take a per-class slot with stage_slot(),
+so bulk work cannot hold every browser or LLM slot either.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+from app.core.config import settings
+from app.core.metrics import counter, gauge, histogram
+
+# Highest priority first
+PRIORITY_CLASSES = ["interactive", "bulk", "scheduled"]
+DEFAULT_CLASS = "interactive"
+# Most tenant finish tags kept per class (client IPs come and go)
+MAX_TRACKED_TENANTS = 1024
+
+QUEUE_DEPTH = gauge("admission_queue_depth", "Requests waiting for admission", ["priority"])
+RUNNING = gauge("admission_running", "Admitted requests in progress", ["priority"])
+REJECTED = counter("admission_rejected_total", "Requests shed with 429", ["priority", "reason"])
+WAIT_MS = histogram("admission_wait_ms", "Time spent waiting for admission (ms)", ["priority"])
+
+current_priority: ContextVar[str | None] = ContextVar("current_priority", default=None)
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, priority: str, reason: str, retry_after: int):
+        super().__init__(f"{priority} request rejected ({reason}); retry after {retry_after}s")
+        self.priority = priority
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_concurrent: int,
+        class_limits: dict,
+        max_queue: dict,
+        tenant_weights: dict | None = None,
+        queue_timeout: float = 10.0,
+    ):
+        self.max_concurrent = max_concurrent
+        self.class_limits = class_limits
+        self.max_queue = max_queue
+        self.tenant_weights = tenant_weights or {}
+        self.queue_timeout = queue_timeout
+
+        self.running = {cls: 0 for cls in PRIORITY_CLASSES}
+        # Per class: heap of (start_tag, seq, tenant, future)
+        self.queues = {cls: [] for cls in PRIORITY_CLASSES}
+        self.waiting = {cls: 0 for cls in PRIORITY_CLASSES}
+        self.virtual_time = {cls: 0.0 for cls in PRIORITY_CLASSES}
+        self.last_finish = {cls: {} for cls in PRIORITY_CLASSES}
+        self._seq = itertools.count()
+        # EWMA of time a request holds its slot (seconds), for Retry-After
+        self.service_secs = 5.0
+
+    # -----------------------------------------------------
+    #  SCHEDULING
+    # -----------------------------------------------------
+    def _total_running(self) -> int:
+        return sum(self.running.values())
+
+    def _can_start(self, cls: str) -> bool:
+        return (
+            self._total_running() < self.max_concurrent
+            and self.running[cls] < self.class_limits.get(cls, self.max_concurrent)
+        )
+
+    def _tag(self, cls: str, tenant: str) -> float:
+        """SFQ start tag: max(class virtual time, tenant's last finish tag)."""
+        finish = self.last_finish[cls]
+        start = max(self.virtual_time[cls], finish.get(tenant, 0.0))
+        finish[tenant] = start + 1.0 / max(0.01, self.tenant_weights.get(tenant, 1.0))
+        if len(finish) > MAX_TRACKED_TENANTS:
+            self._prune(cls)
+        return start
+
+    def _prune(self, cls: str):
+        """
+        Forget idle tenants: a finish tag at or below virtual time changes
+        no future tag. If that is not enough, keep the tenants furthest
+        ahead (the heavy users fair queuing must remember).
+        """
+        now = self.virtual_time[cls]
+        active = sorted(
+            ((tag, tenant) for tenant, tag in self.last_finish[cls].items() if tag > now),
+            reverse=True,
+        )[: MAX_TRACKED_TENANTS // 2]
+        self.last_finish[cls] = {tenant: tag for tag, tenant in active}
+
+    def _start(self, cls: str):
+        self.running[cls] += 1
+        RUNNING.set(self.running[cls], priority=cls)
+
+    def _dispatch(self):
+        for cls in PRIORITY_CLASSES:
+            queue = self.queues[cls]
+            while queue and self._can_start(cls):
+                start_tag, _, _, future = heapq.heappop(queue)
+                if future.done():  # caller gave up (timeout / disconnect)
+                    continue
+                self.waiting[cls] -= 1
+                QUEUE_DEPTH.set(self.waiting[cls], priority=cls)
+                self.virtual_time[cls] = start_tag
+                self._start(cls)
+                future.set_result(None)
+
+    def retry_after(self, cls: str) -> int:
+        ahead = sum(self.waiting[c] for c in PRIORITY_CLASSES[: PRIORITY_CLASSES.index(cls) + 1])
+        slots = max(1, min(self.max_concurrent, self.class_limits.get(cls, self.max_concurrent)))
+        return max(1, math.ceil(self.service_secs * (ahead + 1) / slots))
+
+    def _reject(self, cls: str, reason: str):
+        REJECTED.inc(priority=cls, reason=reason)
+        raise AdmissionRejected(cls, reason, self.retry_after(cls))
+
+    # -----------------------------------------------------
+    #  ACQUIRE / RELEASE
+    # -----------------------------------------------------
+    async def acquire(self, tenant: str, cls: str):
+        started = time.monotonic()
+        # Nothing of this class or higher is waiting: no queueing
+        higher_waiting = any(self.waiting[c] for c in PRIORITY_CLASSES[: PRIORITY_CLASSES.index(cls) + 1])
+        if not higher_waiting and self._can_start(cls):
+            # Served right away: virtual time moves to its tag, as in _dispatch,
+            # so a tenant busy while the queue was empty can't push newcomers back
+            self.virtual_time[cls] = self._tag(cls, tenant)
+            self._start(cls)
+            WAIT_MS.observe(0, priority=cls)
+            return
+
+        if self.waiting[cls] >= self.max_queue.get(cls, 0):
+            self._reject(cls, "queue_full")
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.queues[cls], (self._tag(cls, tenant), next(self._seq), tenant, future))
+        self.waiting[cls] += 1
+        QUEUE_DEPTH.set(self.waiting[cls], priority=cls)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # Admitted just as we gave up: hand the slot back
+                self.release(cls, time.monotonic())
+            else:
+                future.cancel()
+                self.waiting[cls] -= 1
+                QUEUE_DEPTH.set(self.waiting[cls], priority=cls)
+            if isinstance(e, asyncio.TimeoutError):
+                self._reject(cls, "queue_timeout")
+            raise
+        WAIT_MS.observe((time.monotonic() - started) * 1000, priority=cls)
+
+    def release(self, cls: str, admitted_at: float):
+        self.running[cls] -= 1
+        RUNNING.set(self.running[cls], priority=cls)
+        held = time.monotonic() - admitted_at
+        self.service_secs = 0.8 * self.service_secs + 0.2 * held
+        self._dispatch()
+        if not self.running[cls] and not self.waiting[cls]:
+            # End of the class's busy period: everyone starts level again
+            finish = self.last_finish[cls]
+            if finish:
+                self.virtual_time[cls] = max(self.virtual_time[cls], *finish.values())
+                finish.clear()
+
+    @asynccontextmanager
+    async def slot(self, tenant: str, priority: str | None = None):
+        """Admit one request (raises AdmissionRejected) and run the body in its class."""
+        cls = priority if priority in PRIORITY_CLASSES else DEFAULT_CLASS
+        await self.acquire(tenant, cls)
+        admitted_at = time.monotonic()
+        token = current_priority.set(cls)
+        try:
+            yield cls
+        finally:
+            current_priority.reset(token)
+            self.release(cls, admitted_at)
+
+    def snapshot(self) -> dict:
+        return {
+            cls: {
+                "running": self.running[cls],
+                "queued": self.waiting[cls],
+                "limit": self.class_limits.get(cls, self.max_concurrent),
+            }
+            for cls in PRIORITY_CLASSES
+        }
+
+
+def resolve_caller(
+    client_host: str | None,
+    requested_class: str | None,
+    tenant_header: str | None,
+    default_class: str = DEFAULT_CLASS,
+) -> tuple:
+    """
+    (class, tenant) for a request. Raises ValueError for an unknown class.
+    Headers from ADMISSION_TRUSTED_PROXIES are taken as they are; other
+    callers are their own client IP and get at most `default_class`.
+    """
+    cls = (requested_class or "").strip().lower() or default_class
+    if cls not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown priority {cls!r}")
+    host = client_host or "anonymous"
+    if host in settings.ADMISSION_TRUSTED_PROXIES:
+        return cls, tenant_header or host
+    if PRIORITY_CLASSES.index(cls) < PRIORITY_CLASSES.index(default_class):
+        cls = default_class
+    return cls, host
+
+
+# ---------------------------------------------------------
+#  PER-CLASS STAGE CAPS
+# ---------------------------------------------------------
+_stage_semaphores: dict = {}
+
+
+def _stage_semaphore(stage: str, cls: str) -> asyncio.Semaphore | None:
+    limit = settings.STAGE_CLASS_LIMITS.get(stage, {}).get(cls)
+    if limit is None:
+        return None
+    key = (stage, cls)
+    sem = _stage_semaphores.get(key)
+    if sem is None:
+        sem = _stage_semaphores[key] = asyncio.Semaphore(limit)
+    return sem
+
+
+@asynccontextmanager
+async def stage_slot(stage: str):
+    """Hold one of the current class's slots for an expensive stage (no-op outside admission)."""
+    cls = current_priority.get()
+    sem = _stage_semaphore(stage, cls) if cls else None
+    if sem is None:
+        yield
+        return
+    async with sem:
+        yield
+
+
+_controller: AdmissionController | None = None
+
+
+def get_admission() -> AdmissionController:
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController(
+            max_concurrent=settings.ADMISSION_MAX_CONCURRENT,
+            class_limits=settings.ADMISSION_CLASS_LIMITS,
+            max_queue=settings.ADMISSION_MAX_QUEUE,
+            tenant_weights=settings.ADMISSION_TENANT_WEIGHTS,
+            queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECS,
+        )
+    return _controller
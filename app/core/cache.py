@@ -0,0 +1,452 @@
+# app/core/cache.py
+"""
+Shared cache for service-layer memoization.
+
+Two tiers:
+
+  L1  worker-local LRU (CACHE_L1_SIZE entries / CACHE_L1_MAX_BYTES, at
+      most CACHE_L1_TTL_SECS old), holding decoded values: a hit costs a
+      dict lookup.
+  L2  shared backend picked by CACHE_BACKEND:
+        memory  this process only (the default; single worker / dev),
+                capped at CACHE_L2_SIZE entries / CACHE_L2_MAX_BYTES
+        disk    files under CACHE_DIR (several workers on one node),
+                swept of expired entries and kept under CACHE_DISK_MAX_BYTES
+        redis   CACHE_REDIS_URL (several nodes; needs the redis package)
+
+L2 payloads are msgpack, zstd-compressed. An L2 that is down or slow
+never fails a request: errors are logged and count as misses.
+
+    SERP_CACHE = cache("serp", ttl=24 * 3600)
+
+    @SERP_CACHE.memoize(key=lambda query, num_results=5: f"{query}|{num_results}")
+    def get_serp_competitors(query, num_results=5): ...
+
+memoize() works on sync and async functions. Async callers reach L2
+through a thread, so a Redis round trip never blocks the event loop.
+L1 hands out the same object to every caller: treat cached values as
+read-only.
+"""
+
+import asyncio
+import functools
+import hashlib
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import msgpack
+import zstandard
+
+from app.core.config import settings
+from app.core.metrics import counter
+
+REQUESTS = counter("cache_requests_total", "Cache lookups", ["namespace", "result"])
+ERRORS = counter("cache_backend_errors_total", "Failed L2 cache operations", ["backend", "op"])
+
+_zstd_local = threading.local()
+
+
+# ---------------------------------------------------------
+#  CODEC (msgpack + zstd)
+# ---------------------------------------------------------
+def _zstd():
+    # zstd (de)compressors aren't thread-safe: one pair per thread
+    pair = getattr(_zstd_local, "pair", None)
+    if pair is None:
+        pair = _zstd_local.pair = (
+            zstandard.ZstdCompressor(level=settings.CACHE_ZSTD_LEVEL),
+            zstandard.ZstdDecompressor(),
+        )
+    return pair
+
+
+def encode(value) -> bytes:
+    return _zstd()[0].compress(msgpack.packb(value, use_bin_type=True))
+
+
+def decode(payload: bytes):
+    return msgpack.unpackb(_zstd()[1].decompress(payload), raw=False)
+
+
+def make_key(*parts) -> str:
+    """Stable short key for arbitrary (msgpack-able) arguments."""
+    return hashlib.blake2b(msgpack.packb(parts, use_bin_type=True, default=str), digest_size=16).hexdigest()
+
+
+# ---------------------------------------------------------
+#  BACKENDS (bytes in, bytes out)
+# ---------------------------------------------------------
+class CacheBackend:
+    name = "base"
+
+    def get(self, key: str) -> bytes | None:
+        raise NotImplementedError
+
+    def set(self, key: str, payload: bytes, ttl: float | None = None):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+
+def _size(value) -> int:
+    # Only bytes / str are measured; decoded structures count by entries
+    return len(value) if isinstance(value, (bytes, bytearray, str)) else 0
+
+
+class MemoryBackend(CacheBackend):
+    """
+    Thread-safe LRU with per-entry expiry, bounded by entries and (for
+    bytes / str values) by total size. Also used as the L1.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_items: int = 1024, max_bytes: int | None = None):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._items: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _pop(self, key: str):
+        value, _ = self._items.pop(key)
+        self.bytes -= _size(value)
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.time():
+                self._pop(key)
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key: str, payload, ttl: float | None = None):
+        size = _size(payload)
+        if self.max_bytes is not None and size > self.max_bytes:
+            self.delete(key)  # larger than the whole budget: don't keep it
+            return
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            if key in self._items:
+                self._pop(key)
+            self._items[key] = (payload, expires_at)
+            self.bytes += size
+            while len(self._items) > self.max_items or (
+                self.max_bytes is not None and self.bytes > self.max_bytes
+            ):
+                self._pop(next(iter(self._items)))
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._items:
+                self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.bytes = 0
+
+
+class DiskBackend(CacheBackend):
+    """
+    One file per key: 8-byte expiry timestamp (0 = never) + payload.
+    Every `sweep_secs` a write also sweeps the directory: expired files
+    go, then the least recently written ones until it fits in `max_bytes`.
+    """
+
+    name = "disk"
+    HEADER = struct.Struct("<d")
+
+    def __init__(self, directory: str, max_bytes: int | None = None, sweep_secs: float = 300):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.sweep_secs = sweep_secs
+        self._last_sweep = 0.0
+        self._sweep_lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self.directory / digest[:2] / digest
+
+    def get(self, key: str) -> bytes | None:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        (expires_at,) = self.HEADER.unpack_from(data)
+        if expires_at and expires_at <= time.time():
+            path.unlink(missing_ok=True)
+            return None
+        return data[self.HEADER.size:]
+
+    def set(self, key: str, payload: bytes, ttl: float | None = None):
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(self.HEADER.pack(time.time() + ttl if ttl else 0.0) + payload)
+        os.replace(tmp, path)  # atomic: readers never see a partial entry
+        if time.monotonic() - self._last_sweep >= self.sweep_secs:
+            self.sweep()
+
+    def delete(self, key: str):
+        self._path(key).unlink(missing_ok=True)
+
+    def sweep(self) -> int:
+        """Delete expired entries, then the oldest until under max_bytes. Returns files removed."""
+        if not self._sweep_lock.acquire(blocking=False):
+            return 0  # another thread is already sweeping
+        try:
+            self._last_sweep = time.monotonic()
+            now = time.time()
+            removed = 0
+            live = []
+            for path in self.directory.glob("*/*"):
+                if path.suffix == ".tmp":
+                    continue
+                try:
+                    with open(path, "rb") as f:
+                        (expires_at,) = self.HEADER.unpack(f.read(self.HEADER.size))
+                    stat = path.stat()
+                except (OSError, struct.error):
+                    continue
+                if expires_at and expires_at <= now:
+                    path.unlink(missing_ok=True)
+                    removed += 1
+                else:
+                    live.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in live)
+            if self.max_bytes is not None and total > self.max_bytes:
+                live.sort()
+                for _, size, path in live:
+                    if total <= self.max_bytes * 0.9:
+                        break
+                    path.unlink(missing_ok=True)
+                    total -= size
+                    removed += 1
+            return removed
+        finally:
+            self._sweep_lock.release()
+
+
+class RedisBackend(CacheBackend):
+    name = "redis"
+
+    def __init__(self, url: str | None = None, client=None, prefix: str = "aeo:"):
+        if client is None:
+            import redis  # optional: only for CACHE_BACKEND=redis
+
+            client = redis.Redis.from_url(
+                url,
+                socket_timeout=settings.CACHE_REDIS_TIMEOUT_SECS,
+                socket_connect_timeout=settings.CACHE_REDIS_TIMEOUT_SECS,
+            )
+        self.client = client  # also accepts a fakeredis.FakeRedis()
+        self.prefix = prefix
+
+    def get(self, key: str) -> bytes | None:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, payload: bytes, ttl: float | None = None):
+        self.client.set(self.prefix + key, payload, ex=max(1, int(ttl)) if ttl else None)
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+
+def make_backend(kind: str | None = None) -> CacheBackend:
+    kind = (kind or settings.CACHE_BACKEND).lower()
+    if kind == "redis":
+        return RedisBackend(settings.CACHE_REDIS_URL)
+    if kind == "disk":
+        return DiskBackend(
+            settings.CACHE_DIR,
+            max_bytes=settings.CACHE_DISK_MAX_BYTES,
+            sweep_secs=settings.CACHE_DISK_SWEEP_SECS,
+        )
+    if kind == "memory":
+        return MemoryBackend(settings.CACHE_L2_SIZE, max_bytes=settings.CACHE_L2_MAX_BYTES)
+    raise ValueError(f"Unknown CACHE_BACKEND: {kind}")
+
+
+# ---------------------------------------------------------
+#  TIERED CACHE
+# ---------------------------------------------------------
+_MISSING = object()
+
+
+class Cache:
+    """
+    One namespace of the shared cache: L1 (decoded values) in front of
+    L2 (encoded). Without explicit tiers it uses the process-wide ones,
+    created on first use so importing a service never connects to Redis.
+    """
+
+    def __init__(self, namespace: str, ttl: float | None = None, l1=None, l2=_MISSING):
+        self.namespace = namespace
+        self.ttl = ttl
+        self._l1 = l1
+        self._l2 = l2
+
+    @property
+    def l1(self) -> MemoryBackend:
+        return self._l1 if self._l1 is not None else _tiers()[0]
+
+    @property
+    def l2(self) -> CacheBackend | None:
+        return self._l2 if self._l2 is not _MISSING else _tiers()[1]
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _l1_ttl(self, ttl: float | None) -> float:
+        return min(ttl, settings.CACHE_L1_TTL_SECS) if ttl else settings.CACHE_L1_TTL_SECS
+
+    def _l2_get(self, full_key: str):
+        l2 = self.l2
+        if l2 is None:
+            return _MISSING
+        try:
+            payload = l2.get(full_key)
+            return _MISSING if payload is None else decode(payload)
+        except Exception as e:
+            ERRORS.inc(backend=l2.name, op="get")
+            print(f"Cache {l2.name} get failed ({type(e).__name__}): treating as miss")
+            return _MISSING
+
+    def _l2_set(self, full_key: str, value, ttl: float | None):
+        l2 = self.l2
+        if l2 is None:
+            return
+        try:
+            l2.set(full_key, encode(value), ttl)
+        except Exception as e:
+            ERRORS.inc(backend=l2.name, op="set")
+            print(f"Cache {l2.name} set failed ({type(e).__name__})")
+
+    # Sync API -------------------------------------------------
+    def get(self, key: str, default=None):
+        full_key = self._key(key)
+        value = self.l1.get(full_key)
+        if value is not None:
+            REQUESTS.inc(namespace=self.namespace, result="l1_hit")
+            return value
+        value = self._l2_get(full_key)
+        if value is _MISSING:
+            REQUESTS.inc(namespace=self.namespace, result="miss")
+            return default
+        REQUESTS.inc(namespace=self.namespace, result="l2_hit")
+        self.l1.set(full_key, value, self._l1_ttl(self.ttl))
+        return value
+
+    def set(self, key: str, value, ttl: float | None = None):
+        ttl = ttl if ttl is not None else self.ttl
+        full_key = self._key(key)
+        self.l1.set(full_key, value, self._l1_ttl(ttl))
+        self._l2_set(full_key, value, ttl)
+
+    def delete(self, key: str):
+        full_key = self._key(key)
+        self.l1.delete(full_key)
+        l2 = self.l2
+        if l2 is not None:
+            try:
+                l2.delete(full_key)
+            except Exception:
+                ERRORS.inc(backend=l2.name, op="delete")
+
+    # Async API (L2 off the event loop) ---------------------------
+    async def aget(self, key: str, default=None):
+        value = self.l1.get(self._key(key))
+        if value is not None:
+            REQUESTS.inc(namespace=self.namespace, result="l1_hit")
+            return value
+        return await asyncio.to_thread(self.get, key, default)
+
+    async def aset(self, key: str, value, ttl: float | None = None):
+        await asyncio.to_thread(self.set, key, value, ttl)
+
+    def memoize(self, key=None, cache_if=bool):
+        """
+        Cache a function's results. `key(*args, **kwargs)` builds the cache
+        key (default: a hash of all arguments). Results for which
+        `cache_if(result)` is false (None, [], failures) are not stored.
+        """
+        def decorator(fn):
+            def cache_key(args, kwargs):
+                return key(*args, **kwargs) if key else make_key(fn.__qualname__, args, kwargs)
+
+            if asyncio.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    k = cache_key(args, kwargs)
+                    value = await self.aget(k, _MISSING)
+                    if value is not _MISSING:
+                        return value
+                    value = await fn(*args, **kwargs)
+                    if cache_if(value):
+                        await self.aset(k, value)
+                    return value
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                k = cache_key(args, kwargs)
+                value = self.get(k, _MISSING)
+                if value is not _MISSING:
+                    return value
+                value = fn(*args, **kwargs)
+                if cache_if(value):
+                    self.set(k, value)
+                return value
+            return wrapper
+
+        return decorator
+
+
+_l1: MemoryBackend | None = None
+_l2: CacheBackend | None = None
+_l2_ready = False
+_lock = threading.Lock()
+
+
+def _tiers() -> tuple:
+    global _l1, _l2, _l2_ready
+    with _lock:
+        if _l1 is None:
+            _l1 = MemoryBackend(settings.CACHE_L1_SIZE, max_bytes=settings.CACHE_L1_MAX_BYTES)
+        if not _l2_ready:
+            _l2_ready = True
+            if settings.CACHE_BACKEND.lower() != "none":
+                try:
+                    _l2 = make_backend()
+                except Exception as e:
+                    print(f"Cache backend {settings.CACHE_BACKEND} unavailable ({e}); L1 only")
+        return _l1, _l2
+
+
+def cache(namespace: str, ttl: float | None = None, l1: MemoryBackend | None = None) -> Cache:
+    """
+    Namespace of the process-wide tiered cache. `l1` gives the namespace a
+    private L1 (e.g. large PDFs that shouldn't evict everything else).
+    """
+    return Cache(namespace, ttl, l1=l1)
+
+
+def configure(l2: CacheBackend | None, l1_size: int | None = None):
+    """Swap the shared backend (e.g. a fakeredis-backed RedisBackend in tests)."""
+    global _l1, _l2, _l2_ready
+    with _lock:
+        _l1 = MemoryBackend(l1_size or settings.CACHE_L1_SIZE, max_bytes=settings.CACHE_L1_MAX_BYTES)
+        _l2, _l2_ready = l2, True
@@ -0,0 +1,170 @@
+# app/core/compression.py
+"""
+Response compression middleware (brotli when available, else gzip).
+
+Only compressible content types above COMPRESSION_MIN_SIZE are touched;
+PDFs / ZIPs and responses that already carry a Content-Encoding (e.g.
+stored results served pre-gzipped) pass through. Streamed bodies such
+as NDJSON are compressed chunk by chunk and flushed, so lines still
+arrive as they are produced.
+
+Brotli is optional: `pip install brotli` to enable it.
+"""
+
+import gzip
+import zlib
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def parse_accept_encoding(accept_encoding: str) -> dict:
+    """{"gzip": 1.0, "br": 0.0, ...} from an Accept-Encoding header."""
+    offered = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        offered[name.strip()] = q
+    return offered
+
+
+def accepts_encoding(accept_encoding: str | None, encoding: str) -> bool:
+    return parse_accept_encoding(accept_encoding or "").get(encoding, 0) > 0
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    """Pick "br" or "gzip" from an Accept-Encoding header (honours q=0)."""
+    offered = parse_accept_encoding(accept_encoding)
+    if brotli is not None and offered.get("br", 0) > 0:
+        return "br"
+    if offered.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def _compress(encoding: str, data: bytes, gzip_level: int, brotli_quality: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._c = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._c = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._c.process(data) + self._c.flush()
+        return self._c.compress(data) + self._c.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._c.finish()
+        return self._c.flush()
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = ""
+        for key, value in scope.get("headers", []):
+            if key == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        stream = None
+        passthrough = False
+
+        async def wrapped_send(message):
+            nonlocal start, stream, passthrough
+
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+
+            if stream is None:
+                headers = {k.lower(): v for k, v in start.get("headers", [])}
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                compressible = (
+                    start["status"] >= 200
+                    and start["status"] not in (204, 304)
+                    and b"content-encoding" not in headers
+                    and content_type.startswith(COMPRESSIBLE_TYPES)
+                    # Small one-shot bodies aren't worth it; streams always are
+                    and (more or len(body) >= self.minimum_size)
+                )
+                if not compressible:
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+
+                raw = [
+                    (k, v) for k, v in start.get("headers", [])
+                    if k.lower() not in (b"content-length", b"vary")
+                ]
+                vary = headers.get(b"vary")
+                raw.append((b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"))
+                raw.append((b"content-encoding", encoding.encode("ascii")))
+
+                if not more:
+                    data = _compress(encoding, body, self.gzip_level, self.brotli_quality)
+                    raw.append((b"content-length", str(len(data)).encode("ascii")))
+                    await send({**start, "headers": raw})
+                    await send({"type": "http.response.body", "body": data})
+                    return
+                await send({**start, "headers": raw})
+                stream = _StreamCompressor(encoding, self.gzip_level, self.brotli_quality)
+
+            data = stream.chunk(body) if body else b""
+            if not more:
+                data += stream.finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more})
+
+        await self.app(scope, receive, wrapped_send)
@@ -0,0 +1,84 @@
+# app/core/deadline.py
+"""
+Request-level time budgets.
+
+A Deadline is created per analyze request (?budget_ms=) and stored in a
+context variable, so it reaches every stage without threading it through
+call signatures — including stages run with asyncio.to_thread, which
+copies the context:
+
+    deadline = Deadline(budget_ms)
+    current_deadline.set(deadline)
+
+    # top level: cancel a stage when the budget runs out
+    perf = await deadline.run("performance", get_performance(url), default=FALLBACK)
+
+    # inside a stage: never wait longer than the request has left
+    subprocess.run(cmd, timeout=timeout_for(60))
+
+Stages cut off by the deadline are recorded in `deadline.skipped`, and
+the response is built from whatever completed.
+"""
+
+import asyncio
+import time
+from contextvars import ContextVar
+
+# Below this a stage isn't worth starting
+MIN_STAGE_SECS = 0.05
+
+
+class Deadline:
+    __slots__ = ("budget_ms", "started", "expires_at", "skipped")
+
+    def __init__(self, budget_ms: int):
+        self.budget_ms = budget_ms
+        self.started = time.monotonic()
+        self.expires_at = self.started + budget_ms / 1000
+        self.skipped: list = []
+
+    def remaining(self) -> float:
+        """Seconds left (never negative)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def elapsed_ms(self) -> int:
+        return int((time.monotonic() - self.started) * 1000)
+
+    def expired(self) -> bool:
+        return self.remaining() < MIN_STAGE_SECS
+
+    def skip(self, stage: str):
+        if stage not in self.skipped:
+            self.skipped.append(stage)
+            print(f"Deadline: skipped {stage} ({self.elapsed_ms()} / {self.budget_ms} ms)")
+
+    async def run(self, stage: str, awaitable, default=None, reserve: float = 0.0):
+        """
+        Await `awaitable` until the deadline (minus `reserve` seconds kept
+        for later work). On expiry it is cancelled, the stage is recorded
+        as skipped and `default` is returned.
+        """
+        timeout = self.remaining() - reserve
+        if timeout < MIN_STAGE_SECS:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            self.skip(stage)
+            return default
+        try:
+            return await asyncio.wait_for(awaitable, timeout)
+        except asyncio.TimeoutError:
+            if self.remaining() - reserve > MIN_STAGE_SECS:
+                raise  # the stage's own timeout, not the deadline
+            self.skip(stage)
+            return default
+
+
+current_deadline: ContextVar[Deadline | None] = ContextVar("current_deadline", default=None)
+
+
+def timeout_for(default: float) -> float:
+    """`default` capped by the current request's remaining budget (if any)."""
+    deadline = current_deadline.get()
+    if deadline is None:
+        return default
+    return max(MIN_STAGE_SECS, min(default, deadline.remaining()))
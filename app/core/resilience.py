@@ -0,0 +1,272 @@
+# app/core/resilience.py
+"""
+Circuit breakers and bulkheads for external dependencies.
+
+Each dependency (SerpAPI, PageSpeed Insights, OpenAI, Playwright) gets:
+
+  breaker   failure rate over the last BREAKER_WINDOW calls; once at
+            least BREAKER_MIN_CALLS have been seen and the rate reaches
+            BREAKER_FAILURE_RATE the circuit opens and calls fail fast
+            for BREAKER_OPEN_SECS. Then it goes half-open: a single
+            probe call is let through, and its outcome closes the
+            circuit or re-opens it.
+  bulkhead  its own cap on concurrent calls. Calls over the cap are
+            rejected immediately rather than queued, so one slow
+            dependency cannot tie up the workers the others need.
+
+Rejections raise DependencyUnavailable. Callers already have a fallback
+for a failed dependency, so they treat it like any other failure. State
+is reported on GET /health and in the /metrics gauges.
+
+Calls that fail once the caller's request budget (app/core/deadline.py)
+is spent are not counted: their timeouts were capped by timeout_for(),
+so they say nothing about the dependency, and a few ?budget_ms=1000
+requests must not open the circuit for everyone.
+
+    SERPAPI = dependency("serpapi")
+    results = SERPAPI.call(fetch_results, params)      # sync
+    data = await PAGESPEED.acall(fetch_psi, url)       # async
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from app.core.config import settings
+from app.core.deadline import current_deadline
+from app.core.metrics import counter, gauge
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+BREAKER_STATE = gauge("dependency_breaker_state", "Circuit state (0 closed, 1 half-open, 2 open)", ["dependency"])
+IN_FLIGHT = gauge("dependency_in_flight", "Calls currently inside the bulkhead", ["dependency"])
+REJECTED = counter("dependency_rejected_total", "Calls rejected without reaching the dependency", ["dependency", "reason"])
+OUTCOMES = counter("dependency_calls_total", "Completed dependency calls", ["dependency", "outcome"])
+
+
+class DependencyUnavailable(Exception):
+    """Call rejected by an open circuit or a full bulkhead."""
+
+    def __init__(self, name: str, reason: str):
+        super().__init__(f"{name} unavailable ({reason})")
+        self.name = name
+        self.reason = reason
+
+
+def _budget_spent() -> bool:
+    deadline = current_deadline.get()
+    return deadline is not None and deadline.expired()
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        window: int = 20,
+        min_calls: int = 5,
+        failure_rate: float = 0.5,
+        open_secs: float = 30.0,
+    ):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_secs = open_secs
+        self._outcomes = deque(maxlen=window)  # True = failure
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_secs:
+            self._set_state(HALF_OPEN)
+        return self._state
+
+    def _set_state(self, state: str):
+        if state != self._state:
+            print(f"Circuit {self.name}: {self._state} -> {state}")
+        self._state = state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        if state != HALF_OPEN:
+            self._probe_in_flight = False
+        BREAKER_STATE.set(STATE_VALUES[state], dependency=self.name)
+
+    def allow(self) -> bool:
+        """May a call go through now? In half-open state only one probe at a time."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record(self, failed: bool):
+        with self._lock:
+            state = self._current_state()
+            if state == HALF_OPEN:
+                self._outcomes.clear()
+                self._set_state(OPEN if failed else CLOSED)
+                return
+            self._outcomes.append(failed)
+            if state == CLOSED and len(self._outcomes) >= self.min_calls:
+                if sum(self._outcomes) / len(self._outcomes) >= self.failure_rate:
+                    self._set_state(OPEN)
+
+    def release_probe(self):
+        """A half-open probe ended without an outcome (e.g. cancelled)."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            state = self._current_state()
+            calls = len(self._outcomes)
+            failures = sum(self._outcomes)
+            retry_in = (
+                max(0.0, self.open_secs - (time.monotonic() - self._opened_at)) if state == OPEN else 0.0
+            )
+        return {
+            "state": state,
+            "window_calls": calls,
+            "failure_rate": round(failures / calls, 3) if calls else 0.0,
+            "retry_in_secs": round(retry_in, 1),
+        }
+
+
+class Bulkhead:
+    """Non-blocking concurrency cap, usable from threads and the event loop alike."""
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.in_flight >= self.limit:
+                return False
+            self.in_flight += 1
+            IN_FLIGHT.set(self.in_flight, dependency=self.name)
+            return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+            IN_FLIGHT.set(self.in_flight, dependency=self.name)
+
+
+class Dependency:
+    def __init__(self, name: str, limit: int, **breaker_options):
+        self.name = name
+        self.breaker = CircuitBreaker(name, **breaker_options)
+        self.bulkhead = Bulkhead(name, limit)
+
+    def _enter(self, use_breaker: bool):
+        if use_breaker and not self.breaker.allow():
+            REJECTED.inc(dependency=self.name, reason="circuit_open")
+            raise DependencyUnavailable(self.name, "circuit open")
+        if not self.bulkhead.try_acquire():
+            if use_breaker:
+                self.breaker.release_probe()
+            REJECTED.inc(dependency=self.name, reason="bulkhead_full")
+            raise DependencyUnavailable(self.name, "bulkhead full")
+
+    def _exit(self, failed: bool | None):
+        self.bulkhead.release()
+        if failed is None:
+            self.breaker.release_probe()
+            return
+        self.breaker.record(failed)
+        OUTCOMES.inc(dependency=self.name, outcome="failure" if failed else "success")
+
+    def call(self, fn, *args, **kwargs):
+        """
+        Run a sync call through the breaker and bulkhead; exceptions count
+        as failures unless the request budget ran out.
+        """
+        self._enter(True)
+        failed = True
+        try:
+            result = fn(*args, **kwargs)
+            failed = False
+            return result
+        except Exception:
+            if _budget_spent():
+                failed = None
+            raise
+        finally:
+            self._exit(failed)
+
+    async def acall(self, fn, *args, **kwargs):
+        """Async variant. A cancelled call (e.g. request deadline) is not a failure."""
+        self._enter(True)
+        failed = True
+        try:
+            result = await fn(*args, **kwargs)
+            failed = False
+            return result
+        except asyncio.CancelledError:
+            failed = None
+            raise
+        except Exception:
+            if _budget_spent():
+                failed = None
+            raise
+        finally:
+            self._exit(failed)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Bulkhead only: for calls whose failures say nothing about the dependency."""
+        self._enter(False)
+        try:
+            yield
+        finally:
+            self.bulkhead.release()
+
+    def snapshot(self) -> dict:
+        return {
+            **self.breaker.snapshot(),
+            "in_flight": self.bulkhead.in_flight,
+            "limit": self.bulkhead.limit,
+        }
+
+
+_dependencies: dict = {}
+_registry_lock = threading.Lock()
+
+
+def dependency(name: str) -> Dependency:
+    """Shared Dependency for `name`, configured from settings on first use."""
+    with _registry_lock:
+        dep = _dependencies.get(name)
+        if dep is None:
+            dep = _dependencies[name] = Dependency(
+                name,
+                limit=settings.BULKHEAD_LIMITS.get(name, settings.BULKHEAD_DEFAULT_LIMIT),
+                window=settings.BREAKER_WINDOW,
+                min_calls=settings.BREAKER_MIN_CALLS,
+                failure_rate=settings.BREAKER_FAILURE_RATE,
+                open_secs=settings.BREAKER_OPEN_SECS,
+            )
+            BREAKER_STATE.set(0, dependency=name)
+    return dep
+
+
+def dependency_status() -> dict:
+    with _registry_lock:
+        deps = dict(_dependencies)
+    return {name: dep.snapshot() for name, dep in sorted(deps.items())}
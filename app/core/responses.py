@@ -0,0 +1,41 @@
+# app/core/responses.py
+"""
+Fast JSON responses.
+
+ORJSONResponse is the app-wide default response class (see main.py).
+model_response() is for endpoints that already hold a validated model:
+returning a Response directly skips FastAPI's response_model
+re-validation, and the dump goes straight to orjson.
+etag_matches() implements If-None-Match for conditional GETs.
+"""
+
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+
+def model_response(
+    model: BaseModel,
+    *,
+    exclude: set | None = None,
+    status_code: int = 200,
+    headers: dict | None = None,
+) -> ORJSONResponse:
+    return ORJSONResponse(
+        model.model_dump(mode="json", exclude=exclude),
+        status_code=status_code,
+        headers=headers,
+    )
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against our ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    def opaque(tag: str) -> str:
+        tag = tag.strip()
+        return tag[2:] if tag.startswith("W/") else tag
+
+    return opaque(etag) in {opaque(t) for t in if_none_match.split(",")}
@@ -1,17 +1,54 @@
-from pathlib import Path
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
 from dotenv import load_dotenv
 
-env_path = Path("D:/Desktop/AEO/.env")
-load_dotenv(dotenv_path=env_path, override=True)
+# .env from ENV_FILE, else the nearest .env up from the project
+load_dotenv(dotenv_path=os.getenv("ENV_FILE") or None, override=True)
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.compression import CompressionMiddleware
 from app.api.analyze import router as analyze_router
 from app.api.report import router as report_router
 from app.api.rewrite import router as rewrite_router
+from app.api.rescore import router as rescore_router
+from app.api.site import router as site_router
+from app.api.sitemap import router as sitemap_router
+from app.api.crawler import router as crawler_router
+from app.api.jobs import router as jobs_router
+from app.api.history import router as history_router
+from app.services.pdf_renderer import shutdown_executor
+from app.services.crawler import close_shared_client
+from app.services.fetch_strategy import get_strategy_table
+from app.services.warmup import preload
+from app.services.score_history import close_history
+from app.core.config import settings
+from app.core.metrics import render as render_metrics
+from app.core.resilience import OPEN, dependency_status
+from app.core.admission import get_admission
+
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.WARM_START:
+        timings = await asyncio.to_thread(preload)
+        print(f"Warm start preload (ms): {timings}")
+    yield
+    shutdown_executor()
+    await close_shared_client()
+    get_strategy_table().save(force=True)
+    close_history()
 
-app = FastAPI(title="AEO Grader API", version="0.1.0")
+
+app = FastAPI(
+    title="AEO Grader API",
+    version="0.1.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+)
 
 
 app.add_middleware(
@@ -20,12 +57,38 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Retry-After"],
+)
+
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
 )
 
 @app.get("/health")
 def health():
-    return {"status": "ok"}
+    # "degraded": the API is up but some dependency is failing fast
+    dependencies = dependency_status()
+    degraded = any(d["state"] == OPEN for d in dependencies.values())
+    return {
+        "status": "degraded" if degraded else "ok",
+        "dependencies": dependencies,
+        "admission": get_admission().snapshot(),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 app.include_router(analyze_router)
 app.include_router(report_router)
 app.include_router(rewrite_router)
+app.include_router(rescore_router)
+app.include_router(site_router)
+app.include_router(sitemap_router)
+app.include_router(crawler_router)
+app.include_router(jobs_router)
+app.include_router(history_router)
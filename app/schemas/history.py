@@ -0,0 +1,38 @@
+# app/schemas/history.py
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+from datetime import datetime
+
+
+class HistoryPoint(BaseModel):
+    ts: datetime
+    analysis_id: Optional[str] = None
+    source: Optional[str] = None
+    partial: bool = False
+    scores: Dict[str, Optional[float]]
+    breakdown: Dict[str, Optional[float]]
+    penalties: Dict[str, Optional[float]]
+    notes: List[str] = []
+
+
+class HistoryPoints(BaseModel):
+    url: str
+    points: List[HistoryPoint]
+
+
+class MetricStats(BaseModel):
+    avg: float
+    min: float
+    max: float
+
+
+class SeriesBucket(BaseModel):
+    start: datetime
+    count: int
+    metrics: Dict[str, MetricStats]
+
+
+class HistorySeries(BaseModel):
+    url: str
+    period: str
+    buckets: List[SeriesBucket]
@@ -0,0 +1,29 @@
+# app/schemas/jobs.py
+from pydantic import BaseModel
+from typing import Dict, Optional
+
+
+class JobAccepted(BaseModel):
+    job_id: str
+    status: str
+    priority: str
+    status_url: str
+
+
+class StageStatus(BaseModel):
+    status: str
+    attempts: int
+    error: Optional[str] = None
+
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: str
+    priority: str
+    tenant: Optional[str] = None
+    analysis_id: Optional[str] = None
+    result_url: Optional[str] = None
+    error: Optional[str] = None
+    created_at: float
+    updated_at: float
+    stages: Dict[str, StageStatus]
@@ -0,0 +1,68 @@
+# app/schemas/llm.py
+from pydantic import BaseModel, ConfigDict, field_validator
+from typing import List, Literal
+
+
+ReadabilityGrade = Literal["A1", "A2", "B1", "B2", "C1", "C2"]
+SCORE_FIELDS = ["intent_coverage", "expertise_score", "content_score", "aeo_score"]
+
+
+# -------------------------------------------------------
+# Structured LLM content analysis (llm.analyze_content_llm)
+# -------------------------------------------------------
+class ContentAnalysis(BaseModel):
+    """What the content-analysis prompt must return (see CONTENT_ANALYSIS_SCHEMA)."""
+    model_config = ConfigDict(extra="ignore")
+
+    intent_coverage: int
+    readability_grade: ReadabilityGrade
+    expertise_score: int
+    missing_sections: List[str]
+    recommendations: List[str]
+    content_score: int
+    aeo_score: int
+
+    @field_validator(*SCORE_FIELDS, mode="before")
+    @classmethod
+    def _score(cls, value):
+        # Tolerate "85", "85%", 85.0 — then clamp to 0-100
+        if isinstance(value, str):
+            value = value.strip().rstrip("%")
+        try:
+            number = int(float(value))
+        except (TypeError, ValueError, OverflowError):
+            # null / lists / objects / NaN: a ValueError so pydantic reports a
+            # ValidationError and the caller's retry / failure counting runs
+            raise ValueError(f"not a score: {value!r}")
+        return max(0, min(100, number))
+
+    @field_validator("readability_grade", mode="before")
+    @classmethod
+    def _grade(cls, value):
+        return value.strip().upper() if isinstance(value, str) else value
+
+
+# JSON schema for OpenAI structured outputs (strict mode: every field
+# required, no extra keys)
+CONTENT_ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "intent_coverage": {"type": "integer", "description": "0-100"},
+        "readability_grade": {"type": "string", "enum": ["A1", "A2", "B1", "B2", "C1", "C2"]},
+        "expertise_score": {"type": "integer", "description": "0-100"},
+        "missing_sections": {"type": "array", "items": {"type": "string"}},
+        "recommendations": {"type": "array", "items": {"type": "string"}},
+        "content_score": {"type": "integer", "description": "0-100"},
+        "aeo_score": {"type": "integer", "description": "0-100"},
+    },
+    "required": [
+        "intent_coverage",
+        "readability_grade",
+        "expertise_score",
+        "missing_sections",
+        "recommendations",
+        "content_score",
+        "aeo_score",
+    ],
+    "additionalProperties": False,
+}
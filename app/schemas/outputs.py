@@ -1,7 +1,9 @@
 # app/schemas/outputs.py
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional
+from app.core.config import settings
 from app.schemas.score_details import ScoreBreakdown
+from app.services.snapshots import is_valid_id
 
 
 # -------------------------------------------------------
@@ -107,4 +109,29 @@ class AnalyzeResponse(BaseModel):
     ux: UXHeuristicInsights
 
     recommendations: List[str]
-    debug: dict
+    # Omitted from the response with ?debug=false
+    debug: Optional[dict] = None
+
+    # Snapshot id (see app/services/snapshots.py); None if not persisted
+    analysis_id: Optional[str] = None
+
+    # Set when the time budget ran out; skipped stages used fallbacks
+    partial: bool = False
+    skipped_stages: List[str] = []
+
+
+# -------------------------------------------------------
+# Bulk PDF export
+# -------------------------------------------------------
+class BulkReportRequest(BaseModel):
+    reports: List[AnalyzeResponse] = Field([], max_length=settings.PDF_BULK_MAX_ITEMS)
+    analysis_ids: List[str] = Field([], max_length=settings.PDF_BULK_MAX_ITEMS)
+
+    @field_validator("analysis_ids")
+    @classmethod
+    def _valid_ids(cls, value):
+        # Rejected before streaming starts, so a bad id is a 422, not a broken ZIP
+        bad = [i for i in value if not is_valid_id(i)]
+        if bad:
+            raise ValueError(f"invalid analysis ids: {bad[:5]}")
+        return value
@@ -0,0 +1,45 @@
+# app/schemas/rescore.py
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional
+
+from app.core.config import settings
+from app.services.snapshots import is_valid_id
+
+
+class RescoreRequest(BaseModel):
+    analysis_ids: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.RESCORE_MAX_IDS,
+        description="Snapshot ids (python -m app.services.rescore rescores all of them)",
+    )
+
+    @field_validator("analysis_ids")
+    @classmethod
+    def _valid_ids(cls, value):
+        bad = [i for i in value if not is_valid_id(i)]
+        if bad:
+            raise ValueError(f"invalid analysis ids: {bad[:5]}")
+        return value
+
+
+class RescoredAnalysis(BaseModel):
+    id: str
+    url: Optional[str]
+    seo_score: int
+    technical_score: int
+    content_score: int
+    aeo_score: int
+    final_aeo: int
+    total_penalty: float
+    ux_score: int
+    seo_delta: float
+    technical_delta: float
+    content_delta: float
+    aeo_delta: float
+    penalties: List[str] = []
+
+
+class RescoreResponse(BaseModel):
+    count: int
+    results: List[RescoredAnalysis]
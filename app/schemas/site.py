@@ -0,0 +1,56 @@
+# app/schemas/site.py
+from pydantic import BaseModel, HttpUrl, Field
+from typing import List, Optional
+from datetime import datetime
+
+
+class SiteCrawlRequest(BaseModel):
+    url: HttpUrl = Field(..., description="Start URL (crawl stays on this host)")
+    company_name: str = ""
+    product: str = ""
+    industry: str = ""
+    location: str = ""
+    max_pages: Optional[int] = Field(None, ge=1, le=10000)
+    concurrency: Optional[int] = Field(None, ge=1, le=64)
+    rate_per_host: Optional[float] = Field(None, ge=0.1, le=50, description="Requests per second per host")
+    use_sitemap: bool = True
+    include_pages: bool = False
+
+
+class SitePageSummary(BaseModel):
+    url: str
+    title: Optional[str]
+    seo_score: int
+    keyword_coverage: int
+    schema_present: bool
+    has_meta_description: bool
+    has_h1: bool
+
+
+class SiteReport(BaseModel):
+    start_url: str
+    pages_crawled: int
+    duplicates_skipped: int
+    blocked_by_robots: int
+    errors: int
+    links_dropped: int
+    seo_score_avg: float
+    keyword_coverage_avg: float
+    schema_coverage: float
+    meta_description_coverage: float
+    h1_coverage: float
+    site_score: int
+    weakest_pages: List[SitePageSummary]
+    pages: Optional[List[SitePageSummary]] = None
+
+
+class SitemapIngestRequest(BaseModel):
+    sitemap_url: HttpUrl = Field(..., description="sitemap.xml, sitemap index or .xml.gz")
+    industry: str = ""
+    location: str = ""
+    since: Optional[datetime] = Field(None, description="Only URLs with lastmod after this (default: last run)")
+    incremental: bool = True
+    workers: Optional[int] = Field(None, ge=1, le=64)
+    max_urls: Optional[int] = Field(None, ge=1)
+    persist: Optional[bool] = None
+    rate_per_host: Optional[float] = Field(None, ge=0.1, le=50, description="Requests per second per host")
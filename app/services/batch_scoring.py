@@ -0,0 +1,397 @@
+# app/services/batch_scoring.py
+"""
+Columnar (NumPy) version of the scoring stages.
+
+Mirrors score_onpage / score_technical / score_content / score_aeo,
+industry + location adjustments, compute_penalties, compute_ux_score,
+compute_weighted_score and compute_benchmark_deltas, but for N pages at
+once. Every column matches what the scalar functions return for the
+same page.
+"""
+
+from typing import Sequence
+
+import numpy as np
+
+from app.services.benchmarks import industry_benchmarks
+from app.services.content_extractor import page_text
+from app.services.benchmarks_v2 import INDUSTRY_AVG
+from app.services.location_benchmarks import LOCATION_BENCHMARKS
+from app.services.scoring import to_int
+
+
+CTA_KEYWORDS = ["contact", "buy", "book", "call", "enquire", "get started"]
+TRUST_KEYWORDS = ["testimonials", "reviews", "certified", "awards", "case study"]
+OK_READABILITY = [None, "A", "B", "C"]
+
+SCORE_KEYS = ["seo_score", "technical_score", "content_score", "aeo_score"]
+INDUSTRY_METRIC = {
+    "seo_score": "seo",
+    "technical_score": "technical",
+    "content_score": "content",
+    "aeo_score": "aeo",
+}
+LOCATION_METRIC = {
+    "seo_score": "seo",
+    "technical_score": "performance",
+    "content_score": "content",
+    "aeo_score": "aeo",
+}
+
+
+# ---------------------------------------------------------
+#  FEATURE EXTRACTION — dicts → columns
+# ---------------------------------------------------------
+def extract_features(onpages: list, performances: list, llm_raws: list | None = None) -> dict:
+    """
+    Turn per-page onpage / performance / llm_raw dicts into columnar arrays.
+    This is the only per-row Python loop; everything after is vectorized.
+    """
+    n = len(onpages)
+    llm_raws = llm_raws if llm_raws is not None else [{}] * n
+
+    cols = {
+        "title_len": np.zeros(n, dtype=np.int64),
+        "meta_len": np.zeros(n, dtype=np.int64),
+        "has_h1": np.zeros(n, dtype=bool),
+        "schema_present": np.zeros(n, dtype=bool),
+        "alt_ratio": np.full(n, np.nan),
+        "content_len": np.zeros(n, dtype=np.int64),
+        "cta_present": np.zeros(n, dtype=bool),
+        "trust_present": np.zeros(n, dtype=bool),
+        "has_perf": np.zeros(n, dtype=bool),
+        "performance_score": np.zeros(n, dtype=np.int64),
+        "mobile_friendly": np.zeros(n, dtype=bool),
+        "has_cwv": np.zeros(n, dtype=bool),
+        "intent_coverage": np.zeros(n, dtype=np.int64),
+        "expertise_score": np.zeros(n, dtype=np.int64),
+        "content_score_llm": np.zeros(n, dtype=np.int64),
+        "aeo_score_llm": np.zeros(n, dtype=np.int64),
+        "readability_flagged": np.zeros(n, dtype=bool),
+    }
+
+    for i, (onpage, perf, llm_raw) in enumerate(zip(onpages, performances, llm_raws)):
+        onpage = onpage or {}
+        llm_raw = llm_raw or {}
+
+        cols["title_len"][i] = len(onpage.get("title") or "")
+        cols["meta_len"][i] = len(onpage.get("meta_description") or "")
+        cols["has_h1"][i] = bool(onpage.get("h1"))
+        cols["schema_present"][i] = bool(onpage.get("schema_present"))
+        ratio = onpage.get("images_with_alt_ratio")
+        if ratio is not None:
+            cols["alt_ratio"][i] = ratio
+
+        # As compute_ux_score: length on the main text, CTA / trust on the whole page
+        text = page_text(onpage)
+        lowered = (onpage.get("content_text") or text).lower()
+        cols["content_len"][i] = len(text)
+        cols["cta_present"][i] = any(kw in lowered for kw in CTA_KEYWORDS)
+        cols["trust_present"][i] = any(kw in lowered for kw in TRUST_KEYWORDS)
+
+        cols["has_perf"][i] = bool(perf)
+        if perf:
+            cols["performance_score"][i] = perf.get("performance_score", 60)
+            cols["mobile_friendly"][i] = bool(perf.get("mobile_friendly", False))
+            cols["has_cwv"][i] = bool(perf.get("core_web_vitals"))
+
+        cols["intent_coverage"][i] = to_int(llm_raw.get("intent_coverage"))
+        cols["expertise_score"][i] = to_int(llm_raw.get("expertise_score"))
+        cols["content_score_llm"][i] = to_int(llm_raw.get("content_score"))
+        cols["aeo_score_llm"][i] = to_int(llm_raw.get("aeo_score"))
+        cols["readability_flagged"][i] = llm_raw.get("readability_grade") not in OK_READABILITY
+
+    return cols
+
+
+# ---------------------------------------------------------
+#  HELPERS
+# ---------------------------------------------------------
+def _per_row(value, n: int) -> np.ndarray:
+    """Broadcast a single industry/location (or a per-page list) to an object column."""
+    if value is None or isinstance(value, str):
+        return np.full(n, value, dtype=object)
+    arr = np.asarray(list(value), dtype=object)
+    if arr.shape != (n,):
+        raise ValueError(f"Expected {n} values, got {arr.shape[0]}")
+    return arr
+
+
+def _lookup(keys: np.ndarray, fn) -> np.ndarray:
+    """Evaluate fn once per distinct key and scatter the result back to the rows."""
+    uniq = {}
+    out = np.empty(len(keys), dtype=object)
+    for i, k in enumerate(keys):
+        if k not in uniq:
+            uniq[k] = fn(k)
+        out[i] = uniq[k]
+    return out
+
+
+def _round2(x: np.ndarray) -> np.ndarray:
+    """
+    round(x, 2) with Python semantics.
+    np.round goes through x * 100 and can disagree with Python on values
+    sitting right on a half boundary, so those few rows use round().
+    """
+    out = np.round(x, 2)
+    scaled = x * 100
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_half):
+        out[i] = round(float(x[i]), 2)
+    return out
+
+
+# ---------------------------------------------------------
+#  SCORING (scoring.py)
+# ---------------------------------------------------------
+def score_onpage_batch(f: dict) -> np.ndarray:
+    title_len, meta_len = f["title_len"], f["meta_len"]
+
+    title = np.where((title_len >= 30) & (title_len <= 65), 100, np.where(title_len > 0, 50, 0))
+    meta = np.where((meta_len >= 80) & (meta_len <= 160), 100, np.where(meta_len > 0, 40, 0))
+    h1 = np.where(f["has_h1"], 100, 0)
+    schema = np.where(f["schema_present"], 100, 30)
+    ratio = f["alt_ratio"]
+    alt = np.where(np.isnan(ratio), 50, np.floor(np.nan_to_num(ratio) * 100))
+
+    total = title + meta + h1 + schema + alt
+    return np.clip(np.round(total / 5), 0, 100).astype(np.int64)
+
+
+def score_technical_batch(f: dict) -> np.ndarray:
+    base = f["performance_score"]
+    mobile = np.where(f["mobile_friendly"], 15, 0)
+    vitals = np.where(f["has_cwv"], 10, 0)
+    scored = np.clip(base + mobile + vitals, 0, 100)
+    return np.where(f["has_perf"], scored, 50).astype(np.int64)
+
+
+def score_content_batch(intent_coverage: np.ndarray, expertise: np.ndarray) -> np.ndarray:
+    return np.clip(np.round(0.6 * intent_coverage + 0.4 * expertise), 0, 100).astype(np.int64)
+
+
+def score_aeo_batch(seo: np.ndarray, technical: np.ndarray, content: np.ndarray) -> np.ndarray:
+    return np.clip(np.round(0.3 * seo + 0.3 * technical + 0.4 * content), 0, 100).astype(np.int64)
+
+
+def apply_industry_context_batch(scores: dict, industries: np.ndarray) -> dict:
+    """Vector form of scoring.apply_industry_context (skipped for empty industry, like analyze)."""
+    keys = _lookup(industries, lambda k: (k or "").lower() if k else None)
+    for key in SCORE_KEYS:
+        metric = INDUSTRY_METRIC[key]
+        bench = _lookup(keys, lambda k: industry_benchmarks[k][metric] if k in industry_benchmarks else np.nan)
+        bench = bench.astype(float)
+        mask = ~np.isnan(bench)
+        if not mask.any():
+            continue
+        values = scores[key].astype(float)
+        adjusted = np.clip(values[mask] / bench[mask] * 100, 0, 100)
+        values[mask] = _round2(adjusted)
+        scores[key] = values
+    return scores
+
+
+def apply_location_context_batch(scores: dict, locations: np.ndarray) -> dict:
+    """Vector form of location_benchmarks.apply_location_context."""
+    active = np.array([bool(loc) for loc in locations], dtype=bool)
+    if not active.any():
+        return scores
+    for key in SCORE_KEYS:
+        metric = LOCATION_METRIC[key]
+        delta = _lookup(
+            locations,
+            lambda loc: LOCATION_BENCHMARKS.get(loc.lower().strip(), LOCATION_BENCHMARKS["default"]).get(metric, 0)
+            if loc else 0,
+        ).astype(float)
+        values = scores[key]
+        moved = np.maximum(0, np.minimum(100, values + delta))
+        scores[key] = np.where(active, moved, values)
+    return scores
+
+
+# ---------------------------------------------------------
+#  PENALTIES / UX / WEIGHTS / BENCHMARKS
+# ---------------------------------------------------------
+PENALTY_NOTES = [
+    ("meta_description_penalty", "Missing meta description"),
+    ("schema_penalty", "Schema markup missing"),
+    ("alt_text_penalty", "Low alt text coverage"),
+    ("cwv_penalty", "Missing Core Web Vitals data"),
+    ("ux_penalty", "Poor readability grade"),
+]
+
+UX_ISSUES = [
+    ("cta_present", "No clear call-to-action (CTA) found."),
+    ("trust_signals_present", "Missing trust signals (reviews, testimonials, certifications)."),
+    ("readability_ok", "Content too short — may not satisfy user intent."),
+]
+
+
+def compute_penalties_batch(f: dict) -> dict:
+    ratio = f["alt_ratio"]
+    cols = {
+        "meta_description_penalty": np.where(f["meta_len"] > 0, 0, 10),
+        "schema_penalty": np.where(f["schema_present"], 0, 8),
+        "alt_text_penalty": np.where(~np.isnan(ratio) & (np.nan_to_num(ratio, nan=1.0) < 0.7), 6, 0),
+        "cwv_penalty": np.where(f["has_cwv"], 0, 5),
+        "ux_penalty": np.where(f["readability_flagged"], 4, 0),
+    }
+    cols["total_penalty"] = sum(cols[k] for k, _ in PENALTY_NOTES)
+    return cols
+
+
+def compute_ux_batch(f: dict) -> dict:
+    readability_ok = f["content_len"] >= 300
+    ux_score = (
+        80
+        - np.where(f["cta_present"], 0, 10)
+        - np.where(f["trust_present"], 0, 10)
+        - np.where(readability_ok, 0, 10)
+        - np.where(f["mobile_friendly"], 0, 10)
+    )
+    return {
+        "ux_score": np.maximum(0, ux_score),
+        "cta_present": f["cta_present"],
+        "trust_signals_present": f["trust_present"],
+        "mobile_friendly": f["mobile_friendly"],
+        "readability_ok": readability_ok,
+    }
+
+
+def compute_weighted_batch(scores: dict, total_penalty: np.ndarray, ux_score: np.ndarray) -> dict:
+    """Vector form of score_engine.compute_weighted_score."""
+    seo_w = scores["seo_score"] * 0.30
+    tech_w = scores["technical_score"] * 0.30
+    content_w = scores["content_score"] * 0.25
+    brand_w = 70 * 0.15
+
+    base_total = seo_w + tech_w + content_w + brand_w
+    final_aeo = np.maximum(0, base_total - total_penalty)
+
+    n = len(total_penalty)
+    return {
+        "seo_weighted": np.round(seo_w).astype(np.int64),
+        "technical_weighted": np.round(tech_w).astype(np.int64),
+        "content_weighted": np.round(content_w).astype(np.int64),
+        "brand_weighted": np.full(n, round(brand_w), dtype=np.int64),
+        "competitor_adjustment": np.zeros(n, dtype=np.int64),
+        "ux_score": ux_score,
+        "final_aeo": np.round(final_aeo).astype(np.int64),
+    }
+
+
+def compute_benchmark_deltas_batch(scores: dict, industries: np.ndarray) -> dict:
+    """Vector form of benchmarks_v2.compute_benchmark_deltas (whole points, round-half-even)."""
+    avg = _lookup(industries, lambda k: INDUSTRY_AVG.get((k or "").lower(), INDUSTRY_AVG["default"]))
+    deltas = {
+        "seo_delta": scores["seo_score"] - np.array([a["seo"] for a in avg], dtype=float),
+        "technical_delta": scores["technical_score"] - np.array([a["technical"] for a in avg], dtype=float),
+        "content_delta": scores["content_score"] - np.array([a["content"] for a in avg], dtype=float),
+        "aeo_delta": scores["aeo_score"] - np.array([a["aeo"] for a in avg], dtype=float),
+    }
+    # np.round to 0 decimals rounds half to even, exactly like round()
+    return {k: np.round(v).astype(np.int64) for k, v in deltas.items()}
+
+
+# ---------------------------------------------------------
+#  FULL PASS
+# ---------------------------------------------------------
+def score_batch(
+    features: dict,
+    industry: str | Sequence[str] | None = None,
+    location: str | Sequence[str] | None = None,
+) -> dict:
+    """
+    Run steps 9–16 of analyze() over N pages in one vectorized pass.
+    Returns a flat dict of columns (scores, penalties, ux, weighted, deltas).
+    """
+    n = len(features["title_len"])
+    industries = _per_row(industry, n)
+    locations = _per_row(location, n)
+
+    # 9) Algorithmic baseline scores
+    seo = score_onpage_batch(features)
+    technical = score_technical_batch(features)
+    content_algo = score_content_batch(features["intent_coverage"], features["expertise_score"])
+    aeo_algo = score_aeo_batch(seo, technical, content_algo)
+
+    content_llm = features["content_score_llm"]
+    aeo_llm = features["aeo_score_llm"]
+    scores = {
+        "seo_score": seo.astype(float),
+        "technical_score": technical.astype(float),
+        "content_score": np.where(content_llm != 50, content_llm, content_algo).astype(float),
+        "aeo_score": np.where(aeo_llm != 50, aeo_llm, aeo_algo).astype(float),
+    }
+
+    # 10) + 11) Industry / location adjustments
+    scores = apply_industry_context_batch(scores, industries)
+    scores = apply_location_context_batch(scores, locations)
+
+    # 13) + 14) UX + penalties
+    ux = compute_ux_batch(features)
+    penalties = compute_penalties_batch(features)
+
+    # 15) + 16) Weighted engine + benchmarks
+    weighted = compute_weighted_batch(scores, penalties["total_penalty"], ux["ux_score"])
+    deltas = compute_benchmark_deltas_batch(scores, industries)
+
+    out = {f"{k}_raw": v for k, v in scores.items()}
+    out.update({k: np.round(v).astype(np.int64) for k, v in scores.items()})
+    out["content_score_algo"] = content_algo
+    out["aeo_score_algo"] = aeo_algo
+    out.update({f"ux_{k}" if k != "ux_score" else k: v for k, v in ux.items()})
+    out.update(penalties)
+    out.update({k: v for k, v in weighted.items() if k != "ux_score"})
+    out.update(deltas)
+    return out
+
+
+def row(cols: dict, i: int) -> dict:
+    """Pull one page back out of the columns as plain Python values (plus notes/issues)."""
+    out = {k: v[i].item() if hasattr(v[i], "item") else v[i] for k, v in cols.items()}
+    out["penalty_notes"] = [note for key, note in PENALTY_NOTES if cols[key][i]]
+    out["ux_issues"] = [
+        issue for key, issue in UX_ISSUES if not cols[f"ux_{key}"][i]
+    ]
+    return out
+
+
+def penalty_notes(cols: dict) -> list:
+    """Per-row penalty notes, built column-wise (no per-row dict)."""
+    n = len(cols["total_penalty"])
+    notes = [[] for _ in range(n)]
+    for key, note in PENALTY_NOTES:
+        for i in np.flatnonzero(cols[key]).tolist():
+            notes[i].append(note)
+    return notes
+
+
+# ---------------------------------------------------------
+#  BULK RESCORE JOB
+# ---------------------------------------------------------
+def score_records(records: list) -> dict:
+    """Columns from score_batch() for stored analyses (onpage / performance / llm_raw / industry / location)."""
+    features = extract_features(
+        [r.get("onpage") or {} for r in records],
+        [r.get("performance") or {} for r in records],
+        [r.get("llm_raw") or {} for r in records],
+    )
+    cols = score_batch(
+        features,
+        industry=[r.get("industry") or "" for r in records],
+        location=[r.get("location") or "" for r in records],
+    )
+    return cols
+
+
+def rescore_records(records: list) -> list:
+    """
+    Rescore stored analyses without refetching anything, one dict per record.
+    Each record needs onpage / performance / llm_raw and optionally industry / location.
+    """
+    if not records:
+        return []
+    cols = score_records(records)
+    return [row(cols, i) for i in range(len(records))]
@@ -1,6 +1,6 @@
 # app/services/benchmarks_v2.py
 
-from app.schemas.outputs import BenchmarkInsights
+from app.services.records import BenchmarkRecord
 
 INDUSTRY_AVG = {
     "electronics": {"seo": 65, "technical": 70, "content": 72, "aeo": 68},
@@ -8,13 +8,14 @@ INDUSTRY_AVG = {
     "default": {"seo": 60, "technical": 60, "content": 60, "aeo": 60}
 }
 
-def compute_benchmark_deltas(scores: dict, industry: str):
-    data = INDUSTRY_AVG.get(industry.lower(), INDUSTRY_AVG["default"])
+def compute_benchmark_deltas(scores: dict, industry: str | None):
+    data = INDUSTRY_AVG.get((industry or "").lower(), INDUSTRY_AVG["default"])
 
-    seo_delta = scores["seo_score"] - data["seo"]
-    tech_delta = scores["technical_score"] - data["technical"]
-    content_delta = scores["content_score"] - data["content"]
-    aeo_delta = scores["aeo_score"] - data["aeo"]
+    # Adjusted scores are fractional; the response reports whole points
+    seo_delta = round(scores["seo_score"] - data["seo"])
+    tech_delta = round(scores["technical_score"] - data["technical"])
+    content_delta = round(scores["content_score"] - data["content"])
+    aeo_delta = round(scores["aeo_score"] - data["aeo"])
 
     strengths = []
     gaps = []
@@ -31,7 +32,7 @@ def compute_benchmark_deltas(scores: dict, industry: str):
     if aeo_delta > 0: strengths.append("Overall AEO is strong.")
     else: gaps.append("Overall AEO needs improvement.")
 
-    return BenchmarkInsights(
+    return BenchmarkRecord(
         industry=industry,
         seo_delta=seo_delta,
         technical_delta=tech_delta,
@@ -0,0 +1,305 @@
+# app/services/content_extractor.py
+"""
+Main-content extraction (boilerplate removal).
+
+`soup.get_text()` over a whole page is mostly navigation, mega-menus,
+cookie banners and footers on e-commerce sites, and that is what the
+LLM used to see in its first 5000 characters. This stage finds the main
+content block and emits it in a compact form:
+
+    # H1
+    ## H2
+    paragraph text
+    - list item
+    Q: question
+    A: answer
+
+It works like a simplified Readability:
+  1. drop scripts, <nav>/<header>/<footer>/<aside>, ARIA landmarks and
+     elements whose class/id look like boilerplate (menu, cookie, ...),
+  2. use <main> / <article> / [role=main] when they hold enough text,
+  3. otherwise score block containers by text length, commas and class
+     hints, penalise link-heavy ones, and take the best candidate plus
+     similarly scored siblings.
+
+FAQ blocks (FAQPage JSON-LD, <details>/<summary>, .faq sections) are
+collected separately, since accordions often sit outside the main block.
+
+The LLM, keyword and UX-length checks read page_text(onpage), which is
+the main text when it exists and content_text otherwise (older
+snapshots). CTA and trust-signal detection keep scanning content_text.
+"""
+
+import json
+import re
+
+MAIN_TEXT_MAX_CHARS = 12000
+MIN_MAIN_CHARS = 200
+MAX_FAQS = 20
+
+REMOVE_TAGS = ["script", "style", "noscript", "template", "svg", "iframe", "canvas"]
+BOILERPLATE_TAGS = ["nav", "header", "footer", "aside"]
+BOILERPLATE_ROLES = {"navigation", "banner", "contentinfo", "complementary", "dialog", "alertdialog", "menu", "menubar"}
+
+UNLIKELY = re.compile(
+    r"nav|menu|footer|header|sidebar|cookie|consent|gdpr|banner|breadcrumb|social|share|"
+    r"newsletter|subscribe|popup|modal|promo|advert|sponsor|related|recommend|login|signup|cart|"
+    r"skip-link|masthead|toolbar|widget",
+    re.I,
+)
+MAYBE = re.compile(r"article|body|column|content|main|product|description|faq|post|entry", re.I)
+POSITIVE = re.compile(r"article|content|main|post|entry|product|description|text|body|faq|blog|story", re.I)
+NEGATIVE = re.compile(r"comment|meta|footer|footnote|sidebar|widget|promo|related|share|tag", re.I)
+
+BLOCK_TAGS = {"p", "li", "blockquote", "pre", "td", "dd", "dt", "figcaption"}
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+CONTAINER_TAGS = {"div", "section", "article", "main", "td", "ul", "ol", "form"}
+PROTECTED_TAGS = {"html", "body", "main", "article"}
+
+WS = re.compile(r"\s+")
+
+
+def _clean(text: str) -> str:
+    return WS.sub(" ", text or "").strip()
+
+
+def _attrs(el) -> str:
+    attrs = getattr(el, "attrs", None) or {}
+    cls = attrs.get("class") or []
+    if isinstance(cls, str):
+        cls = [cls]
+    return " ".join(cls) + " " + (attrs.get("id") or "")
+
+
+# ---------------------------------------------------------
+#  FAQ BLOCKS
+# ---------------------------------------------------------
+def _faqs_from_jsonld(soup) -> list:
+    faqs = []
+    for script in soup.find_all("script", attrs={"type": "application/ld+json"}):
+        try:
+            data = json.loads(script.string or "")
+        except (ValueError, TypeError):
+            continue
+        stack = data if isinstance(data, list) else [data]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, list):
+                stack.extend(node)
+                continue
+            if not isinstance(node, dict):
+                continue
+            if node.get("@type") == "Question":
+                answer = node.get("acceptedAnswer") or {}
+                if isinstance(answer, list):
+                    answer = answer[0] if answer else {}
+                q = _clean(node.get("name"))
+                a = _clean(answer.get("text") if isinstance(answer, dict) else "")
+                if q:
+                    faqs.append({"q": q, "a": re.sub(r"<[^>]+>", " ", a).strip()})
+            for key in ("mainEntity", "@graph", "hasPart"):
+                if key in node:
+                    stack.append(node[key])
+    return faqs
+
+
+def _faqs_from_dom(soup) -> list:
+    faqs = []
+    for details in soup.find_all("details"):
+        summary = details.find("summary")
+        if not summary:
+            continue
+        q = _clean(summary.get_text(" "))
+        summary.extract()
+        a = _clean(details.get_text(" "))
+        if q:
+            faqs.append({"q": q, "a": a})
+
+    for block in soup.find_all(attrs={"class": re.compile("faq", re.I)}):
+        for dt in block.find_all("dt"):
+            dd = dt.find_next_sibling("dd")
+            faqs.append({"q": _clean(dt.get_text(" ")), "a": _clean(dd.get_text(" ")) if dd else ""})
+        for heading in block.find_all(list(HEADING_TAGS)):
+            q = _clean(heading.get_text(" "))
+            if not q.endswith("?"):
+                continue
+            answer = heading.find_next_sibling()
+            faqs.append({"q": q, "a": _clean(answer.get_text(" ")) if answer else ""})
+    return faqs
+
+
+def extract_faqs(soup) -> list:
+    seen, faqs = set(), []
+    for faq in _faqs_from_jsonld(soup) + _faqs_from_dom(soup):
+        key = faq["q"].lower()
+        if faq["q"] and key not in seen:
+            seen.add(key)
+            faqs.append(faq)
+    return faqs[:MAX_FAQS]
+
+
+# ---------------------------------------------------------
+#  BOILERPLATE REMOVAL + CANDIDATE SCORING
+# ---------------------------------------------------------
+def _strip_boilerplate(soup):
+    for el in soup.find_all(REMOVE_TAGS):
+        el.decompose()
+    for el in soup.find_all(BOILERPLATE_TAGS):
+        el.decompose()
+    for el in soup.find_all(attrs={"role": True}):
+        if not el.decomposed and str(el.get("role")).lower() in BOILERPLATE_ROLES:
+            el.decompose()
+    for el in soup.find_all(True):
+        if el.decomposed or el.name in PROTECTED_TAGS:
+            continue
+        hints = _attrs(el)
+        if hints.strip() and UNLIKELY.search(hints) and not MAYBE.search(hints):
+            el.decompose()
+
+
+def _link_density(el, text_len: int) -> float:
+    if not text_len:
+        return 1.0
+    link_len = sum(len(_clean(a.get_text(" "))) for a in el.find_all("a"))
+    return min(1.0, link_len / text_len)
+
+
+def _class_weight(el) -> int:
+    hints = _attrs(el)
+    weight = 0
+    if POSITIVE.search(hints):
+        weight += 25
+    if NEGATIVE.search(hints):
+        weight -= 25
+    return weight
+
+
+def _find_main(soup):
+    """Best main-content element (falls back to <body> / the whole soup)."""
+    for candidate in (
+        soup.find("main"),
+        soup.find(attrs={"role": "main"}),
+        soup.find("article"),
+    ):
+        if candidate is not None and len(_clean(candidate.get_text(" "))) >= MIN_MAIN_CHARS:
+            return [candidate]
+
+    scores = {}
+    nodes = {}
+    for block in soup.find_all(["p", "pre", "td", "blockquote", "li"]):
+        text = _clean(block.get_text(" "))
+        if len(text) < 25:
+            continue
+        score = 1 + text.count(",") + min(len(text) // 100, 3)
+        parent = block.parent
+        grandparent = parent.parent if parent is not None else None
+        for node, share in ((parent, 1.0), (grandparent, 0.5)):
+            if node is None or node.name not in CONTAINER_TAGS:
+                continue
+            key = id(node)
+            if key not in scores:
+                nodes[key] = node
+                scores[key] = float(_class_weight(node))
+            scores[key] += score * share
+
+    if not scores:
+        return [soup.body or soup]
+
+    for key, node in nodes.items():
+        text_len = len(_clean(node.get_text(" ")))
+        scores[key] *= 1 - _link_density(node, text_len)
+
+    top_key = max(scores, key=scores.get)
+    top = nodes[top_key]
+    threshold = max(10.0, scores[top_key] * 0.2)
+
+    # Content is often split across sibling containers (e.g. intro + specs)
+    picked = []
+    parent = top.parent
+    siblings = parent.find_all(recursive=False) if parent is not None else [top]
+    for sibling in siblings:
+        if sibling is top or scores.get(id(sibling), 0) >= threshold:
+            picked.append(sibling)
+            continue
+        text_len = len(_clean(sibling.get_text(" ")))
+        if text_len >= 80 and _link_density(sibling, text_len) < 0.25:
+            picked.append(sibling)
+    return picked or [top]
+
+
+# ---------------------------------------------------------
+#  COMPACT RENDERING
+# ---------------------------------------------------------
+def _render(roots: list) -> list:
+    from bs4 import NavigableString
+
+    lines = []
+    for root in roots:
+        for el in root.find_all(True):
+            name = el.name
+            if name in HEADING_TAGS:
+                text = _clean(el.get_text(" "))
+                if text:
+                    lines.append("#" * int(name[1]) + " " + text)
+            elif name in BLOCK_TAGS:
+                # Leaf blocks only — nested blocks are emitted on their own
+                if el.find(list(BLOCK_TAGS | HEADING_TAGS)):
+                    continue
+                text = _clean(el.get_text(" "))
+                if text:
+                    lines.append(("- " if name == "li" else "") + text)
+            elif name in ("div", "section"):
+                # Text placed directly in containers (no <p>)
+                if el.find_parent(list(BLOCK_TAGS)):
+                    continue
+                direct = _clean(" ".join(
+                    str(child) for child in el.children if isinstance(child, NavigableString)
+                ))
+                if len(direct) >= 40:
+                    lines.append(direct)
+    return lines
+
+
+def extract_main_content(soup) -> dict:
+    """
+    Main content of a parsed page. Mutates `soup` (boilerplate is removed),
+    so run it after everything else that needs the full document.
+
+    Returns {"main_text": compact text, "faqs": [{"q", "a"}, ...]}.
+    """
+    faqs = extract_faqs(soup)
+    _strip_boilerplate(soup)
+    lines = _render(_find_main(soup))
+
+    seen, compact = set(), []
+    for line in lines:
+        if line not in seen:
+            seen.add(line)
+            compact.append(line)
+
+    # Unstructured pages (text in bare spans / body) render to almost
+    # nothing; use the de-boilerplated body text instead
+    if sum(len(line) for line in compact) < MIN_MAIN_CHARS:
+        body_text = _clean((soup.body or soup).get_text(" "))
+        if len(body_text) > 2 * sum(len(line) for line in compact):
+            compact = [body_text[:MAIN_TEXT_MAX_CHARS]]
+
+    # FAQs already rendered inside the main block aren't repeated
+    rendered = {line.lstrip("#- ") for line in compact}
+    extra = [faq for faq in faqs if faq["q"] not in rendered]
+    if extra:
+        compact.append("## FAQ")
+        for faq in extra:
+            compact.append(f"Q: {faq['q']}")
+            if faq["a"]:
+                compact.append(f"A: {faq['a']}")
+
+    return {
+        "main_text": "\n".join(compact)[:MAIN_TEXT_MAX_CHARS],
+        "faqs": faqs,
+    }
+
+
+def page_text(onpage: dict) -> str:
+    """Text the content stages (LLM, keywords, UX) should read."""
+    return onpage.get("main_text") or onpage.get("content_text") or ""
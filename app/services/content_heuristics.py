@@ -0,0 +1,242 @@
+# app/services/content_heuristics.py
+"""
+Deterministic, offline content analysis.
+
+Produces the same fields as the LLM content analysis
+(schemas.llm.ContentAnalysis) from parse_onpage() output alone, in a
+few milliseconds:
+
+  readability_grade   CEFR-like grade from Flesch reading ease
+                      (words per sentence, syllables per word)
+  missing_sections    FAQ / Pricing / Process / Comparisons / Contact
+                      not found in headings, FAQ blocks or body copy
+  intent_coverage     brand/product/industry terms in headings and body,
+                      section coverage and heading structure
+  expertise_score     depth, concrete figures, credibility vocabulary,
+                      structured data and FAQs
+
+Used by analyze() for ?tier=fast and as the fallback when the LLM
+times out or fails. Results carry engine="heuristic" so incremental
+runs don't reuse them in place of a real LLM analysis.
+"""
+
+import re
+
+from app.schemas.llm import ContentAnalysis
+from app.services.content_extractor import page_text
+
+ENGINE = "heuristic"
+
+WORD = re.compile(r"[A-Za-z][A-Za-z'-]*")
+SENTENCE_END = re.compile(r"[.!?]+(?:\s|$)")
+VOWEL_GROUPS = re.compile(r"[aeiouy]+")
+NUMBER = re.compile(r"\b\d[\d,.]*%?")
+TERM = re.compile(r"[a-z0-9]{3,}")
+
+STOPWORDS = {
+    "the", "and", "for", "with", "from", "your", "our", "you", "are", "this", "that",
+    "inc", "ltd", "llc", "pvt", "private", "limited", "company", "services", "service",
+}
+
+# Section name → pattern matched against headings (strong) and body (weak)
+SECTION_PATTERNS = {
+    "FAQ": re.compile(r"\bfaqs?\b|frequently asked|common questions", re.I),
+    "Pricing": re.compile(r"\bpric(?:e|es|ing)\b|\bplans?\b|\bcosts?\b|\bsubscription\b|[₹$€£]\s?\d", re.I),
+    "Process": re.compile(r"how it works|\bsteps?\b|\bprocess\b|get started|\bonboarding\b|\bworkflow\b", re.I),
+    "Comparisons": re.compile(r"\bvs\.?\b|\bversus\b|\bcompar(?:e|ed|ison|isons)\b|\balternatives?\b", re.I),
+    "Contact": re.compile(
+        r"\bcontact\b|call us|get in touch|email us|\bphone\b|[\w.+-]+@[\w-]+\.\w+|\+?\d[\d\s-]{8,}\d", re.I
+    ),
+}
+
+CREDIBILITY = re.compile(
+    r"\b(certified|certification|accredited|licensed|award\w*|expert\w*|years? of|since \d{4}|"
+    r"tested|research|study|studies|clinical|guarantee\w*|warranty|reviews?|rated|trusted|"
+    r"case stud\w+|customers|patients|clients)\b",
+    re.I,
+)
+
+# Flesch reading ease → CEFR-like grade (easiest first)
+CEFR_BANDS = [(90, "A1"), (80, "A2"), (70, "B1"), (60, "B2"), (50, "C1")]
+READABILITY_POINTS = {"A1": 70, "A2": 85, "B1": 100, "B2": 90, "C1": 70, "C2": 50}
+MIN_WORDS_FOR_GRADE = 30
+
+
+# ---------------------------------------------------------
+#  READABILITY
+# ---------------------------------------------------------
+def count_syllables(word: str) -> int:
+    word = word.lower().strip("'-")
+    if len(word) <= 3:
+        return 1
+    if word.endswith("e") and not word.endswith(("le", "ee")):
+        word = word[:-1]
+    return max(1, len(VOWEL_GROUPS.findall(word)))
+
+
+def _prose(text: str) -> list:
+    """Body lines without the compact-form markers; headings are left out."""
+    lines = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        for marker in ("- ", "Q: ", "A: "):
+            if line.startswith(marker):
+                line = line[len(marker):]
+                break
+        lines.append(line)
+    return lines
+
+
+def readability(text: str) -> dict:
+    """{"grade", "reading_ease", "words", "sentences"} for a block of text."""
+    words = sentences = syllables = 0
+    for line in _prose(text):
+        tokens = WORD.findall(line)
+        if not tokens:
+            continue
+        words += len(tokens)
+        syllables += sum(count_syllables(t) for t in tokens)
+        # A line (list item, cell, paragraph) ends a sentence even without a period
+        sentences += max(1, len(SENTENCE_END.findall(line)))
+
+    if words < MIN_WORDS_FOR_GRADE:
+        return {"grade": "B1", "reading_ease": None, "words": words, "sentences": sentences}
+
+    ease = 206.835 - 1.015 * (words / sentences) - 84.6 * (syllables / words)
+    grade = next((g for bound, g in CEFR_BANDS if ease >= bound), "C2")
+    return {"grade": grade, "reading_ease": round(ease, 1), "words": words, "sentences": sentences}
+
+
+# ---------------------------------------------------------
+#  SECTIONS + INTENT
+# ---------------------------------------------------------
+def detect_sections(headings: list, text: str, faqs: list | None = None) -> dict:
+    """{section: True/False} from headings, FAQ blocks and body copy."""
+    heading_text = "\n".join(h for h in headings if h)
+    found = {}
+    for name, pattern in SECTION_PATTERNS.items():
+        found[name] = bool(pattern.search(heading_text) or pattern.search(text))
+    if faqs:
+        found["FAQ"] = True
+    return found
+
+
+def intent_terms(*fields) -> list:
+    seen, terms = set(), []
+    for field in fields:
+        for term in TERM.findall((field or "").lower()):
+            if term not in STOPWORDS and term not in seen:
+                seen.add(term)
+                terms.append(term)
+    return terms
+
+
+def term_coverage(terms: list, headings: list, text: str) -> tuple:
+    """(0–1 coverage, terms missing from headings). Heading hits count fully, body hits 0.6."""
+    if not terms:
+        return 0.0, []
+    heading_text = " ".join(headings).lower()
+    body = text.lower()
+    total, missing = 0.0, []
+    for term in terms:
+        # "shoes" should match "Running Shoe"
+        stem = term[:-1] if term.endswith("s") and len(term) > 4 else term
+        if stem in heading_text:
+            total += 1.0
+            continue
+        missing.append(term)
+        if stem in body:
+            total += 0.6
+    return total / len(terms), missing
+
+
+def heading_structure(onpage: dict) -> tuple:
+    """(0–1 structure score, question-style headings present)."""
+    headings = onpage.get("headings") or []
+    questions = any(h.strip().endswith("?") for h in headings if h)
+    score = (
+        0.3 * bool(onpage.get("h1"))
+        + 0.3 * (len(headings) >= 3)
+        + 0.2 * questions
+        + 0.2 * bool(onpage.get("title"))
+    )
+    return score, questions
+
+
+# ---------------------------------------------------------
+#  ANALYSIS
+# ---------------------------------------------------------
+def _clamp(value: float) -> int:
+    return max(0, min(100, int(round(value))))
+
+
+def analyze_content_local(onpage: dict, company: str = "", product: str = "", industry: str = "", location: str = "") -> dict:
+    """ContentAnalysis-shaped dict (plus engine="heuristic") for a parse_onpage() result."""
+    text = page_text(onpage)
+    headings = [h for h in (onpage.get("headings") or []) if isinstance(h, str)]
+    faqs = onpage.get("faqs") or []
+
+    read = readability(text)
+    sections = detect_sections(headings, text, faqs)
+    section_share = sum(sections.values()) / len(sections)
+
+    terms = intent_terms(product, industry, company, location) or intent_terms(
+        onpage.get("h1"), onpage.get("title")
+    )
+    coverage, missing_terms = term_coverage(terms, headings, text)
+    structure, question_headings = heading_structure(onpage)
+
+    intent = 100 * (0.5 * coverage + 0.3 * section_share + 0.2 * structure)
+
+    words = read["words"]
+    figures = len(NUMBER.findall(text))
+    credibility = {m.lower() for m in CREDIBILITY.findall(text)}
+    expertise = (
+        35 * min(words / 800, 1.0)
+        + 20 * min(figures / max(words / 100, 1) / 2, 1.0)
+        + 25 * min(len(credibility) / 4, 1.0)
+        + 10 * bool(onpage.get("schema_present"))
+        + 10 * bool(faqs)
+    )
+
+    intent_coverage = _clamp(intent)
+    expertise_score = _clamp(expertise)
+    content_score = _clamp(
+        0.45 * intent_coverage + 0.35 * expertise_score + 0.2 * READABILITY_POINTS[read["grade"]]
+    )
+    aeo_score = _clamp(
+        0.5 * content_score
+        + 20 * sections["FAQ"]
+        + 10 * question_headings
+        + 10 * bool(onpage.get("schema_present"))
+        + 10 * section_share
+    )
+
+    missing_sections = [name for name, present in sections.items() if not present]
+    recommendations = [f"Add a {name.lower()} section." for name in missing_sections]
+    if read["grade"] in ("C1", "C2"):
+        recommendations.append("Shorten sentences and prefer simpler words to improve readability.")
+    if missing_terms:
+        recommendations.append(
+            "Mention " + ", ".join(f"'{t}'" for t in missing_terms[:5]) + " in headings."
+        )
+    if not question_headings:
+        recommendations.append("Phrase some headings as the questions customers ask.")
+
+    analysis = ContentAnalysis(
+        intent_coverage=intent_coverage,
+        readability_grade=read["grade"],
+        expertise_score=expertise_score,
+        missing_sections=missing_sections,
+        recommendations=recommendations,
+        content_score=content_score,
+        aeo_score=aeo_score,
+    ).model_dump()
+    analysis["engine"] = ENGINE
+    return analysis
+
+
+def is_heuristic(llm_raw: dict | None) -> bool:
+    return bool(llm_raw) and llm_raw.get("engine") == ENGINE
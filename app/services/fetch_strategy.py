@@ -0,0 +1,189 @@
+# app/services/fetch_strategy.py
+"""
+Per-host fetch strategy memory for the crawler.
+
+Remembers, per host, which fetch strategy last worked plus a decaying
+success rate and typical latency for every strategy tried. fetch_html()
+asks for an order before each crawl, so hosts that always block plain
+httpx (Ajio, Amazon, ...) go straight to Playwright / proxies instead of
+burning three timeouts first.
+
+Evidence fades with age (half-life FETCH_STRATEGY_HALF_LIFE_SECS): an
+old failure is slowly forgiven and the default order comes back.
+
+The table is written to FETCH_STRATEGY_PATH at most every save_interval
+seconds, on a background thread: record() runs inside async fetches and
+never touches the disk itself. Call save(force=True) at shutdown.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from app.core.config import settings
+
+EWMA_ALPHA = 0.3
+PRIOR_SUCCESS = 0.5
+MIN_ATTEMPTS_TO_SKIP = 3
+SKIP_BELOW = 0.15
+
+
+class FetchNotAttempted(Exception):
+    """
+    A fetch strategy never really ran: the Playwright circuit / bulkhead
+    rejected it, or the request budget was spent. Says nothing about
+    whether the strategy (or a proxy) works on the host, so neither the
+    strategy table nor the proxy pool records it.
+    """
+
+
+class StrategyTable:
+    def __init__(self, path: str, half_life: float, save_interval: float = 5.0):
+        self.path = Path(path)
+        self.half_life = half_life
+        self.save_interval = save_interval
+        self._hosts: dict = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # one writer at a time, newest data last
+        self._dirty = False
+        self._last_save = 0.0
+        self._save_pending = False
+        self._load()
+
+    # ---------------- persistence ----------------
+    def _load(self):
+        try:
+            if self.path.exists():
+                self._hosts = json.loads(self.path.read_text())
+        except Exception as e:
+            print(f"Fetch strategy table unreadable, starting fresh: {e}")
+            self._hosts = {}
+
+    def save(self, force: bool = False):
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                if not force and time.time() - self._last_save < self.save_interval:
+                    return
+                data = json.dumps(self._hosts)
+                self._dirty = False
+                self._last_save = time.time()
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.path.with_name(f".{self.path.name}.{uuid.uuid4().hex}.tmp")
+                tmp.write_text(data)
+                os.replace(tmp, self.path)
+            except Exception as e:
+                print(f"Fetch strategy table save failed: {e}")
+
+    def _background_save(self):
+        try:
+            self.save()
+        finally:
+            self._save_pending = False
+
+    # ---------------- decay ----------------
+    def _decay(self, updated: float, now: float) -> float:
+        """Weight of evidence recorded at `updated` (1.0 = fresh, → 0 with age)."""
+        if self.half_life <= 0:
+            return 1.0
+        return 0.5 ** (max(0.0, now - updated) / self.half_life)
+
+    def _success(self, stats: dict, now: float) -> float:
+        weight = self._decay(stats["updated"], now)
+        return PRIOR_SUCCESS + (stats["success"] - PRIOR_SUCCESS) * weight
+
+    # ---------------- API ----------------
+    def record(self, host: str, strategy: str, ok: bool, latency: float):
+        if not host:
+            return
+        now = time.time()
+        with self._lock:
+            entry = self._hosts.setdefault(host, {"strategies": {}, "last_success": None})
+            stats = entry["strategies"].get(strategy)
+            if stats is None:
+                stats = {"success": 1.0 if ok else 0.0, "latency": latency, "attempts": 0}
+            else:
+                # Decay old evidence toward the prior before folding in the new sample
+                current = self._success(stats, now)
+                stats["success"] = (1 - EWMA_ALPHA) * current + EWMA_ALPHA * (1.0 if ok else 0.0)
+                stats["latency"] = (1 - EWMA_ALPHA) * stats["latency"] + EWMA_ALPHA * latency
+            stats["attempts"] += 1
+            stats["updated"] = now
+            entry["strategies"][strategy] = stats
+            if ok:
+                entry["last_success"] = strategy
+                entry["last_success_at"] = now
+            self._dirty = True
+            flush = not self._save_pending and now - self._last_save >= self.save_interval
+            if flush:
+                self._save_pending = True
+        if flush:
+            threading.Thread(target=self._background_save, name="strategy-table-save", daemon=True).start()
+
+    def order(self, host: str, default_order: list) -> list:
+        """
+        Strategies to try for `host`, best first:
+          1. last successful strategy (while still fresh),
+          2. untried / still-plausible strategies in default order,
+        with strategies that keep failing on this host dropped.
+        `default_order` should only hold strategies that can run right now.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._hosts.get(host)
+            if not entry:
+                return list(default_order)
+            strategies = dict(entry["strategies"])
+            last = entry.get("last_success")
+            last_at = entry.get("last_success_at", 0)
+
+        doomed = {
+            name for name, stats in strategies.items()
+            if stats["attempts"] >= MIN_ATTEMPTS_TO_SKIP and self._success(stats, now) < SKIP_BELOW
+        }
+        ordered = [name for name in default_order if name not in doomed]
+
+        if last in ordered and self._decay(last_at, now) > 0.25:
+            ordered.remove(last)
+            ordered.insert(0, last)
+
+        # Everything keeps failing: try the whole default order again rather
+        # than locking the host out until the evidence decays
+        return ordered or list(default_order)
+
+    def stats(self, host: str | None = None) -> dict:
+        now = time.time()
+        with self._lock:
+            hosts = {host: self._hosts.get(host, {})} if host else dict(self._hosts)
+        out = {}
+        for name, entry in hosts.items():
+            out[name] = {
+                "last_success": entry.get("last_success"),
+                "strategies": {
+                    s: {
+                        "success_rate": round(self._success(v, now), 3),
+                        "latency_secs": round(v["latency"], 2),
+                        "attempts": v["attempts"],
+                    }
+                    for s, v in (entry.get("strategies") or {}).items()
+                },
+            }
+        return out
+
+
+_table: StrategyTable | None = None
+
+
+def get_strategy_table() -> StrategyTable:
+    global _table
+    if _table is None:
+        _table = StrategyTable(
+            settings.FETCH_STRATEGY_PATH,
+            half_life=settings.FETCH_STRATEGY_HALF_LIFE_SECS,
+        )
+    return _table
@@ -0,0 +1,122 @@
+# app/services/incremental.py
+"""
+Incremental ("fix and re-grade") analysis support.
+
+Compares a fresh parse_onpage() result with the last stored snapshot for
+the same URL and decides which expensive stages can reuse the previous
+outputs:
+
+    h1 / schema / alt                       → rescoring + penalties only
+    title / meta / headings, main text      → LLM is rerun as well (everything
+    (hash) or brand context                   in its prompt; nav/footer-only
+                                              edits don't count; heuristic
+                                              results are never reused)
+    Lighthouse / PSI                        → reused unless last run fell back
+                                              or is older than
+                                              INCREMENTAL_PERFORMANCE_MAX_AGE_SECS
+    SERP competitors                        → reused if the search query is unchanged
+"""
+
+import hashlib
+import time
+
+from app.core.config import settings
+from app.services.content_heuristics import is_heuristic
+
+ONPAGE_FIELDS = [
+    "title",
+    "meta_description",
+    "h1",
+    "headings",
+    "schema_present",
+    "images_with_alt_ratio",
+]
+
+# Request fields that feed into build_prompt() / the SERP query
+CONTEXT_FIELDS = ["company_name", "product", "industry", "location"]
+
+# On-page fields llm.assemble_prompt() puts in the prompt
+LLM_INPUT_FIELDS = ["title", "meta_description", "headings", "main_text"]
+
+
+def content_hash(text: str | None) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def _flat_headings(headings) -> list:
+    if isinstance(headings, dict):
+        flat = []
+        for items in headings.values():
+            if isinstance(items, list):
+                flat.extend(items)
+        return flat
+    return headings or []
+
+
+def diff_onpage(prev: dict, new: dict) -> list:
+    """Names of on-page fields that changed (content_text / main_text are compared by hash)."""
+    changed = []
+    for field in ONPAGE_FIELDS:
+        a, b = prev.get(field), new.get(field)
+        if field == "headings":
+            a, b = _flat_headings(a), _flat_headings(b)
+        if a != b:
+            changed.append(field)
+    for field in ("content_text", "main_text"):
+        if content_hash(prev.get(field)) != content_hash(new.get(field)):
+            changed.append(field)
+    return changed
+
+
+def context_changes(prev_snapshot: dict, request: dict) -> list:
+    """Request fields (brand context) that differ from the previous run."""
+    prev_request = prev_snapshot.get("request") or {}
+    return [
+        f for f in CONTEXT_FIELDS if (prev_request.get(f) or "") != (request.get(f) or "")
+    ]
+
+
+def performance_measured_at(snapshot: dict) -> float | None:
+    """When the snapshot's performance was measured (older snapshots: when saved)."""
+    return snapshot.get("performance_measured_at") or snapshot.get("created_at")
+
+
+def plan_incremental(prev_snapshot: dict | None, onpage: dict, request: dict) -> dict:
+    """
+    Decide which stages to rerun. Without a previous snapshot everything runs.
+    """
+    if not prev_snapshot:
+        return {
+            "base_analysis_id": None,
+            "changed": [],
+            "reuse_performance": False,
+            "reuse_llm": False,
+            "reuse_competitors": False,
+        }
+
+    changed = diff_onpage(prev_snapshot.get("onpage") or {}, onpage)
+    context_changed = context_changes(prev_snapshot, request)
+
+    prev_perf = prev_snapshot.get("performance") or {}
+    measured_at = performance_measured_at(prev_snapshot)
+    perf_fresh = (
+        measured_at is not None
+        and time.time() - measured_at <= settings.INCREMENTAL_PERFORMANCE_MAX_AGE_SECS
+    )
+    prev_llm = prev_snapshot.get("llm_raw") or {}
+
+    return {
+        "base_analysis_id": prev_snapshot.get("id"),
+        "changed": changed + context_changed,
+        "reuse_performance": bool(prev_perf) and not prev_perf.get("fallback") and perf_fresh,
+        # Reused only if the prompt would be the same: main text, page meta
+        # and headings, brand context. Heuristic results (fast tier / LLM
+        # fallback) are never reused.
+        "reuse_llm": (
+            bool(prev_llm)
+            and not is_heuristic(prev_llm)
+            and not any(field in changed for field in LLM_INPUT_FIELDS)
+            and not context_changed
+        ),
+        "reuse_competitors": "competitors" in prev_snapshot and not context_changed,
+    }
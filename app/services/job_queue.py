@@ -0,0 +1,377 @@
+# app/services/job_queue.py
+"""
+SQLite-backed task broker for queue-backed analyses.
+
+An analysis job is split into stage tasks that separate worker
+processes lease, run and acknowledge:
+
+    crawl ──page──┬─▶ lighthouse ─┐
+      │           └─▶ llm ────────┴─▶ score
+      └─no page─▶ render ──▶ (fans out like crawl)
+
+  lease       a worker claims the highest-priority visible task for the
+              stages it serves. The task stays invisible for the stage's
+              JOB_VISIBILITY_TIMEOUT_SECS; a worker that dies without
+              acking simply lets it become visible again.
+  ack         stores the stage's artifacts and enqueues follow-up
+              stages (a stage with prerequisites, like score, only once
+              all of them are done). Acks from a worker whose lease was
+              lost are rejected.
+  nack        retry later with exponential backoff, or fail the job
+              after JOB_MAX_ATTEMPTS.
+
+Artifacts (HTML, parsed page, stage results) are msgpack+zstd blobs,
+dropped when the job finishes. Finished jobs are purged after
+JOB_RETENTION_SECS. The database runs in WAL mode, so the API and any
+number of workers sharing the file can read while one writes.
+"""
+
+import threading
+import time
+import uuid
+
+from app.core.admission import PRIORITY_CLASSES
+from app.core.cache import decode, encode
+from app.core.config import settings
+from app.core.metrics import counter
+from app.core.sqlite import LocalConnections, transaction
+
+STAGES = ["crawl", "render", "lighthouse", "llm", "score"]
+FIRST_STAGE = "crawl"
+# Fan-in: a stage is only enqueued once all of these are done
+REQUIRES = {"score": ("lighthouse", "llm")}
+DEFAULT_VISIBILITY_SECS = 120.0
+
+TASKS = counter("job_tasks_total", "Stage task outcomes", ["stage", "outcome"])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          TEXT PRIMARY KEY,
+    status      TEXT NOT NULL,              -- queued | running | done | failed
+    priority    INTEGER NOT NULL,
+    tenant      TEXT,
+    payload     BLOB NOT NULL,
+    analysis_id TEXT,
+    error       TEXT,
+    created_at  REAL NOT NULL,
+    updated_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, updated_at);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id      TEXT NOT NULL REFERENCES jobs (id) ON DELETE CASCADE,
+    stage       TEXT NOT NULL,
+    status      TEXT NOT NULL,              -- queued | leased | done | failed | cancelled
+    priority    INTEGER NOT NULL,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    visible_at  REAL NOT NULL,
+    lease_id    TEXT,
+    worker      TEXT,
+    error       TEXT,
+    updated_at  REAL NOT NULL,
+    UNIQUE (job_id, stage)
+);
+CREATE INDEX IF NOT EXISTS tasks_ready ON tasks (stage, priority, id)
+    WHERE status IN ('queued', 'leased');
+
+CREATE TABLE IF NOT EXISTS artifacts (
+    job_id  TEXT NOT NULL REFERENCES jobs (id) ON DELETE CASCADE,
+    name    TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    PRIMARY KEY (job_id, name)
+);
+"""
+
+
+class QueueFull(Exception):
+    def __init__(self, queued: int):
+        super().__init__(f"{queued} jobs already waiting")
+        self.queued = queued
+
+
+class JobQueue:
+    def __init__(
+        self,
+        path: str,
+        max_attempts: int = 3,
+        backoff_secs: float = 5.0,
+        visibility_secs: dict | None = None,
+        max_queued: int | None = None,
+    ):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.backoff_secs = backoff_secs
+        self.visibility_secs = visibility_secs or {}
+        self.max_queued = max_queued
+        self._connections = LocalConnections(path)
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        return self._connections.get()
+
+    def _write(self):
+        """Write transaction, taking the lock up front so lease races can't interleave."""
+        return transaction(self._conn())
+
+    def visibility(self, stage: str) -> float:
+        return float(self.visibility_secs.get(stage, DEFAULT_VISIBILITY_SECS))
+
+    # -----------------------------------------------------
+    #  PRODUCER
+    # -----------------------------------------------------
+    def enqueue(self, payload: dict, priority: str = "bulk", tenant: str | None = None) -> str:
+        """Create a job and its first stage task; raises QueueFull past max_queued."""
+        rank = PRIORITY_CLASSES.index(priority)
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._write() as conn:
+            if self.max_queued:
+                (pending,) = conn.execute(
+                    "SELECT count(*) FROM jobs WHERE status IN ('queued', 'running')"
+                ).fetchone()
+                if pending >= self.max_queued:
+                    raise QueueFull(pending)
+            conn.execute(
+                "INSERT INTO jobs (id, status, priority, tenant, payload, created_at, updated_at) "
+                "VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+                (job_id, rank, tenant, encode(payload), now, now),
+            )
+            self._add_task(conn, job_id, FIRST_STAGE, rank, now)
+        TASKS.inc(stage=FIRST_STAGE, outcome="enqueued")
+        return job_id
+
+    def _add_task(self, conn, job_id: str, stage: str, rank: int, now: float):
+        conn.execute(
+            "INSERT OR IGNORE INTO tasks (job_id, stage, status, priority, visible_at, updated_at) "
+            "VALUES (?, ?, 'queued', ?, ?, ?)",
+            (job_id, stage, rank, now, now),
+        )
+
+    # -----------------------------------------------------
+    #  CONSUMER
+    # -----------------------------------------------------
+    def lease(self, stages: list, worker: str) -> dict | None:
+        """
+        Claim the next visible task for `stages` (highest priority, then
+        oldest). Returns {"id", "job_id", "stage", "attempts", "lease_id",
+        "priority", "payload"} or None when nothing is ready.
+        """
+        marks = ",".join("?" * len(stages))
+        while True:
+            now = time.time()
+            with self._write() as conn:
+                row = conn.execute(
+                    f"SELECT t.id, t.job_id, t.stage, t.status, t.attempts, t.priority, j.payload "
+                    f"FROM tasks t JOIN jobs j ON j.id = t.job_id "
+                    f"WHERE t.stage IN ({marks}) AND t.status IN ('queued', 'leased') "
+                    f"AND t.visible_at <= ? AND j.status IN ('queued', 'running') "
+                    f"ORDER BY t.priority, t.id LIMIT 1",
+                    (*stages, now),
+                ).fetchone()
+                if row is None:
+                    return None
+
+                if row["status"] == "leased":
+                    # The previous holder never acked within the visibility timeout
+                    TASKS.inc(stage=row["stage"], outcome="expired")
+                    if row["attempts"] >= self.max_attempts:
+                        self._fail(conn, row["id"], row["job_id"], f"{row['stage']}: lease expired on the last attempt", now)
+                        TASKS.inc(stage=row["stage"], outcome="failed")
+                        continue
+
+                lease_id = uuid.uuid4().hex
+                conn.execute(
+                    "UPDATE tasks SET status = 'leased', attempts = attempts + 1, lease_id = ?, "
+                    "worker = ?, visible_at = ?, updated_at = ? WHERE id = ?",
+                    (lease_id, worker, now + self.visibility(row["stage"]), now, row["id"]),
+                )
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ? AND status = 'queued'",
+                    (now, row["job_id"]),
+                )
+            return {
+                "id": row["id"],
+                "job_id": row["job_id"],
+                "stage": row["stage"],
+                "attempts": row["attempts"] + 1,
+                "lease_id": lease_id,
+                "priority": PRIORITY_CLASSES[row["priority"]],
+                "payload": decode(row["payload"]),
+            }
+
+    def pending(self) -> int:
+        """Tasks not finished yet (waiting, backing off or leased), any stage."""
+        (count,) = self._conn().execute(
+            "SELECT count(*) FROM tasks WHERE status IN ('queued', 'leased')"
+        ).fetchone()
+        return count
+
+    def ack(self, task: dict, artifacts: dict | None = None, then=(), analysis_id: str | None = None) -> bool:
+        """
+        Complete a leased task: store `artifacts`, enqueue the `then`
+        stages whose prerequisites are all done, and finish the job when
+        `analysis_id` is given. False if the lease was lost (nothing stored).
+        """
+        now = time.time()
+        with self._write() as conn:
+            cur = conn.execute(
+                "UPDATE tasks SET status = 'done', lease_id = NULL, error = NULL, updated_at = ? "
+                "WHERE id = ? AND lease_id = ? AND status = 'leased'",
+                (now, task["id"], task["lease_id"]),
+            )
+            if cur.rowcount != 1:
+                TASKS.inc(stage=task["stage"], outcome="lease_lost")
+                return False
+
+            job_id = task["job_id"]
+            conn.executemany(
+                "INSERT OR REPLACE INTO artifacts (job_id, name, payload) VALUES (?, ?, ?)",
+                [(job_id, name, encode(value)) for name, value in (artifacts or {}).items()],
+            )
+
+            if analysis_id:
+                conn.execute(
+                    "UPDATE jobs SET status = 'done', analysis_id = ?, updated_at = ? WHERE id = ?",
+                    (analysis_id, now, job_id),
+                )
+                conn.execute("DELETE FROM artifacts WHERE job_id = ?", (job_id,))
+            else:
+                rank = PRIORITY_CLASSES.index(task["priority"])
+                for stage in then:
+                    if self._ready(conn, job_id, stage):
+                        self._add_task(conn, job_id, stage, rank, now)
+        TASKS.inc(stage=task["stage"], outcome="acked")
+        return True
+
+    def _ready(self, conn, job_id: str, stage: str) -> bool:
+        required = REQUIRES.get(stage, ())
+        if not required:
+            return True
+        (done,) = conn.execute(
+            f"SELECT count(*) FROM tasks WHERE job_id = ? AND status = 'done' "
+            f"AND stage IN ({','.join('?' * len(required))})",
+            (job_id, *required),
+        ).fetchone()
+        return done == len(required)
+
+    def nack(self, task: dict, error: str, retry: bool = True) -> bool:
+        """
+        Give a leased task back: retried after an exponential backoff, or
+        (no retry / out of attempts) the task and its job fail.
+        """
+        now = time.time()
+        with self._write() as conn:
+            row = conn.execute(
+                "SELECT attempts FROM tasks WHERE id = ? AND lease_id = ? AND status = 'leased'",
+                (task["id"], task["lease_id"]),
+            ).fetchone()
+            if row is None:
+                TASKS.inc(stage=task["stage"], outcome="lease_lost")
+                return False
+            if retry and row["attempts"] < self.max_attempts:
+                delay = self.backoff_secs * 2 ** (row["attempts"] - 1)
+                conn.execute(
+                    "UPDATE tasks SET status = 'queued', lease_id = NULL, visible_at = ?, error = ?, "
+                    "updated_at = ? WHERE id = ?",
+                    (now + delay, error, now, task["id"]),
+                )
+                outcome = "retried"
+            else:
+                self._fail(conn, task["id"], task["job_id"], error, now)
+                outcome = "failed"
+        TASKS.inc(stage=task["stage"], outcome=outcome)
+        return True
+
+    def _fail(self, conn, task_id: int, job_id: str, error: str, now: float):
+        conn.execute(
+            "UPDATE tasks SET status = 'failed', lease_id = NULL, error = ?, updated_at = ? WHERE id = ?",
+            (error, now, task_id),
+        )
+        # Sibling stages still waiting are pointless now
+        conn.execute(
+            "UPDATE tasks SET status = 'cancelled', updated_at = ? WHERE job_id = ? AND status = 'queued'",
+            (now, job_id),
+        )
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+            (error, now, job_id),
+        )
+        conn.execute("DELETE FROM artifacts WHERE job_id = ?", (job_id,))
+
+    def artifacts(self, job_id: str, names=None) -> dict:
+        rows = self._conn().execute(
+            "SELECT name, payload FROM artifacts WHERE job_id = ?", (job_id,)
+        ).fetchall()
+        return {
+            row["name"]: decode(row["payload"])
+            for row in rows
+            if names is None or row["name"] in names
+        }
+
+    # -----------------------------------------------------
+    #  STATUS + MAINTENANCE
+    # -----------------------------------------------------
+    def get_job(self, job_id: str) -> dict | None:
+        conn = self._conn()
+        job = conn.execute(
+            "SELECT id, status, priority, tenant, analysis_id, error, created_at, updated_at "
+            "FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        if job is None:
+            return None
+        tasks = conn.execute(
+            "SELECT stage, status, attempts, error FROM tasks WHERE job_id = ? ORDER BY id", (job_id,)
+        ).fetchall()
+        return {
+            "job_id": job["id"],
+            "status": job["status"],
+            "priority": PRIORITY_CLASSES[job["priority"]],
+            "tenant": job["tenant"],
+            "analysis_id": job["analysis_id"],
+            "error": job["error"],
+            "created_at": job["created_at"],
+            "updated_at": job["updated_at"],
+            "stages": {
+                t["stage"]: {"status": t["status"], "attempts": t["attempts"], "error": t["error"]}
+                for t in tasks
+            },
+        }
+
+    def stats(self) -> dict:
+        conn = self._conn()
+        jobs = dict(conn.execute("SELECT status, count(*) FROM jobs GROUP BY status").fetchall())
+        stages: dict = {}
+        for stage, status, count in conn.execute(
+            "SELECT stage, status, count(*) FROM tasks WHERE status IN ('queued', 'leased') GROUP BY stage, status"
+        ):
+            stages.setdefault(stage, {})[status] = count
+        return {"jobs": jobs, "stages": stages}
+
+    def purge(self, older_than_secs: float) -> int:
+        """Delete finished jobs (with their tasks and artifacts) older than this."""
+        with self._write() as conn:
+            cur = conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?",
+                (time.time() - older_than_secs,),
+            )
+        return cur.rowcount
+
+
+_queue: JobQueue | None = None
+_queue_lock = threading.Lock()
+
+
+def get_queue() -> JobQueue:
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue(
+                settings.JOB_DB_PATH,
+                max_attempts=settings.JOB_MAX_ATTEMPTS,
+                backoff_secs=settings.JOB_RETRY_BACKOFF_SECS,
+                visibility_secs=settings.JOB_VISIBILITY_TIMEOUT_SECS,
+                max_queued=settings.JOB_MAX_QUEUED,
+            )
+    return _queue
@@ -0,0 +1,322 @@
+# app/services/job_worker.py
+"""
+Stage workers for queue-backed analyses (see job_queue).
+
+Each worker process serves a subset of the stages, so browser work can
+run on large machines while the API tier stays thin:
+
+    python -m app.services.job_worker --stages crawl,llm,score
+    python -m app.services.job_worker --stages render,lighthouse --concurrency 2
+
+  crawl       httpx fetch strategies + SERP competitors; a page that
+              needs a browser is handed to render
+  render      Playwright, direct then through the proxy pool
+  lighthouse  rendered metrics, else Lighthouse, else PageSpeed Insights
+  llm         LLM content analysis (the heuristic scorer on ?tier=fast,
+              and on the last attempt if the LLM keeps failing)
+  score       steps 8–20 of analyze(): scores, snapshot, stored result,
+              score history
+
+A stage runs under a Deadline slightly shorter than its visibility
+timeout, so it gives up before its lease can expire, and in the job's
+priority class, so STAGE_CLASS_LIMITS apply as they do in the API.
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import socket
+
+from app.api.analyze import (
+    build_response,
+    competitor_models,
+    prepare_onpage,
+    save_analysis,
+    search_query,
+)
+from app.core.admission import current_priority, stage_slot
+from app.core.config import settings
+from app.core.deadline import Deadline, current_deadline
+from app.schemas.inputs import AnalyzeRequest
+from app.services.brand import enrich_brand_context
+from app.services.content_extractor import page_text
+from app.services.content_heuristics import analyze_content_local
+from app.services.crawler import BROWSER_STRATEGIES, HTTPX_STRATEGIES, close_shared_client, fetch_page
+from app.services.fetch_strategy import get_strategy_table
+from app.services.job_queue import STAGES, JobQueue, get_queue
+from app.services.keyword_engine_base import extract_keywords
+from app.services.llm import analyze_content_llm
+from app.services.performance import FALLBACK_PERFORMANCE, get_performance
+from app.services.score_history import close_history, record_analysis
+from app.services.search import get_serp_competitors
+
+# Share of the visibility timeout a stage may use (the rest covers the ack)
+STAGE_SHARE = 0.9
+PURGE_INTERVAL_SECS = 3600
+
+
+# ---------------------------------------------------------
+#  STAGES
+#  Each returns the keyword arguments for JobQueue.ack().
+# ---------------------------------------------------------
+async def _artifacts(queue: JobQueue, task: dict, *names) -> dict:
+    return await asyncio.to_thread(queue.artifacts, task["job_id"], names)
+
+
+async def _page_artifacts(page: dict) -> dict:
+    # Parsing + extraction is CPU-bound; keep it off the event loop the
+    # other worker loops share
+    return {
+        "page": {"html": page["html"], "metrics": page["metrics"], "strategy": page["strategy"]},
+        "onpage": await asyncio.to_thread(prepare_onpage, page["html"]),
+    }
+
+
+def _competitors(query: str) -> list:
+    try:
+        return get_serp_competitors(query) or []
+    except Exception:
+        return []
+
+
+async def crawl_stage(queue: JobQueue, task: dict, req: AnalyzeRequest, final: bool) -> dict:
+    fetched, competitors = await asyncio.gather(
+        fetch_page(str(req.url), timeout=settings.TIMEOUT_SECS, strategies=HTTPX_STRATEGIES),
+        asyncio.to_thread(_competitors, search_query(req)),
+        return_exceptions=True,
+    )
+    artifacts = {"competitors": [] if isinstance(competitors, BaseException) else competitors}
+    if isinstance(fetched, BaseException):
+        print(f"Job {task['job_id']}: plain fetch failed ({fetched}); needs a browser")
+        return {"artifacts": artifacts, "then": ["render"]}
+    return {"artifacts": {**artifacts, **await _page_artifacts(fetched)}, "then": ["lighthouse", "llm"]}
+
+
+async def render_stage(queue: JobQueue, task: dict, req: AnalyzeRequest, final: bool) -> dict:
+    # Raises when every browser strategy fails: retried, then the job fails
+    page = await fetch_page(
+        str(req.url),
+        timeout=settings.TIMEOUT_SECS,
+        collect_metrics=settings.RENDERED_METRICS_ENABLED,
+        strategies=BROWSER_STRATEGIES,
+    )
+    return {"artifacts": await _page_artifacts(page), "then": ["lighthouse", "llm"]}
+
+
+async def lighthouse_stage(queue: JobQueue, task: dict, req: AnalyzeRequest, final: bool) -> dict:
+    page = (await _artifacts(queue, task, "page")).get("page") or {}
+    try:
+        performance = await get_performance(str(req.url), rendered_metrics=page.get("metrics"))
+    except Exception as e:
+        if not final:
+            raise
+        print(f"Job {task['job_id']}: performance failed ({e}); using fallback")
+        performance = dict(FALLBACK_PERFORMANCE)
+    return {"artifacts": {"performance": performance}, "then": ["score"]}
+
+
+async def llm_stage(queue: JobQueue, task: dict, req: AnalyzeRequest, final: bool) -> dict:
+    onpage = (await _artifacts(queue, task, "onpage"))["onpage"]
+    llm_raw, error = None, None
+    if task["payload"].get("tier", "full") == "full":
+        brand_ctx = enrich_brand_context(req.company_name, req.location, req.product, req.industry)
+        try:
+            async with stage_slot("llm"):
+                llm_raw = await asyncio.wait_for(
+                    asyncio.to_thread(
+                        analyze_content_llm,
+                        content_text=page_text(onpage),
+                        company=brand_ctx.get("company_name"),
+                        product=brand_ctx.get("product"),
+                        industry=brand_ctx.get("industry"),
+                        location=brand_ctx.get("location"),
+                        title=onpage.get("title"),
+                        meta_description=onpage.get("meta_description"),
+                        headings=onpage.get("headings"),
+                    ),
+                    timeout=settings.LLM_TIMEOUT_SECS,
+                )
+        except Exception as e:
+            if not final:
+                raise
+            error = f"LLM failed on the last attempt: {type(e).__name__}: {e}"
+            print(f"Job {task['job_id']}: {error}")
+
+    engine = "llm"
+    if not llm_raw:
+        engine = "heuristic"
+        llm_raw = analyze_content_local(
+            onpage,
+            company=req.company_name,
+            product=req.product,
+            industry=req.industry,
+            location=req.location,
+        )
+    return {"artifacts": {"llm": {"raw": llm_raw, "engine": engine, "error": error}}, "then": ["score"]}
+
+
+async def score_stage(queue: JobQueue, task: dict, req: AnalyzeRequest, final: bool) -> dict:
+    arts = await _artifacts(queue, task, "page", "onpage", "competitors", "performance", "llm")
+    request_fields = task["payload"]["request"]
+    onpage, llm = arts["onpage"], arts["llm"]
+    main_text = page_text(onpage)
+    try:
+        extracted_keywords = extract_keywords(main_text)
+    except Exception:
+        extracted_keywords = []
+    competitors = competitor_models(arts.get("competitors"))
+
+    debug = {"content_engine": llm["engine"], "priority": task["priority"], "job_id": task["job_id"]}
+    if llm.get("error"):
+        debug["llm_error"] = llm["error"]
+
+    response = build_response(
+        req,
+        request_fields,
+        onpage=onpage,
+        performance=arts["performance"],
+        llm_raw=llm["raw"],
+        competitors=competitors,
+        main_text=main_text,
+        extracted_keywords=extracted_keywords,
+        debug=debug,
+    )
+    # Always stored: GET /api/analyze/{analysis_id} is how queued results are read
+    payload = response.model_dump(mode="json")
+    analysis_id, _, _ = await asyncio.to_thread(
+        save_analysis,
+        request_fields,
+        payload,
+        html=arts["page"]["html"],
+        onpage=onpage,
+        performance=arts["performance"],
+        llm_raw=llm["raw"],
+        competitors=competitors,
+        extracted_keywords=extracted_keywords,
+    )
+    record_analysis(request_fields["url"], payload, source="job")
+    return {"analysis_id": analysis_id}
+
+
+HANDLERS = {
+    "crawl": crawl_stage,
+    "render": render_stage,
+    "lighthouse": lighthouse_stage,
+    "llm": llm_stage,
+    "score": score_stage,
+}
+
+
+# ---------------------------------------------------------
+#  WORKER LOOP
+# ---------------------------------------------------------
+async def process(queue: JobQueue, task: dict) -> bool:
+    """Run one leased task and ack or nack it. True if it was acked."""
+    stage = task["stage"]
+    final = task["attempts"] >= queue.max_attempts
+    deadline = Deadline(int(queue.visibility(stage) * STAGE_SHARE * 1000))
+    deadline_token = current_deadline.set(deadline)
+    priority_token = current_priority.set(task["priority"])
+    try:
+        req = AnalyzeRequest(**task["payload"]["request"])
+        outcome = await asyncio.wait_for(
+            HANDLERS[stage](queue, task, req, final), deadline.remaining()
+        )
+    except Exception as e:
+        error = f"{stage}: {type(e).__name__}: {e}" if str(e) else f"{stage}: {type(e).__name__}"
+        print(f"Job {task['job_id']} {error} (attempt {task['attempts']}/{queue.max_attempts})")
+        await asyncio.to_thread(queue.nack, task, error)
+        return False
+    finally:
+        current_priority.reset(priority_token)
+        current_deadline.reset(deadline_token)
+
+    acked = await asyncio.to_thread(queue.ack, task, **outcome)
+    if not acked:
+        print(f"Job {task['job_id']}: lease on {stage} expired before the ack; result dropped")
+    return acked
+
+
+async def _worker_loop(queue: JobQueue, stages: list, name: str, stop: asyncio.Event, drain: bool):
+    while not stop.is_set():
+        task = await asyncio.to_thread(queue.lease, stages, name)
+        if task is not None:
+            await process(queue, task)
+            continue
+        if drain and not await asyncio.to_thread(queue.pending):
+            return
+        try:
+            await asyncio.wait_for(stop.wait(), settings.JOB_POLL_INTERVAL_SECS)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _purge_loop(queue: JobQueue, stop: asyncio.Event):
+    while not stop.is_set():
+        removed = await asyncio.to_thread(queue.purge, settings.JOB_RETENTION_SECS)
+        if removed:
+            print(f"Purged {removed} finished jobs")
+        try:
+            await asyncio.wait_for(stop.wait(), PURGE_INTERVAL_SECS)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_worker(
+    stages: list | None = None,
+    concurrency: int | None = None,
+    queue: JobQueue | None = None,
+    stop: asyncio.Event | None = None,
+    drain: bool = False,
+):
+    """
+    Lease and run tasks for `stages` with `concurrency` loops until `stop`
+    is set (or, with drain=True, until the queue has no unfinished tasks —
+    other workers may still enqueue follow-ups for these stages).
+    """
+    stages = stages or list(STAGES)
+    queue = queue or get_queue()
+    stop = stop or asyncio.Event()
+    name = f"{socket.gethostname()}:{os.getpid()}"
+    concurrency = concurrency or settings.JOB_WORKER_CONCURRENCY
+    print(f"Worker {name}: stages={','.join(stages)} concurrency={concurrency}")
+
+    purger = asyncio.create_task(_purge_loop(queue, stop))
+    try:
+        await asyncio.gather(
+            *(_worker_loop(queue, stages, f"{name}/{i}", stop, drain) for i in range(concurrency))
+        )
+    finally:
+        stop.set()
+        await purger
+        await close_shared_client()
+        get_strategy_table().save(force=True)
+        close_history()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run queued AEO analysis stages.")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"Comma separated subset of {','.join(STAGES)}")
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--drain", action="store_true", help="Exit once the queue has no unfinished tasks")
+    args = parser.parse_args(argv)
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+
+    async def run():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        # Finish the tasks in hand, then exit (their leases would expire anyway)
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        await run_worker(stages, args.concurrency, stop=stop, drain=args.drain)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@
 
 import re
 from urllib.parse import urlparse
-from app.schemas.outputs import KeywordInsights
+from app.services.records import KeywordRecord
 
 
 # -------------------------------------------------------------
@@ -117,7 +117,7 @@ def keyword_contextual_score(content_text: str, industry: str, product: str, com
     if len(suggested) > 0:
         coverage = int((len(used) / len(suggested)) * 100)
 
-    return KeywordInsights(
+    return KeywordRecord(
         keywords_used=len(used),
         total_suggested=len(suggested),
         missing_keywords=missing,
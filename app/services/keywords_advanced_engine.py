@@ -1,5 +1,5 @@
 # app/services/keywords_advanced.py
-from app.schemas.outputs import KeywordInsights
+from app.services.records import KeywordRecord
 
 SUGGESTED_KEYWORDS = {
     "healthcare": ["clinic", "doctor", "treatment", "appointment", "medical"],
@@ -7,15 +7,16 @@ SUGGESTED_KEYWORDS = {
     "default": ["services", "solutions", "company", "best", "top"]
 }
 
-def keyword_contextual_score(content_text: str, industry: str) -> KeywordInsights:
+def keyword_contextual_score(content_text: str, industry: str) -> KeywordRecord:
     text = (content_text or "").lower()
     kw_list = SUGGESTED_KEYWORDS.get(industry.lower(), SUGGESTED_KEYWORDS["default"])
 
     used = [kw for kw in kw_list if kw in text]
     missing = [kw for kw in kw_list if kw not in used]
 
-    return KeywordInsights(
+    return KeywordRecord(
         keywords_used=len(used),
         total_suggested=len(kw_list),
-        missing_keywords=missing
+        missing_keywords=missing,
+        coverage=int(len(used) / len(kw_list) * 100) if kw_list else 0,
     )
@@ -1,26 +1,55 @@
-import json
-from openai import OpenAI
+from pydantic import ValidationError
+
+from app.core.cache import cache, make_key
 from app.core.config import settings
+from app.core.deadline import Deadline, timeout_for
+from app.core.metrics import counter
+from app.core.resilience import dependency
+from app.schemas.llm import CONTENT_ANALYSIS_SCHEMA, ContentAnalysis
+from app.services.prompt_builder import build_sections, record_completion, record_prompt
+
+_client = None
+
+OPENAI = dependency("openai")
+LLM_CACHE = cache("llm", ttl=settings.CACHE_TTL_LLM_SECS)
 
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+
+def get_client():
+    """OpenAI client, created on first use (keeps `import openai` off the startup path)."""
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL,
+            timeout=settings.LLM_TIMEOUT_SECS,
+            # Callers give up after LLM_TIMEOUT_SECS; SDK retries with backoff
+            # would keep the worker thread busy long after that
+            max_retries=0,
+        )
+    return _client
 
 
-def build_prompt(content_text, company, product, industry, location):
-    return f"""
+PROMPT_TEMPLATE = """
 You are an expert SEO and AEO (Answer Engine Optimization) evaluator.
 
 Analyze the webpage content based on the following:
 
 ---
 COMPANY CONTEXT
-Company: {company}
-Product/Service: {product}
-Industry: {industry}
-Location: {location}
+{brand}
 ---
 
-WEBPAGE CONTENT (TRUNCATED)
-{content_text[:5000]}
+PAGE META
+{meta}
+---
+
+PAGE HEADINGS
+{headings}
+---
+
+WEBPAGE MAIN CONTENT (TRUNCATED; navigation/footer removed, "#" lines are headings, Q:/A: are FAQs)
+{body}
 ---
 
 RETURN VALID JSON ONLY WITH THE FOLLOWING FIELDS:
@@ -47,29 +76,163 @@ Return ONLY JSON. No explanations.
 """
 
 
+def assemble_prompt(
+    content_text,
+    company,
+    product,
+    industry,
+    location,
+    title=None,
+    meta_description=None,
+    headings=None,
+):
+    """Prompt fitted to LLM_PROMPT_TOKEN_BUDGET. Returns (prompt, usage)."""
+    body_lines = (content_text or "").splitlines()
+    in_body = {line.lstrip("# ").strip().lower() for line in body_lines if line.startswith("#")}
 
-def analyze_content_llm(content_text, company, product, industry, location):
-    prompt = build_prompt(content_text, company, product, industry, location)
-
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        temperature=0.3,
-        messages=[
-            {"role": "system", "content": "You are an SEO content analysis engine."},
-            {"role": "user", "content": prompt}
-        ]
+    sections, usage = build_sections(
+        {
+            "brand": [
+                f"Company: {company}",
+                f"Product/Service: {product}",
+                f"Industry: {industry}",
+                f"Location: {location}",
+            ],
+            "meta": [
+                f"Title: {title or ''}",
+                f"Meta description: {meta_description or ''}",
+            ],
+            # Headings outside the main content (the body already shows its own)
+            "headings": [h for h in (headings or []) if h and h.strip().lower() not in in_body],
+            "body": body_lines,
+        },
+        settings.LLM_PROMPT_TOKEN_BUDGET,
+        call="analyze",
+    )
+    prompt = PROMPT_TEMPLATE.format(
+        brand=sections["brand"],
+        meta=sections["meta"],
+        headings=sections["headings"] or "(none)",
+        body=sections["body"],
     )
+    return prompt, usage
+
+
+def build_prompt(content_text, company, product, industry, location, **page):
+    return assemble_prompt(content_text, company, product, industry, location, **page)[0]
+
 
-    output = response.choices[0].message.content
+class LLMOutputError(ValueError):
+    """The model's reply didn't match ContentAnalysis, even after one retry."""
 
-    # Try to parse clean JSON
+
+LLM_PARSE_FAILURES = counter(
+    "llm_parse_failures_total",
+    "LLM replies that failed schema validation (outcome: repaired | retried | failed)",
+    ["call", "outcome"],
+)
+
+RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "content_analysis",
+        "strict": True,
+        "schema": CONTENT_ANALYSIS_SCHEMA,
+    },
+}
+
+
+def _repair(output: str) -> ContentAnalysis | None:
+    """Cheap local repair: the JSON object inside surrounding prose / code fences."""
+    start, end = output.find("{"), output.rfind("}") + 1
+    if start < 0 or end <= start:
+        return None
     try:
-        return json.loads(output)
-    except:
-        # Try to extract JSON if the LLM added text around it
-        start = output.find("{")
-        end = output.rfind("}") + 1
-        return json.loads(output[start:end])
+        return ContentAnalysis.model_validate_json(output[start:end])
+    except ValidationError:
+        return None
+
+
+def parse_content_analysis(output: str | None) -> ContentAnalysis:
+    return ContentAnalysis.model_validate_json(output or "")
+
+
+def analyze_content_llm(content_text, company, product, industry, location, **page):
+    """
+    page: optional title / meta_description / headings from parse_onpage().
+
+    Returns a ContentAnalysis dict. With LLM_STRUCTURED_OUTPUT the reply is
+    constrained by CONTENT_ANALYSIS_SCHEMA; a reply that still fails
+    validation is repaired locally if possible, otherwise retried once with
+    the validation errors — if LLM_TIMEOUT_SECS leaves time for it. Raises
+    LLMOutputError after that.
+    """
+    prompt, usage = assemble_prompt(content_text, company, product, industry, location, **page)
+
+    # Same prompt (page content + brand context) → same analysis, on any worker
+    cache_key = make_key("gpt-4o-mini", settings.LLM_STRUCTURED_OUTPUT, prompt)
+    cached = LLM_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    record_prompt("analyze", prompt, usage)
+
+    messages = [
+        {"role": "system", "content": "You are an SEO content analysis engine."},
+        {"role": "user", "content": prompt},
+    ]
+    extra = {"response_format": RESPONSE_FORMAT} if settings.LLM_STRUCTURED_OUTPUT else {}
+
+    # Callers wait_for() this thread for LLM_TIMEOUT_SECS; both attempts
+    # share that window so the thread ends about when the caller gives up
+    budget = Deadline(int(settings.LLM_TIMEOUT_SECS * 1000))
+
+    for attempt in range(2):
+        response = OPENAI.call(
+            get_client().chat.completions.create,
+            model="gpt-4o-mini",
+            temperature=0.3,
+            messages=messages,
+            timeout=timeout_for(budget.remaining()),
+            **extra,
+        )
+        record_completion("analyze", response)
+        message = response.choices[0].message
+        output = message.content or ""
+
+        try:
+            analysis = parse_content_analysis(output).model_dump()
+            LLM_CACHE.set(cache_key, analysis)
+            return analysis
+        except ValidationError as e:
+            error = e
+
+        repaired = _repair(output)
+        if repaired is not None:
+            LLM_PARSE_FAILURES.inc(call="analyze", outcome="repaired")
+            analysis = repaired.model_dump()
+            LLM_CACHE.set(cache_key, analysis)
+            return analysis
+
+        if attempt == 1 or budget.expired():
+            break  # no time left for a retry the caller would wait for
+        LLM_PARSE_FAILURES.inc(call="analyze", outcome="retried")
+        problem = getattr(message, "refusal", None) or "; ".join(
+            f"{'.'.join(str(p) for p in err['loc']) or 'reply'}: {err['msg']}"
+            for err in error.errors()[:5]
+        )
+        messages += [
+            {"role": "assistant", "content": output},
+            {
+                "role": "user",
+                "content": f"That reply did not match the required JSON schema ({problem}). "
+                           "Return only the corrected JSON object.",
+            },
+        ]
+
+    LLM_PARSE_FAILURES.inc(call="analyze", outcome="failed")
+    raise LLMOutputError(str(error))
+
 
 # --------------------------------------------------------
 # New Feature: AI Rewrite Engine
@@ -112,7 +275,7 @@ Content to rewrite:
 """
 
     try:
-        response = client.responses.create(
+        response = get_client().responses.create(
             model="gpt-4o-mini",
             input=prompt,
             temperature=0.4  # keep quality consistent
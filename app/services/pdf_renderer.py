@@ -0,0 +1,315 @@
+# app/services/pdf_renderer.py
+"""
+PDF rendering for AnalyzeResponse reports.
+
+ReportLab builds into an in-memory buffer (no temp files) on a worker
+pool so the event loop is never blocked, and finished PDFs are cached
+(app/core/cache.py, namespace "pdf") by a hash of the report.
+"""
+
+import asyncio
+import hashlib
+import inspect
+import io
+import re
+import threading
+import zipfile
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+import orjson
+
+from app.core.cache import MemoryBackend, cache
+from app.core.config import settings
+
+
+# ---------------------------------------------------------
+#  PDF BUILDER — takes AnalyzeResponse model (dict form)
+# ---------------------------------------------------------
+def build_pdf_from_report(report: dict) -> bytes:
+    from reportlab.platypus import (
+        SimpleDocTemplate,
+        Paragraph,
+        Spacer,
+        Table,
+        TableStyle
+    )
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib import colors
+
+    styles = getSampleStyleSheet()
+    title_style = styles["Title"]
+    heading_style = styles["Heading2"]
+    body_style = styles["BodyText"]
+
+    buffer = io.BytesIO()
+    pdf = SimpleDocTemplate(buffer)
+    story = []
+
+        # ------------------------ COVER PAGE ------------------------
+    story.append(Paragraph("AEO Optimization Report", title_style))
+    story.append(Spacer(1, 20))
+
+    # NEW FIX — read from input_echo instead of root
+    echo = report.get("input_echo", {})
+
+    cover_fields = [
+        ("Website", echo.get("url")),
+        ("Company", echo.get("company_name")),
+        ("Industry", echo.get("industry")),
+        ("Location", echo.get("location")),
+        ("Product", echo.get("product")),
+    ]
+
+    for label, value in cover_fields:
+        story.append(Paragraph(f"{label}: {value}", body_style))
+
+    story.append(Spacer(1, 30))
+
+
+    # ------------------------ SCORES ------------------------
+    story.append(Paragraph("Overall Scores", heading_style))
+
+    scores = report["scores"]
+    scores_table = Table([
+        ["SEO Score", scores["seo_score"]],
+        ["Technical Score", scores["technical_score"]],
+        ["Content Score", scores["content_score"]],
+        ["AEO Score", scores["aeo_score"]],
+    ])
+
+    scores_table.setStyle(TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+        ("BOX", (0, 0), (-1, -1), 1, colors.black),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+    ]))
+
+    story.append(scores_table)
+    story.append(Spacer(1, 20))
+
+    # ------------------------ PERFORMANCE ------------------------
+    story.append(Paragraph("Technical Performance", heading_style))
+
+    perf = report["performance"]
+    perf_table = Table([
+        ["Performance Score", perf.get("performance_score")],
+        ["LCP", perf.get("core_web_vitals", {}).get("lcp")],
+        ["CLS", perf.get("core_web_vitals", {}).get("cls")],
+        ["FCP", perf.get("core_web_vitals", {}).get("fcp")],
+        ["Mobile Friendly", perf.get("mobile_friendly")],
+    ])
+
+    perf_table.setStyle(TableStyle([
+        ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.lightgrey),
+    ]))
+
+    story.append(perf_table)
+    story.append(Spacer(1, 20))
+
+    # ------------------------ KEYWORD COVERAGE ------------------------
+    story.append(Paragraph("Keyword Coverage", heading_style))
+
+    kw = report["keyword_score"]
+    story.append(Paragraph(f"Keywords Used: {kw['keywords_used']}", body_style))
+    story.append(Paragraph(f"Total Suggested: {kw['total_suggested']}", body_style))
+    story.append(Paragraph("Missing Keywords:", body_style))
+
+    for kwd in kw.get("missing_keywords", []):
+        story.append(Paragraph(f"- {kwd}", body_style))
+
+    story.append(Spacer(1, 20))
+
+    # ------------------------ RECOMMENDATIONS ------------------------
+    story.append(Paragraph("Recommendations", heading_style))
+    for rec in report.get("recommendations", []):
+        story.append(Paragraph(f"- {rec}", body_style))
+        
+        
+        
+    # ------------------------ SCORE EXPLANATION ------------------------
+    story.append(Paragraph("Score Interpretation Guide", heading_style))
+    story.append(Paragraph("""
+    <b>SEO Score (0–100)</b><br/>
+    Measures metadata, headings, alt text, structured data, and keyword presence.<br/>
+    0–40: Poor<br/>
+    40–70: Average<br/>
+    70–85: Good<br/>
+    85–100: Excellent<br/><br/>
+
+    <b>Technical Score (0–100)</b><br/>
+    Based on performance, Core Web Vitals, mobile-friendliness.<br/>
+    0–40: Poor<br/>
+    40–70: Needs Improvement<br/>
+    70–90: Good<br/>
+    90–100: Excellent<br/><br/>
+
+    <b>Content Score (0–100)</b><br/>
+    Measures E-E-A-T, completeness, readability, and intent coverage.<br/>
+    0–40: Weak content<br/>
+    40–70: Needs expansion<br/>
+    70–90: Strong<br/>
+    90–100: Excellent<br/><br/>
+
+    <b>AEO Score (0–100)</b><br/>
+    Final weighted score combining SEO, technical, content, UX, and brand signals.<br/>
+    0–50: Poor<br/>
+    50–75: Average<br/>
+    75–90: Good<br/>
+    90–100: Excellent<br/><br/>
+    """, body_style))
+    story.append(Spacer(1, 20))
+
+
+    # ------------------------ BUILD PDF ------------------------
+    pdf.build(story)
+
+    return buffer.getvalue()
+
+
+# ---------------------------------------------------------
+#  WORKER POOL
+# ---------------------------------------------------------
+_executor: Executor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> Executor:
+    """Shared render pool (process pool by default, thread pool if configured)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            if settings.PDF_RENDER_MODE == "thread":
+                _executor = ThreadPoolExecutor(max_workers=settings.PDF_RENDER_WORKERS)
+            else:
+                _executor = ProcessPoolExecutor(max_workers=settings.PDF_RENDER_WORKERS)
+        return _executor
+
+
+def shutdown_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+# ---------------------------------------------------------
+#  RENDER CACHE
+# ---------------------------------------------------------
+PDF_CACHE = cache(
+    "pdf",
+    ttl=settings.PDF_CACHE_TTL_SECS,
+    l1=MemoryBackend(settings.PDF_CACHE_SIZE, max_bytes=settings.PDF_CACHE_MAX_BYTES),
+)
+
+
+def report_hash(report: dict) -> str:
+    payload = orjson.dumps(report, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS, default=str)
+    return hashlib.sha256(payload).hexdigest()
+
+
+async def render_pdf(report: dict) -> bytes:
+    """Render (or fetch from cache) the PDF for one report dict."""
+    key = report_hash(report)
+    pdf = await PDF_CACHE.aget(key)
+    if pdf is not None:
+        return pdf
+
+    loop = asyncio.get_running_loop()
+    pdf = await loop.run_in_executor(get_executor(), build_pdf_from_report, report)
+    await PDF_CACHE.aset(key, pdf)
+    return pdf
+
+
+def iter_chunks(data: bytes, chunk_size: int = 64 * 1024):
+    view = memoryview(data)
+    for i in range(0, len(view), chunk_size):
+        yield bytes(view[i:i + chunk_size])
+
+
+# ---------------------------------------------------------
+#  BULK EXPORT — streamed ZIP
+# ---------------------------------------------------------
+class _ZipSink:
+    """Write-only file object for ZipFile; collects bytes until drained."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def report_filename(report: dict, index: int) -> str:
+    url = str((report.get("input_echo") or {}).get("url") or "report")
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", url.split("://", 1)[-1]).strip("_")[:80]
+    return f"{index + 1:04d}_{slug or 'report'}.pdf"
+
+
+async def stream_reports_zip(reports, window: int | None = None):
+    """
+    Render reports in parallel and yield a ZIP archive chunk by chunk.
+
+    `reports` is an iterable of report dicts (or None for a missing one),
+    or of awaitables resolving to one.
+    At most `window` PDFs are in flight / held in memory at any time;
+    each is written to the archive as soon as it finishes.
+    """
+    window = window or settings.PDF_RENDER_WORKERS * 2
+    sink = _ZipSink()
+    zf = zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED)
+
+    async def _render(index, report):
+        if inspect.isawaitable(report):
+            report = await report
+        if report is None:
+            return index, f"{index + 1:04d}_missing.txt", b"Report not found."
+        try:
+            return index, report_filename(report, index), await render_pdf(report)
+        except Exception as e:
+            return index, f"{index + 1:04d}_error.txt", f"Render failed: {e}".encode("utf-8")
+
+    pending = set()
+    source = iter(enumerate(reports))
+    exhausted = False
+
+    try:
+        while pending or not exhausted:
+            while not exhausted and len(pending) < window:
+                try:
+                    index, report = next(source)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.add(asyncio.ensure_future(_render(index, report)))
+
+            if not pending:
+                break
+
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                _, name, data = task.result()
+                zf.writestr(name, data)
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+    finally:
+        # Client went away mid-download: don't keep rendering
+        for task in pending:
+            task.cancel()
+
+    zf.close()
+    tail = sink.drain()
+    if tail:
+        yield tail
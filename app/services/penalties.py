@@ -1,7 +1,7 @@
 # app/services/penalties.py
-from app.schemas.outputs import PenaltyReport
+from app.services.records import PenaltyRecord
 
-def compute_penalties(onpage: dict, performance: dict, llm_raw: dict) -> PenaltyReport:
+def compute_penalties(onpage: dict, performance: dict, llm_raw: dict) -> PenaltyRecord:
     penalties = []
     total_penalty = 0
 
@@ -38,7 +38,7 @@ def compute_penalties(onpage: dict, performance: dict, llm_raw: dict) -> Penalty
 
     total_penalty = meta_penalty + schema_penalty + alt_penalty + cwv_penalty + ux_penalty
 
-    return PenaltyReport(
+    return PenaltyRecord(
         total_penalty=total_penalty,
         meta_description_penalty=meta_penalty,
         schema_penalty=schema_penalty,
@@ -1,9 +1,18 @@
+import asyncio
 import json
+import math
 import subprocess
-import httpx
 import os
+import tempfile
 
 from app.core.config import settings
+from app.core.admission import stage_slot
+from app.core.cache import cache
+from app.core.deadline import timeout_for
+from app.core.resilience import dependency
+
+PAGESPEED = dependency("pagespeed")
+PAGESPEED_CACHE = cache("pagespeed", ttl=settings.CACHE_TTL_PAGESPEED_SECS)
 
 
 # ---------------------------------------
@@ -13,27 +22,31 @@ def run_lighthouse(url: str, timeout: int = 60) -> dict | None:
     """Runs Lighthouse with safer Chrome flags for big websites."""
 
     try:
-        output_path = "lh_report.json"
+        # Per-run report path: runs overlap (stage_slot allows several, job
+        # workers are separate processes), and a run that timed out may
+        # still write its report later — into a directory that's gone
+        with tempfile.TemporaryDirectory(prefix="lighthouse-", ignore_cleanup_errors=True) as workdir:
+            output_path = os.path.join(workdir, "report.json")
 
-        chrome_path = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
+            chrome_path = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
 
-        cmd = [
-        "lighthouse.cmd",   # ← Windows requires .cmd
-        url,
-        "--quiet",
-        f'--chrome-path="{chrome_path}"',
-        "--chrome-flags=--headless",
-        f"--output-path={output_path}",
-        "--output=json",
-        "--only-categories=performance"
-        ]
+            cmd = [
+            "lighthouse.cmd",   # ← Windows requires .cmd
+            url,
+            "--quiet",
+            f'--chrome-path="{chrome_path}"',
+            "--chrome-flags=--headless",
+            f"--output-path={output_path}",
+            "--output=json",
+            "--only-categories=performance"
+            ]
 
 
-        # Use list without shell=True
-        subprocess.run(cmd, check=True, timeout=timeout)
+            # Use list without shell=True
+            subprocess.run(cmd, check=True, timeout=timeout)
 
-        with open(output_path, "r") as f:
-            return json.load(f)
+            with open(output_path, "r") as f:
+                return json.load(f)
 
     except Exception as e:
         print("Lighthouse failed:", e)
@@ -52,7 +65,7 @@ async def run_pagespeed_insights(url: str) -> dict | None:
         print("Missing GOOGLE_API_KEY. PSI disabled.")
         return None
 
-    endpoint = "https://www.googleapis.com/pagespeedonline/v5/runPagespeed"
+    endpoint = f"{settings.PAGESPEED_BASE_URL.rstrip('/')}/runPagespeed"
 
     params = {
         "url": url,
@@ -61,22 +74,125 @@ async def run_pagespeed_insights(url: str) -> dict | None:
     }
 
     try:
-        async with httpx.AsyncClient(timeout=30) as client:
-            resp = await client.get(endpoint, params=params)
-            resp.raise_for_status()
-            return resp.json()
+        return await PAGESPEED.acall(_fetch_pagespeed, endpoint, params)
     except Exception as e:
         print("PageSpeed Insights failed:", e)
         return None
 
 
+async def _fetch_pagespeed(endpoint: str, params: dict) -> dict | None:
+    import httpx
+
+    async with httpx.AsyncClient(timeout=timeout_for(30)) as client:
+        resp = await client.get(endpoint, params=params)
+    # Throttling / server errors count against the breaker; a 4xx for one
+    # page (unreachable URL, bad key) says nothing about PSI's health
+    if resp.status_code == 429 or resp.status_code >= 500:
+        resp.raise_for_status()
+    if resp.is_error:
+        print(f"PageSpeed Insights HTTP {resp.status_code} for {params['url']}")
+        return None
+    return resp.json()
+
+
+
+# Only the extracted summary is cached (the raw PSI response is ~1 MB)
+@PAGESPEED_CACHE.memoize(key=lambda url: url)
+async def pagespeed_performance(url: str) -> dict | None:
+    psi = await run_pagespeed_insights(url)
+    if not psi:
+        return None
+    try:
+        lr = psi["lighthouseResult"]
+        audits = lr["audits"]
+        return {
+            "performance_score": int(lr["categories"]["performance"]["score"] * 100),
+            "core_web_vitals": {
+                "lcp": audits.get("largest-contentful-paint", {}).get("numericValue"),
+                "cls": audits.get("cumulative-layout-shift", {}).get("numericValue"),
+                "fcp": audits.get("first-contentful-paint", {}).get("numericValue"),
+            },
+            "mobile_friendly": True
+        }
+    except Exception:
+        return None
+
+
+
+# ---------------------------------------
+# Rendered-page metrics (from the Playwright fetch)
+# ---------------------------------------
+# Lighthouse desktop scoring curves: (p10, median). The render runs at a
+# 1920x1080 desktop viewport, so desktop curves apply.
+METRIC_CURVES = {
+    "fcp": (934, 1600),
+    "lcp": (1200, 2400),
+    "cls": (0.1, 0.25),
+}
+# Lighthouse weights for the metrics we can observe (TBT / SI are not
+# available from a single page load, so weights are renormalized).
+METRIC_WEIGHTS = {"fcp": 10, "lcp": 25, "cls": 25}
+
+
+def log_normal_score(value: float, p10: float, median: float) -> float:
+    """Lighthouse-style score: 0.9 at p10, 0.5 at the median."""
+    if value <= 0:
+        return 1.0
+    mu = math.log(median)
+    sigma = (mu - math.log(p10)) / 1.2815515655446004
+    return 0.5 * math.erfc((math.log(value) - mu) / (sigma * math.sqrt(2)))
+
+
+def performance_from_rendered(metrics: dict | None) -> dict | None:
+    """Build a performance dict from rendered metrics, or None if too sparse."""
+    if not metrics or metrics.get("lcp") is None or metrics.get("fcp") is None:
+        return None
+
+    total, weights = 0.0, 0
+    for name, weight in METRIC_WEIGHTS.items():
+        value = metrics.get(name)
+        if value is None:
+            continue
+        total += weight * log_normal_score(float(value), *METRIC_CURVES[name])
+        weights += weight
+
+    return {
+        "performance_score": int(round(100 * total / weights)),
+        "core_web_vitals": {
+            "lcp": metrics.get("lcp"),
+            "cls": metrics.get("cls"),
+            "fcp": metrics.get("fcp"),
+        },
+        "mobile_friendly": bool(metrics.get("viewport_meta")),
+        "source": "rendered",
+        "rendered": {
+            k: metrics.get(k)
+            for k in ("ttfb", "dom_content_loaded", "load", "transfer_bytes", "resource_count", "dom_size")
+        },
+    }
+
 
 # ---------------------------------------
 # Hybrid performance engine (recommended)
 # ---------------------------------------
-async def get_performance(url: str) -> dict:
-    # 1) Try lighthouse first
-    lh = run_lighthouse(url)
+# Returned when neither Lighthouse nor PSI produced a result
+FALLBACK_PERFORMANCE = {
+    "performance_score": 50,   # neutral fallback
+    "core_web_vitals": None,
+    "mobile_friendly": None,
+    "fallback": True
+}
+
+
+async def get_performance(url: str, rendered_metrics: dict | None = None) -> dict:
+    # 0) Metrics captured during the Playwright fetch — no second browser run
+    rendered = performance_from_rendered(rendered_metrics)
+    if rendered:
+        return rendered
+
+    # 1) Try lighthouse first (in a thread, so a request deadline can cancel the wait)
+    async with stage_slot("lighthouse"):
+        lh = await asyncio.to_thread(run_lighthouse, url, timeout_for(60))
     if lh:
         try:
             audits = lh.get("audits", {})
@@ -93,28 +209,10 @@ async def get_performance(url: str) -> dict:
             pass
 
     # 2) Try PSI fallback
-    psi = await run_pagespeed_insights(url)
+    psi = await pagespeed_performance(url)
     if psi:
-        try:
-            lr = psi["lighthouseResult"]
-            audits = lr["audits"]
-            return {
-                "performance_score": int(lr["categories"]["performance"]["score"] * 100),
-                "core_web_vitals": {
-                    "lcp": audits.get("largest-contentful-paint", {}).get("numericValue"),
-                    "cls": audits.get("cumulative-layout-shift", {}).get("numericValue"),
-                    "fcp": audits.get("first-contentful-paint", {}).get("numericValue"),
-                },
-                "mobile_friendly": True
-            }
-        except Exception:
-            pass
+        return psi
 
     # 3) Final fallback
-    return {
-        "performance_score": 50,   # neutral fallback
-        "core_web_vitals": None,
-        "mobile_friendly": None,
-        "fallback": True
-    }
+    return dict(FALLBACK_PERFORMANCE)
 
@@ -5,8 +5,186 @@ import asyncio
 from playwright.async_api import async_playwright
 # Make sure to run: pip install playwright-stealth
 from playwright_stealth import stealth_async
+from urllib.parse import urlparse
 
-async def run(url: str, proxy: str | None = None):
+# --- Resource blocking: we only need the DOM/text, not pixels or trackers ---
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+
+ANALYTICS_DOMAINS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "facebook.net",
+    "connect.facebook.net",
+    "hotjar.com",
+    "clarity.ms",
+    "segment.com",
+    "segment.io",
+    "mixpanel.com",
+    "amplitude.com",
+    "newrelic.com",
+    "nr-data.net",
+    "criteo.com",
+    "taboola.com",
+    "outbrain.com",
+    "scorecardresearch.com",
+    "moengage.com",
+    "branch.io",
+)
+
+# --- Readiness: stop as soon as the page looks done, never later than the old fixed 5s ---
+READY_CAP_MS = 5000
+DOM_QUIET_MS = 500
+MAIN_CONTENT_MIN_CHARS = 200
+# A quiet DOM only counts once the body has this much text: right after
+# domcontentloaded an SPA shell (<div id="root"></div>) is quiet too, until
+# hydration starts. Pages with less text than this wait for network idle
+# (or the cap) instead.
+DOM_QUIET_MIN_BODY_CHARS = 200
+
+DOM_QUIET_JS = """
+([quietMs, capMs, minChars]) => new Promise(resolve => {
+  let timer = null;
+  let cap = null;
+  const hasContent = () =>
+    ((document.body && document.body.innerText) || '').trim().length >= minChars;
+  const obs = new MutationObserver(() => {
+    clearTimeout(timer);
+    timer = setTimeout(quiet, quietMs);
+  });
+  // Still empty: keep waiting for the next mutation (or the cap)
+  function quiet() {
+    if (hasContent()) done(true);
+  }
+  function done(ready) {
+    obs.disconnect();
+    clearTimeout(timer);
+    clearTimeout(cap);
+    resolve(ready);
+  }
+  obs.observe(document.documentElement || document, {
+    childList: true, subtree: true, characterData: true
+  });
+  timer = setTimeout(quiet, quietMs);
+  cap = setTimeout(() => done(false), capMs);
+})
+"""
+
+MAIN_CONTENT_JS = """
+(minChars) => {
+  const el = document.querySelector('main, article, [role="main"], #main, #content, .content');
+  return !!el && (el.innerText || '').trim().length >= minChars;
+}
+"""
+
+
+# --- Rendered-page metrics (optional, replaces a separate Lighthouse run) ---
+# Registered before navigation so buffered LCP / CLS / paint entries are captured.
+METRICS_INIT_JS = """
+window.__aeoMetrics = { lcp: null, cls: 0 };
+try {
+  new PerformanceObserver(list => {
+    const entries = list.getEntries();
+    const last = entries[entries.length - 1];
+    if (last) window.__aeoMetrics.lcp = last.renderTime || last.loadTime || last.startTime;
+  }).observe({ type: 'largest-contentful-paint', buffered: true });
+  new PerformanceObserver(list => {
+    for (const e of list.getEntries()) {
+      if (!e.hadRecentInput) window.__aeoMetrics.cls += e.value;
+    }
+  }).observe({ type: 'layout-shift', buffered: true });
+} catch (e) {}
+"""
+
+COLLECT_METRICS_JS = """
+() => {
+  const nav = performance.getEntriesByType('navigation')[0] || {};
+  const fcp = performance.getEntriesByName('first-contentful-paint')[0];
+  const resources = performance.getEntriesByType('resource');
+  const transferred = resources.reduce((sum, r) => sum + (r.transferSize || 0), nav.transferSize || 0);
+  const viewport = document.querySelector('meta[name="viewport"]');
+  return {
+    ttfb: nav.responseStart || null,
+    dom_content_loaded: nav.domContentLoadedEventEnd || null,
+    load: nav.loadEventEnd || null,
+    fcp: fcp ? fcp.startTime : null,
+    lcp: (window.__aeoMetrics || {}).lcp,
+    cls: (window.__aeoMetrics || {}).cls,
+    transfer_bytes: transferred,
+    resource_count: resources.length,
+    dom_size: document.getElementsByTagName('*').length,
+    viewport_meta: !!viewport && /width\s*=\s*device-width/i.test(viewport.content || ''),
+  };
+}
+"""
+
+
+def is_blocked(resource_type: str, url: str, analytics_only: bool = False) -> bool:
+    if not analytics_only and resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
+    host = (urlparse(url).hostname or "").lower()
+    return any(host == d or host.endswith("." + d) for d in ANALYTICS_DOMAINS)
+
+
+def make_route_handler(analytics_only: bool = False):
+    """
+    When collecting metrics, images / fonts must load or LCP and transfer
+    size would be meaningless — only trackers are blocked then.
+    """
+    async def block_heavy_resources(route):
+        request = route.request
+        if is_blocked(request.resource_type, request.url, analytics_only):
+            await route.abort()
+        else:
+            await route.continue_()
+    return block_heavy_resources
+
+
+async def wait_until_ready(page, cap_ms: int = READY_CAP_MS) -> str:
+    """
+    Adaptive replacement for a fixed sleep. Returns whichever signal fired
+    first: "dom_quiet" (with content on the page), "network_idle",
+    "main_content" or "cap".
+    """
+    signals = {
+        asyncio.ensure_future(
+            page.evaluate(DOM_QUIET_JS, [DOM_QUIET_MS, cap_ms, DOM_QUIET_MIN_BODY_CHARS])
+        ): "dom_quiet",
+        asyncio.ensure_future(page.wait_for_load_state("networkidle", timeout=cap_ms)): "network_idle",
+        asyncio.ensure_future(
+            page.wait_for_function(MAIN_CONTENT_JS, arg=MAIN_CONTENT_MIN_CHARS, timeout=cap_ms)
+        ): "main_content",
+    }
+    pending = set(signals)
+    reason = "cap"
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + cap_ms / 1000
+    try:
+        while pending:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(
+                pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                break
+            # dom_quiet resolves false at its cap: not a readiness signal
+            finished = [
+                t for t in done
+                if not t.cancelled() and t.exception() is None and t.result() is not False
+            ]
+            if finished:
+                reason = signals[finished[0]]
+                break
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    return reason
+
+async def run(url: str, proxy: str | None = None, collect_metrics: bool = False):
     async with async_playwright() as pw:
         launch_args = [
             "--disable-blink-features=AutomationControlled",
@@ -38,6 +216,11 @@ async def run(url: str, proxy: str | None = None):
             java_script_enabled=True,
         )
 
+        # Abort images / media / fonts / analytics before they hit the network
+        await context.route("**/*", make_route_handler(analytics_only=collect_metrics))
+        if collect_metrics:
+            await context.add_init_script(METRICS_INIT_JS)
+
         page = await context.new_page()
         
         # Apply advanced stealth
@@ -47,21 +230,27 @@ async def run(url: str, proxy: str | None = None):
             # Ajio can be slow; give it time
             await page.goto(url, wait_until="domcontentloaded", timeout=60000)
             
-            # Wait for a key element that indicates success (e.g., the footer or a product grid)
-            # If this times out, we know we were blocked or the page didn't load.
+            # Wait for dynamic content: DOM quiet / network idle / main content,
+            # whichever comes first (capped at the old fixed 5s).
             try:
-                # Wait a bit for dynamic content
-                await page.wait_for_timeout(5000) 
-            except:
-                pass
+                ready = await wait_until_ready(page)
+            except Exception:
+                ready = "error"
 
             content = await page.content()
+
+            metrics = None
+            if collect_metrics:
+                try:
+                    metrics = await page.evaluate(COLLECT_METRICS_JS)
+                except Exception:
+                    metrics = None
             
             # Check for common "Access Denied" markers
             if "access denied" in content.lower() or "accessdenied" in content.lower():
                  print(json.dumps({"error": "access_denied"}))
             else:
-                print(json.dumps({"html": content}))
+                print(json.dumps({"html": content, "ready": ready, "metrics": metrics}))
 
         except Exception as e:
             print(json.dumps({"error": str(e)}))
@@ -69,6 +258,8 @@ async def run(url: str, proxy: str | None = None):
             await browser.close()
 
 if __name__ == "__main__":
-    url_arg = sys.argv[1] if len(sys.argv) > 1 else ""
-    proxy_arg = sys.argv[2] if len(sys.argv) > 2 else None
-    asyncio.run(run(url_arg, proxy_arg))
\ No newline at end of file
+    # python playwright_worker.py "url" ["proxy"] [--metrics]
+    args = [a for a in sys.argv[1:] if a != "--metrics"]
+    url_arg = args[0] if len(args) > 0 else ""
+    proxy_arg = args[1] if len(args) > 1 else None
+    asyncio.run(run(url_arg, proxy_arg, collect_metrics="--metrics" in sys.argv[1:]))
\ No newline at end of file
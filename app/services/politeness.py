@@ -0,0 +1,117 @@
+# app/services/politeness.py
+"""
+Politeness for bulk crawls (site crawl, sitemap ingestion).
+
+  RobotsCache       robots.txt per origin, fetched once (small LRU)
+  HostRateLimiter   spaces out requests to the same host
+  PoliteFetcher     GET through both: disallowed URLs raise
+                    RobotsDisallowed, each host waits 1 / rate_per_host
+                    (or its Crawl-delay, if longer) between requests, and
+                    bodies are cut off at CRAWL_MAX_BODY_BYTES
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+from app.core.config import settings
+
+
+def url_origin(url: str) -> str:
+    parts = urlparse(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class RobotsDisallowed(Exception):
+    def __init__(self, url: str):
+        super().__init__(f"Disallowed by robots.txt: {url}")
+        self.url = url
+
+
+class RobotsCache:
+    """robots.txt per origin, fetched once and kept in a small LRU."""
+
+    def __init__(self, client, max_hosts: int = 256):
+        self.client = client
+        self.max_hosts = max_hosts
+        self._parsers: "OrderedDict[str, RobotFileParser]" = OrderedDict()
+        self._locks: dict = {}
+
+    async def get(self, origin: str) -> RobotFileParser:
+        if origin in self._parsers:
+            self._parsers.move_to_end(origin)
+            return self._parsers[origin]
+
+        lock = self._locks.setdefault(origin, asyncio.Lock())
+        async with lock:
+            if origin in self._parsers:
+                return self._parsers[origin]
+            parser = RobotFileParser()
+            try:
+                resp = await self.client.get(f"{origin}/robots.txt")
+                lines = resp.text.splitlines() if resp.status_code == 200 else []
+            except Exception:
+                lines = []
+            parser.parse(lines)
+            self._parsers[origin] = parser
+            while len(self._parsers) > self.max_hosts:
+                self._parsers.popitem(last=False)
+            return parser
+
+    async def allowed(self, url: str, user_agent: str = "*") -> bool:
+        parser = await self.get(url_origin(url))
+        return parser.can_fetch(user_agent, url)
+
+    async def crawl_delay(self, origin: str, user_agent: str = "*") -> float | None:
+        parser = await self.get(origin)
+        delay = parser.crawl_delay(user_agent)
+        return float(delay) if delay else None
+
+    async def sitemaps(self, origin: str) -> list:
+        parser = await self.get(origin)
+        return list(parser.site_maps() or [])
+
+
+class HostRateLimiter:
+    """Spaces out requests to the same host (min interval = 1 / rate)."""
+
+    def __init__(self, rate_per_host: float):
+        self.interval = 1.0 / rate_per_host if rate_per_host > 0 else 0.0
+        self._next: dict = {}
+        self._locks: dict = {}
+
+    async def wait(self, host: str, min_interval: float | None = None):
+        interval = max(self.interval, min_interval or 0.0)
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            ready = self._next.get(host, now)
+            if ready > now:
+                await asyncio.sleep(ready - now)
+            self._next[host] = max(ready, now) + interval
+
+
+class PoliteFetcher:
+    def __init__(self, client, rate_per_host: float, max_bytes: int | None = None):
+        self.client = client
+        self.robots = RobotsCache(client)
+        self.limiter = HostRateLimiter(rate_per_host)
+        self.max_bytes = max_bytes or settings.CRAWL_MAX_BODY_BYTES
+
+    async def get(self, url: str) -> tuple:
+        """(response, text) — text truncated at max_bytes. Raises RobotsDisallowed."""
+        if not await self.robots.allowed(url):
+            raise RobotsDisallowed(url)
+        delay = await self.robots.crawl_delay(url_origin(url))
+        await self.limiter.wait((urlparse(url).hostname or "").lower(), delay)
+
+        body = bytearray()
+        async with self.client.stream("GET", url) as resp:
+            async for chunk in resp.aiter_bytes():
+                body += chunk[: self.max_bytes - len(body)]
+                if len(body) >= self.max_bytes:
+                    print(f"Body of {url} cut off at {self.max_bytes} bytes")
+                    break
+        return resp, body.decode(resp.encoding or "utf-8", errors="replace")
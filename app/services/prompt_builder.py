@@ -0,0 +1,225 @@
+# app/services/prompt_builder.py
+"""
+Token-budgeted prompt assembly.
+
+Counts tokens locally (tiktoken when its encoding is available, else a
+regex estimate that runs fully offline) and fits each prompt section
+into its share of LLM_PROMPT_TOKEN_BUDGET:
+
+    brand 5% · meta 10% · headings 20% · body 65%
+
+Sections that need less than their share hand the rest to the others
+(body first). Before fitting, lines are de-duplicated and low-information
+lines (cart / login / cookie chrome, bare prices, one-word fragments)
+are dropped, so the budget is spent on actual copy. Whole lines are kept
+where possible; only the last line of a section is cut mid-way.
+"""
+
+import logging
+import re
+import threading
+
+from app.core.config import settings
+from app.core.metrics import counter, histogram
+
+SECTION_SHARES = {"brand": 0.05, "meta": 0.10, "headings": 0.20, "body": 0.65}
+# Who gets leftover budget first
+REDISTRIBUTE_ORDER = ["body", "headings", "meta", "brand"]
+
+BOILERPLATE_PHRASES = re.compile(
+    r"add to (cart|bag|wishlist)|sign in|log in|my account|cookie|all rights reserved|"
+    r"subscribe|follow us|skip to (main )?content|back to top|privacy policy|terms (of use|& conditions)",
+    re.I,
+)
+WORD = re.compile(r"[^\W\d_]{2,}")
+# Rough BPE-like split used when tiktoken can't be loaded
+ESTIMATE_PIECES = re.compile(r"[^\W\d_]+|\d{1,3}|[^\w\s]|_")
+
+PROMPT_TOKENS = counter("llm_prompt_tokens_total", "Prompt tokens sent to the LLM", ["call", "section"])
+PROMPT_SIZE = histogram(
+    "llm_prompt_tokens", "Prompt size per LLM call (tokens)", ["call"],
+    buckets=(250, 500, 1000, 1500, 2000, 3000, 4000, 6000, 8000, 16000),
+)
+PROMPT_TRIMMED = counter("llm_prompt_trimmed_total", "Prompt sections cut to fit their budget", ["call", "section"])
+COMPLETION_TOKENS = counter("llm_completion_tokens_total", "Completion tokens reported by the LLM", ["call"])
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------
+#  TOKEN COUNTING
+# ---------------------------------------------------------
+_encoding = None
+_encoding_failed = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """
+    tiktoken encoding, or None if tiktoken / its BPE file isn't available.
+
+    On first use tiktoken downloads the BPE file unless it is already in
+    its cache (TIKTOKEN_CACHE_DIR; bake it into offline images). With
+    WARM_START the download happens at startup (app/services/warmup.py)
+    rather than inside the first request.
+    """
+    global _encoding, _encoding_failed
+    if _encoding is not None or _encoding_failed:
+        return _encoding
+    with _encoding_lock:
+        if _encoding is None and not _encoding_failed:
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding(settings.LLM_TOKENIZER_ENCODING)
+            except Exception as e:
+                _encoding_failed = True
+                logger.warning("tiktoken unavailable (%s: %s), estimating token counts", type(e).__name__, e)
+    return _encoding
+
+
+def _estimate_tokens(text: str) -> int:
+    total = 0
+    for piece in ESTIMATE_PIECES.findall(text):
+        # Long words split into several BPE tokens
+        total += 1 + (len(piece) - 1) // 6 if piece[0].isalpha() else 1
+    return total
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    enc = _get_encoding()
+    if enc is not None:
+        return len(enc.encode(text, disallowed_special=()))
+    return _estimate_tokens(text)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    if max_tokens <= 0:
+        return ""
+    enc = _get_encoding()
+    if enc is not None:
+        tokens = enc.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else enc.decode(tokens[:max_tokens])
+    # Estimate: binary search on a character prefix
+    if _estimate_tokens(text) <= max_tokens:
+        return text
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if _estimate_tokens(text[:mid]) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo]
+
+
+# ---------------------------------------------------------
+#  COMPRESSION
+# ---------------------------------------------------------
+def is_low_information(line: str) -> bool:
+    stripped = line.lstrip("#-* ").strip()
+    if line.startswith(("#", "Q:", "A:")):
+        return not WORD.search(stripped)
+    words = WORD.findall(stripped)
+    if len(words) < 2:
+        return True  # prices, SKUs, "Menu", "Share", …
+    if len(words) <= 8 and BOILERPLATE_PHRASES.search(stripped):
+        return True
+    return False
+
+
+def compress_lines(text: str, drop_low_information: bool = True) -> list:
+    """Non-empty lines, de-duplicated (case-insensitive), optionally minus chrome."""
+    seen, lines = set(), []
+    for raw in (text or "").splitlines():
+        line = re.sub(r"\s+", " ", raw).strip()
+        key = line.lower()
+        if not line or key in seen:
+            continue
+        seen.add(key)
+        if drop_low_information and is_low_information(line):
+            continue
+        lines.append(line)
+    return lines
+
+
+def fit_lines(lines: list, budget: int) -> tuple:
+    """Greedy: whole lines in order while they fit, then a cut last line. → (text, tokens, trimmed)"""
+    kept, used = [], 0
+    for line in lines:
+        cost = count_tokens(line) + 1  # newline
+        if used + cost <= budget:
+            kept.append(line)
+            used += cost
+            continue
+        remaining = budget - used - 1
+        if remaining >= 8:
+            kept.append(truncate_to_tokens(line, remaining))
+            used = budget
+        return "\n".join(kept), used, True
+    return "\n".join(kept), used, False
+
+
+# ---------------------------------------------------------
+#  SECTION BUDGETS
+# ---------------------------------------------------------
+def allocate(needs: dict, total: int) -> dict:
+    """Split `total` tokens by SECTION_SHARES, handing unused share to other sections."""
+    budgets = {name: int(total * SECTION_SHARES.get(name, 0)) for name in needs}
+    spare = 0
+    for name, need in needs.items():
+        if need < budgets[name]:
+            spare += budgets[name] - need
+            budgets[name] = need
+    for name in REDISTRIBUTE_ORDER:
+        if name not in needs or spare <= 0:
+            continue
+        extra = min(spare, needs[name] - budgets[name])
+        budgets[name] += extra
+        spare -= extra
+    return budgets
+
+
+def build_sections(sections: dict, total_budget: int, call: str) -> tuple:
+    """
+    Compress and fit each section. `sections` maps name → list of lines.
+    Returns ({name: text}, usage) where usage has per-section token counts.
+    """
+    compressed = {
+        name: compress_lines("\n".join(lines), drop_low_information=(name == "body"))
+        for name, lines in sections.items()
+    }
+    needs = {
+        name: sum(count_tokens(line) + 1 for line in lines)
+        for name, lines in compressed.items()
+    }
+    budgets = allocate(needs, total_budget)
+
+    texts, usage, trimmed = {}, {}, []
+    for name, lines in compressed.items():
+        texts[name], usage[name], cut = fit_lines(lines, budgets[name])
+        if cut:
+            trimmed.append(name)
+            PROMPT_TRIMMED.inc(call=call, section=name)
+    return texts, {"sections": usage, "trimmed": trimmed}
+
+
+def record_prompt(call: str, prompt: str, usage: dict | None = None) -> int:
+    """Report a prompt's token usage (per section + template overhead); returns its size."""
+    prompt_tokens = count_tokens(prompt)
+    sections = (usage or {}).get("sections") or {}
+    for section, tokens in sections.items():
+        PROMPT_TOKENS.inc(tokens, call=call, section=section)
+    PROMPT_TOKENS.inc(max(0, prompt_tokens - sum(sections.values())), call=call, section="template")
+    PROMPT_SIZE.observe(prompt_tokens, call=call)
+    return prompt_tokens
+
+
+def record_completion(call: str, response) -> int:
+    """Completion tokens from an OpenAI response's usage block (0 if absent)."""
+    usage = getattr(response, "usage", None)
+    tokens = getattr(usage, "completion_tokens", None) or getattr(usage, "output_tokens", None) or 0
+    if tokens:
+        COMPLETION_TOKENS.inc(tokens, call=call)
+    return tokens
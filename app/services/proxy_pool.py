@@ -0,0 +1,180 @@
+# app/services/proxy_pool.py
+"""
+Proxy pool for the Playwright proxy fallback.
+
+Proxies come from config (PROXIES, comma separated, and/or PROXIES_FILE,
+one per line). Each proxy tracks success rate and latency (EWMA) and is
+put on an exponential cooldown after consecutive failures. Selection is
+weighted by health, and `race()` can run K proxies at once, keeping the
+first success and cancelling the rest.
+"""
+
+import asyncio
+import random
+import time
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.deadline import current_deadline
+from app.services.fetch_strategy import FetchNotAttempted
+
+EWMA_ALPHA = 0.3
+FAILURES_BEFORE_COOLDOWN = 2
+MAX_COOLDOWN_SECS = 3600
+
+
+def redact(proxy: str) -> str:
+    """host:port only — never log credentials."""
+    return proxy.split("@")[-1]
+
+
+def load_proxies() -> list:
+    proxies = [p.strip() for p in (settings.PROXIES or "").split(",") if p.strip()]
+    if settings.PROXIES_FILE:
+        path = Path(settings.PROXIES_FILE)
+        if path.exists():
+            for line in path.read_text().splitlines():
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    proxies.append(line)
+    return list(dict.fromkeys(proxies))
+
+
+class ProxyPool:
+    def __init__(self, proxies: list, cooldown_secs: float = 300):
+        self.cooldown_secs = cooldown_secs
+        self._stats = {
+            p: {
+                "success": 0.5,
+                "latency": 10.0,
+                "attempts": 0,
+                "successes": 0,
+                "consecutive_failures": 0,
+                "cooldown_until": 0.0,
+                "in_flight": 0,
+            }
+            for p in proxies
+        }
+
+    def __len__(self):
+        return len(self._stats)
+
+    def _weight(self, stats: dict) -> float:
+        # Healthy and fast proxies win; nothing ever drops to exactly zero
+        return max(0.01, stats["success"]) / (1.0 + stats["latency"] / 10.0)
+
+    def available(self, exclude: set | None = None) -> list:
+        now = time.time()
+        exclude = exclude or set()
+        return [
+            p for p, s in self._stats.items()
+            if p not in exclude and s["cooldown_until"] <= now
+        ]
+
+    def pick(self, k: int = 1, exclude: set | None = None) -> list:
+        """Weighted sample of up to k distinct healthy proxies."""
+        candidates = self.available(exclude)
+        if not candidates:
+            # Everything is cooling down: take the ones that recover soonest
+            rest = [p for p in self._stats if p not in (exclude or set())]
+            return sorted(rest, key=lambda p: self._stats[p]["cooldown_until"])[:k]
+
+        chosen = []
+        while candidates and len(chosen) < k:
+            weights = [self._weight(self._stats[p]) for p in candidates]
+            proxy = random.choices(candidates, weights=weights, k=1)[0]
+            chosen.append(proxy)
+            candidates.remove(proxy)
+        return chosen
+
+    def record(self, proxy: str, ok: bool, latency: float):
+        s = self._stats.get(proxy)
+        if s is None:
+            return
+        s["attempts"] += 1
+        s["success"] = (1 - EWMA_ALPHA) * s["success"] + EWMA_ALPHA * (1.0 if ok else 0.0)
+        s["latency"] = (1 - EWMA_ALPHA) * s["latency"] + EWMA_ALPHA * latency
+        if ok:
+            s["successes"] += 1
+            s["consecutive_failures"] = 0
+            s["cooldown_until"] = 0.0
+        else:
+            s["consecutive_failures"] += 1
+            if s["consecutive_failures"] >= FAILURES_BEFORE_COOLDOWN:
+                backoff = 2 ** (s["consecutive_failures"] - FAILURES_BEFORE_COOLDOWN)
+                s["cooldown_until"] = time.time() + min(MAX_COOLDOWN_SECS, self.cooldown_secs * backoff)
+
+    async def _attempt(self, proxy: str, fetch):
+        self._stats[proxy]["in_flight"] += 1
+        started = time.monotonic()
+        try:
+            html = await fetch(proxy)
+        except (asyncio.CancelledError, FetchNotAttempted):
+            # Lost the race / never got a browser — not the proxy's fault
+            raise
+        except Exception:
+            html = None
+        finally:
+            self._stats[proxy]["in_flight"] -= 1
+        deadline = current_deadline.get()
+        if not html and deadline is not None and deadline.expired():
+            return None  # cut off by the request budget, not a verdict on the proxy
+        self.record(proxy, bool(html), time.monotonic() - started)
+        return html
+
+    async def race(self, fetch, k: int = 1, exclude: set | None = None):
+        """
+        Run `fetch(proxy)` on k proxies concurrently. Returns (html, proxy)
+        for the first success (losers are cancelled) or (None, None).
+        Tried proxies are added to `exclude`. Attempts that raise
+        FetchNotAttempted, or fail after the request deadline, are not
+        held against the proxy.
+        """
+        proxies = self.pick(k, exclude)
+        if exclude is not None:
+            exclude.update(proxies)
+        if not proxies:
+            return None, None
+
+        tasks = {asyncio.ensure_future(self._attempt(p, fetch)): p for p in proxies}
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        html = task.result()
+                    except FetchNotAttempted:
+                        continue
+                    if html:
+                        return html, tasks[task]
+            return None, None
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    def stats(self) -> dict:
+        now = time.time()
+        return {
+            redact(p): {
+                "success_rate": round(s["success"], 3),
+                "latency_secs": round(s["latency"], 2),
+                "attempts": s["attempts"],
+                "successes": s["successes"],
+                "in_flight": s["in_flight"],
+                "cooling_down_secs": max(0, round(s["cooldown_until"] - now)),
+            }
+            for p, s in self._stats.items()
+        }
+
+
+_pool: ProxyPool | None = None
+
+
+def get_proxy_pool() -> ProxyPool:
+    global _pool
+    if _pool is None:
+        _pool = ProxyPool(load_proxies(), cooldown_secs=settings.PROXY_COOLDOWN_SECS)
+    return _pool
@@ -0,0 +1,115 @@
+# app/services/records.py
+"""
+Internal pipeline records.
+
+The scoring services pass these slotted dataclasses between stages
+instead of Pydantic models: no validation, no per-instance __dict__.
+They become Pydantic models once, at the API boundary, via to_model().
+Field names match the corresponding response schemas one-to-one.
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from app.schemas.outputs import (
+    BenchmarkInsights,
+    KeywordInsights,
+    PenaltyReport,
+    UXHeuristicInsights,
+)
+from app.schemas.rescore import RescoredAnalysis
+from app.schemas.score_details import ScoreBreakdown
+
+
+class _Record:
+    __slots__ = ()
+    model = None
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def to_model(self):
+        return self.model(**self.to_dict())
+
+
+@dataclass(slots=True)
+class PenaltyRecord(_Record):
+    total_penalty: float
+    meta_description_penalty: float
+    schema_penalty: float
+    alt_text_penalty: float
+    cwv_penalty: float
+    ux_penalty: float
+    notes: List[str] = field(default_factory=list)
+
+    model = PenaltyReport
+
+
+@dataclass(slots=True)
+class UXRecord(_Record):
+    ux_score: int
+    cta_present: bool
+    trust_signals_present: bool
+    mobile_friendly: bool
+    readability_ok: bool
+    issues: List[str] = field(default_factory=list)
+
+    model = UXHeuristicInsights
+
+
+@dataclass(slots=True)
+class KeywordRecord(_Record):
+    keywords_used: int
+    total_suggested: int
+    missing_keywords: List[str]
+    coverage: int
+
+    model = KeywordInsights
+
+
+@dataclass(slots=True)
+class ScoreBreakdownRecord(_Record):
+    seo_weighted: int
+    technical_weighted: int
+    content_weighted: int
+    brand_weighted: int
+    competitor_adjustment: int
+    penalties: List[str]
+    ux_score: int
+    final_aeo: int
+
+    model = ScoreBreakdown
+
+
+@dataclass(slots=True)
+class BenchmarkRecord(_Record):
+    industry: Optional[str]
+    seo_delta: int
+    technical_delta: int
+    content_delta: int
+    aeo_delta: int
+    strengths: List[str]
+    gaps: List[str]
+
+    model = BenchmarkInsights
+
+
+@dataclass(slots=True)
+class RescoredRecord(_Record):
+    """One row of an offline rescore (see app/services/rescore.py)."""
+    id: str
+    url: Optional[str]
+    seo_score: int
+    technical_score: int
+    content_score: int
+    aeo_score: int
+    final_aeo: int
+    total_penalty: float
+    ux_score: int
+    seo_delta: float
+    technical_delta: float
+    content_delta: float
+    aeo_delta: float
+    penalties: List[str] = field(default_factory=list)
+
+    model = RescoredAnalysis
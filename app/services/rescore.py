@@ -0,0 +1,129 @@
+# app/services/rescore.py
+"""
+Offline rescoring over stored snapshots.
+
+Replays the scoring stages (steps 9–16 of analyze()) with the current
+weights and benchmark tables. Snapshots are split into chunks; each
+worker process loads its chunk from disk and scores it with the
+vectorized engine in batch_scoring.
+
+CLI:
+    python -m app.services.rescore [--workers N] [--out results.jsonl]
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from app.core.config import settings
+from app.services.records import RescoredRecord
+from app.services.snapshots import iter_snapshot_ids, load_snapshot
+
+
+# Column order of RescoredRecord after id / url
+RESULT_FIELDS = [
+    "seo_score",
+    "technical_score",
+    "content_score",
+    "aeo_score",
+    "final_aeo",
+    "total_penalty",
+    "ux_score",
+    "seo_delta",
+    "technical_delta",
+    "content_delta",
+    "aeo_delta",
+]
+
+
+def _chunks(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def rescore_chunk(analysis_ids: list) -> list:
+    """Load and rescore one chunk of snapshots (runs inside a worker process)."""
+    records = []
+    for analysis_id in analysis_ids:
+        snap = load_snapshot(analysis_id)
+        if not snap:
+            continue
+        request = snap.get("request") or {}
+        records.append({
+            "id": analysis_id,
+            "url": snap.get("url"),
+            "onpage": snap.get("onpage"),
+            "performance": snap.get("performance"),
+            "llm_raw": snap.get("llm_raw"),
+            "industry": request.get("industry"),
+            "location": request.get("location"),
+        })
+
+    return score_rows(records)
+
+
+def score_rows(records: list) -> list:
+    """Score already-loaded snapshot records (dicts with id / url / onpage / ...)."""
+    from app.services.batch_scoring import penalty_notes, score_records
+
+    if not records:
+        return []
+
+    # Whole columns → Python lists once, then one slotted record per row
+    cols = score_records(records)
+    values = zip(*(cols[k].tolist() for k in RESULT_FIELDS))
+    return [
+        RescoredRecord(record["id"], record["url"], *row, notes)
+        for record, row, notes in zip(records, values, penalty_notes(cols))
+    ]
+
+
+def rescore_snapshots(
+    analysis_ids: list | None = None,
+    workers: int | None = None,
+    chunk_size: int | None = None,
+):
+    """Yield RescoredRecords for the given snapshots (all of them by default)."""
+    ids = list(analysis_ids) if analysis_ids else list(iter_snapshot_ids())
+    if not ids:
+        return
+
+    chunk_size = chunk_size or settings.RESCORE_CHUNK_SIZE
+    workers = workers or settings.RESCORE_WORKERS or os.cpu_count() or 1
+    chunks = list(_chunks(ids, chunk_size))
+
+    # Small jobs aren't worth the process start-up cost
+    if workers == 1 or len(chunks) == 1:
+        for chunk in chunks:
+            yield from rescore_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+        for rows in pool.map(rescore_chunk, chunks):
+            yield from rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rescore stored AEO snapshots.")
+    parser.add_argument("ids", nargs="*", help="Analysis ids (default: all snapshots)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--out", default=None, help="Write JSON lines here instead of stdout")
+    args = parser.parse_args(argv)
+
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    count = 0
+    try:
+        for row in rescore_snapshots(args.ids, args.workers, args.chunk_size):
+            out.write(json.dumps(row.to_dict()) + "\n")
+            count += 1
+    finally:
+        if args.out:
+            out.close()
+    print(f"Rescored {count} snapshots.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
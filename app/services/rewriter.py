@@ -1,14 +1,17 @@
 from typing import List, Dict
 from app.schemas.rewriter import RewriteRequest, Variant
 from app.core.config import settings
+from app.services.prompt_builder import (
+    count_tokens,
+    record_completion,
+    record_prompt,
+    truncate_to_tokens,
+)
 import re
+from importlib.util import find_spec
 
-# Graceful import for OpenAI
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
+# Graceful import for OpenAI (checked without importing it at startup)
+OPENAI_AVAILABLE = find_spec("openai") is not None
 
 PROMPT_TEMPLATE = """
 You are an SEO copywriter. Rewrite the following content to improve clarity and SEO.
@@ -25,14 +28,26 @@ Original Content:
 --- END ---
 """
 
-def build_prompt(req: RewriteRequest) -> str:
+def fit_content(content: str) -> tuple:
+    """
+    Content cut to REWRITE_INPUT_TOKEN_BUDGET → (content, trimmed).
+    The user's copy is rewritten as written (blank lines, indentation,
+    repeats); it is only cut at the budget, never compressed.
+    """
+    budget = settings.REWRITE_INPUT_TOKEN_BUDGET
+    if count_tokens(content) <= budget:
+        return content, False
+    return truncate_to_tokens(content, budget), True
+
+
+def build_prompt(req: RewriteRequest, content: str | None = None) -> str:
     kw_text = ", ".join(req.target_keywords) if req.target_keywords else "none"
     return PROMPT_TEMPLATE.format(
         tone=req.tone,
         max_len=req.max_length,
         keywords=kw_text,
         preserve_html=str(req.preserve_html),
-        content=req.content
+        content=req.content if content is None else content,
     )
 
 def call_llm(prompt: str, max_tokens: int=512, n: int=1) -> List[str]:
@@ -42,8 +57,11 @@ def call_llm(prompt: str, max_tokens: int=512, n: int=1) -> List[str]:
     if not settings.OPENAI_API_KEY:
         return [f"[Mock] Rewrite: {prompt[:50]}... (Missing API Key)"] * n
 
+    from openai import OpenAI
+
     client = OpenAI(api_key=settings.OPENAI_API_KEY)
-    
+    record_prompt("rewrite", prompt)
+
     try:
         resp = client.chat.completions.create(
             model="gpt-4o-mini",  
@@ -52,6 +70,7 @@ def call_llm(prompt: str, max_tokens: int=512, n: int=1) -> List[str]:
             n=n,
             temperature=0.7
         )
+        record_completion("rewrite", resp)
         results = []
         for choice in resp.choices:
             text = choice.message.content if choice.message.content else ""
@@ -85,7 +104,14 @@ def generate_variants(req: RewriteRequest, adapter_name: str = "openai") -> Dict
         }
 
     # 2. Handle Real Logic (OpenAI)
-    prompt = build_prompt(req)
+    content, trimmed = fit_content(req.content)
+    prompt = build_prompt(req, content)
+    warnings = []
+    if trimmed:
+        warnings.append(
+            f"Content was {count_tokens(req.content)} tokens; only the first "
+            f"{settings.REWRITE_INPUT_TOKEN_BUDGET} were rewritten."
+        )
     
     # ask LLM for `variations` responses
     responses = call_llm(prompt, max_tokens=min(1024, (req.max_length or 800)), n=(req.variations or 1))
@@ -109,5 +135,6 @@ def generate_variants(req: RewriteRequest, adapter_name: str = "openai") -> Dict
         
     return {
         "original_length": len(req.content),
-        "variants": variants
+        "variants": variants,
+        "warnings": warnings,
     }
\ No newline at end of file
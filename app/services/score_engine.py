@@ -1,7 +1,7 @@
 # app/services/score_engine.py
-from app.schemas.score_details import ScoreBreakdown
+from app.services.records import ScoreBreakdownRecord
 
-def compute_weighted_score(scores: dict, penalties, ux) -> ScoreBreakdown:
+def compute_weighted_score(scores: dict, penalties, ux) -> ScoreBreakdownRecord:
     W_SEO = 0.30
     W_TECH = 0.30
     W_CONTENT = 0.25
@@ -18,7 +18,7 @@ def compute_weighted_score(scores: dict, penalties, ux) -> ScoreBreakdown:
 
     final_aeo = max(0, base_total - penalties.total_penalty)
 
-    return ScoreBreakdown(
+    return ScoreBreakdownRecord(
         seo_weighted=round(seo_w),
         technical_weighted=round(tech_w),
         content_weighted=round(content_w),
@@ -0,0 +1,453 @@
+# app/services/score_history.py
+"""
+Per-URL score history.
+
+Every analysis (API, queued job, sitemap batch) appends one point:
+
+  points    (url_id, ts) primary key, WITHOUT ROWID, so a URL's history
+            is one contiguous range of the b-tree. One narrow column
+            per score / breakdown component / penalty; URLs are stored
+            once in `urls` and referenced by integer id.
+  rollups   daily and weekly buckets per URL holding count / sum / min /
+            max of the headline scores. Updated in the same transaction
+            as the points they summarize, so series queries never scan
+            raw points, and they outlive the raw retention window.
+            Partial points (deadline fallbacks, sitemap batches scored
+            without performance / LLM data) are stored but not rolled up,
+            so their neutral defaults don't drag the averages.
+
+URLs are normalised the way /api/analyze validates them (HttpUrl:
+lower-case host, "/" path for a bare domain) on write and on lookup, so
+one page is one series whichever pipeline scored it.
+
+Writes go through a bounded in-memory queue drained by one writer
+thread, many points per transaction: callers never wait on SQLite, and
+a batch run's thousands of points per minute cost a few commits per
+second. A point is readable a few milliseconds after it was added.
+
+Retention (HISTORY_*_RETENTION_DAYS) is applied by the writer thread
+about once an hour.
+"""
+
+import json
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+from pydantic import HttpUrl, TypeAdapter
+
+from app.core.config import settings
+from app.core.metrics import counter, histogram
+from app.core.sqlite import LocalConnections, transaction
+
+SCORE_COLUMNS = ["aeo_score", "seo_score", "technical_score", "content_score", "final_aeo", "ux_score", "total_penalty"]
+BREAKDOWN_COLUMNS = ["seo_weighted", "technical_weighted", "content_weighted", "brand_weighted", "competitor_adjustment"]
+PENALTY_COLUMNS = ["meta_description_penalty", "schema_penalty", "alt_text_penalty", "cwv_penalty", "ux_penalty"]
+VALUE_COLUMNS = SCORE_COLUMNS + BREAKDOWN_COLUMNS + PENALTY_COLUMNS
+# Aggregated into the daily / weekly rollups
+ROLLUP_METRICS = ["aeo_score", "seo_score", "technical_score", "content_score", "final_aeo", "total_penalty"]
+
+DAY = 86400
+PERIODS = {"day": DAY, "week": 7 * DAY}
+PRUNE_INTERVAL_SECS = 3600
+MAX_CACHED_URLS = 100_000
+
+ROWS = counter("history_points_total", "Score history points", ["result"])
+FLUSH_MS = histogram("history_flush_ms", "Score history batch write time (ms)")
+
+_STOP = object()
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS urls (
+    id  INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS points (
+    url_id      INTEGER NOT NULL,
+    ts          INTEGER NOT NULL,           -- epoch milliseconds
+    analysis_id TEXT,
+    source      TEXT,
+    partial     INTEGER NOT NULL DEFAULT 0,
+    {", ".join(f"{c} REAL" for c in VALUE_COLUMNS)},
+    notes       TEXT,                       -- JSON list of penalty notes
+    PRIMARY KEY (url_id, ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS points_ts ON points (ts);
+
+CREATE TABLE IF NOT EXISTS rollups (
+    url_id  INTEGER NOT NULL,
+    period  TEXT NOT NULL,                  -- day | week
+    bucket  INTEGER NOT NULL,               -- bucket start, epoch seconds (UTC)
+    n       INTEGER NOT NULL,
+    {", ".join(f"{m}_n INTEGER, {m}_sum REAL, {m}_min REAL, {m}_max REAL" for m in ROLLUP_METRICS)},
+    PRIMARY KEY (url_id, period, bucket)
+) WITHOUT ROWID;
+"""
+
+POINT_FIELDS = ["url_id", "ts", "analysis_id", "source", "partial", *VALUE_COLUMNS, "notes"]
+INSERT_POINT = (
+    f"INSERT OR IGNORE INTO points ({', '.join(POINT_FIELDS)}) "
+    f"VALUES ({', '.join('?' * len(POINT_FIELDS))})"
+)
+
+ROLLUP_FIELDS = ["url_id", "period", "bucket", "n"] + [
+    f"{m}_{agg}" for m in ROLLUP_METRICS for agg in ("n", "sum", "min", "max")
+]
+UPSERT_ROLLUP = (
+    f"INSERT INTO rollups ({', '.join(ROLLUP_FIELDS)}) VALUES ({', '.join('?' * len(ROLLUP_FIELDS))}) "
+    f"ON CONFLICT (url_id, period, bucket) DO UPDATE SET n = n + excluded.n, "
+    + ", ".join(
+        f"{m}_n = {m}_n + excluded.{m}_n, {m}_sum = {m}_sum + excluded.{m}_sum, "
+        f"{m}_min = min(coalesce({m}_min, excluded.{m}_min), coalesce(excluded.{m}_min, {m}_min)), "
+        f"{m}_max = max(coalesce({m}_max, excluded.{m}_max), coalesce(excluded.{m}_max, {m}_max))"
+        for m in ROLLUP_METRICS
+    )
+)
+
+
+_HTTP_URL = TypeAdapter(HttpUrl)
+
+
+def normalize_url(url: str) -> str:
+    """`url` as AnalyzeRequest.url serializes it (unchanged if it isn't an http(s) URL)."""
+    try:
+        return str(_HTTP_URL.validate_python(url.strip()))
+    except ValueError:
+        return url.strip()
+
+
+def bucket_start(ts: float, period: str) -> int:
+    """Start (epoch seconds, UTC) of the day / ISO week (Monday) containing ts."""
+    day = int(ts // DAY)
+    if period == "week":
+        day -= (day + 3) % 7  # 1970-01-01 was a Thursday
+    return day * DAY
+
+
+def flatten_response(payload: dict) -> dict:
+    """Scores, breakdown and penalties of an AnalyzeResponse dump as one flat dict."""
+    values = {
+        **(payload.get("scores") or {}),
+        **(payload.get("score_breakdown") or {}),
+        **(payload.get("penalties") or {}),
+    }
+    return {k: values[k] for k in VALUE_COLUMNS + ["notes"] if k in values}
+
+
+def _number(value):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def _utc(seconds: float) -> datetime:
+    return datetime.fromtimestamp(seconds, tz=timezone.utc)
+
+
+class ScoreHistory:
+    def __init__(self, path: str, batch_size: int = 1000, queue_size: int = 50000, retention_days: dict | None = None):
+        self.path = path
+        self.batch_size = batch_size
+        self.retention_days = retention_days or {}
+        self._connections = LocalConnections(path)
+        self._connections.get().executescript(SCHEMA)
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._writer: threading.Thread | None = None
+        self._writer_lock = threading.Lock()
+        # Writer-side caches: url → id, url id → last ts written (ms)
+        self._url_ids: dict = {}
+        self._last_ts: dict = {}
+
+    # -----------------------------------------------------
+    #  WRITE
+    # -----------------------------------------------------
+    def add(
+        self,
+        url: str,
+        values: dict,
+        ts: float | None = None,
+        analysis_id: str | None = None,
+        source: str | None = None,
+        partial: bool = False,
+    ) -> bool:
+        """
+        Queue one point (never blocks). `values` holds any of VALUE_COLUMNS
+        plus "notes". False if the queue is full and the point was dropped.
+        """
+        point = (normalize_url(url), ts or time.time(), analysis_id, source, partial, values)
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(point)
+        except queue.Full:
+            ROWS.inc(result="dropped")
+            return False
+        return True
+
+    def write(self, points: list) -> int:
+        """
+        Insert (url, ts, analysis_id, source, partial, values) tuples in
+        one transaction and fold the complete ones into the rollups.
+        URLs must already be normalised (add() does it). Returns rows written.
+        """
+        if not points:
+            return 0
+        started = time.perf_counter()
+        conn = self._connections.get()
+        deltas: dict = {}
+        with transaction(conn):
+            for url, ts, analysis_id, source, partial, values in points:
+                url_id = self._url_id(conn, url)
+                numbers = [_number(values.get(c)) for c in VALUE_COLUMNS]
+                notes = values.get("notes") or values.get("penalty_notes")
+                # Same URL twice in one millisecond: shift by 1 ms so both
+                # points are kept and the rollups count exactly what is stored
+                ts_ms = int(ts * 1000)
+                last = self._last_ts.get(url_id)
+                if last is not None and last >= ts_ms and last - ts_ms < 1000:
+                    ts_ms = last + 1
+                row = [
+                    url_id, ts_ms, analysis_id, source, int(bool(partial)),
+                    *numbers, json.dumps(notes) if notes else None,
+                ]
+                # Collision with a point from another process
+                while not conn.execute(INSERT_POINT, row).rowcount:
+                    row[1] += 1
+                if len(self._last_ts) < MAX_CACHED_URLS or url_id in self._last_ts:
+                    self._last_ts[url_id] = row[1]
+                if partial:
+                    continue
+                by_column = dict(zip(VALUE_COLUMNS, numbers))
+                for period in PERIODS:
+                    self._fold(deltas, (url_id, period, bucket_start(row[1] / 1000, period)), by_column)
+
+            conn.executemany(UPSERT_ROLLUP, [
+                (*key, delta["n"], *(v for m in ROLLUP_METRICS for v in delta[m]))
+                for key, delta in deltas.items()
+            ])
+        FLUSH_MS.observe((time.perf_counter() - started) * 1000)
+        ROWS.inc(len(points), result="written")
+        return len(points)
+
+    def _url_id(self, conn, url: str) -> int:
+        url_id = self._url_ids.get(url)
+        if url_id is None:
+            conn.execute("INSERT OR IGNORE INTO urls (url) VALUES (?)", (url,))
+            (url_id,) = conn.execute("SELECT id FROM urls WHERE url = ?", (url,)).fetchone()
+            if len(self._url_ids) < MAX_CACHED_URLS:
+                self._url_ids[url] = url_id
+        return url_id
+
+    @staticmethod
+    def _fold(deltas: dict, key: tuple, by_column: dict):
+        delta = deltas.get(key)
+        if delta is None:
+            delta = deltas[key] = {"n": 0, **{m: [0, 0.0, None, None] for m in ROLLUP_METRICS}}
+        delta["n"] += 1
+        for m in ROLLUP_METRICS:
+            value = by_column[m]
+            if value is None:
+                continue
+            agg = delta[m]
+            agg[0] += 1
+            agg[1] += value
+            agg[2] = value if agg[2] is None else min(agg[2], value)
+            agg[3] = value if agg[3] is None else max(agg[3], value)
+
+    # -----------------------------------------------------
+    #  WRITER THREAD
+    # -----------------------------------------------------
+    def _ensure_writer(self):
+        if self._writer is not None:
+            return
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name="score-history", daemon=True)
+                self._writer.start()
+
+    def _run(self):
+        last_prune = 0.0
+        while True:
+            try:
+                batch = [self._queue.get(timeout=PRUNE_INTERVAL_SECS)]
+            except queue.Empty:
+                batch = []
+            # Whatever piled up while the last batch was written goes in this one
+            while batch and len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = _STOP in batch
+            points = [p for p in batch if p is not _STOP]
+            try:
+                self.write(points)
+            except Exception as e:
+                ROWS.inc(len(points), result="failed")
+                print(f"Score history write failed ({len(points)} points): {e}")
+            for _ in batch:
+                self._queue.task_done()
+
+            if time.monotonic() - last_prune >= PRUNE_INTERVAL_SECS:
+                last_prune = time.monotonic()
+                try:
+                    self.prune()
+                except Exception as e:
+                    print(f"Score history prune failed: {e}")
+            if stop:
+                return
+
+    def flush(self):
+        """Block until every queued point is written."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def close(self):
+        if self._writer is not None:
+            self._queue.put(_STOP)
+            self._writer.join()
+            self._writer = None
+
+    def prune(self, now: float | None = None) -> dict:
+        """Apply retention: raw points, then daily and weekly rollups."""
+        now = now or time.time()
+        removed = {}
+        conn = self._connections.get()
+        with transaction(conn):
+            days = self.retention_days.get("raw")
+            if days:
+                cur = conn.execute("DELETE FROM points WHERE ts < ?", (int((now - days * DAY) * 1000),))
+                removed["raw"] = cur.rowcount
+            for period in PERIODS:
+                days = self.retention_days.get(period)
+                if days:
+                    cur = conn.execute(
+                        "DELETE FROM rollups WHERE period = ? AND bucket < ?",
+                        (period, bucket_start(now - days * DAY, period)),
+                    )
+                    removed[period] = cur.rowcount
+        if any(removed.values()):
+            print(f"Score history retention removed {removed}")
+        return removed
+
+    # -----------------------------------------------------
+    #  READ
+    # -----------------------------------------------------
+    def _lookup(self, url: str) -> int | None:
+        row = self._connections.get().execute(
+            "SELECT id FROM urls WHERE url = ?", (normalize_url(url),)
+        ).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _point(row) -> dict:
+        return {
+            "ts": _utc(row["ts"] / 1000),
+            "analysis_id": row["analysis_id"],
+            "source": row["source"],
+            "partial": bool(row["partial"]),
+            "scores": {c: row[c] for c in SCORE_COLUMNS},
+            "breakdown": {c: row[c] for c in BREAKDOWN_COLUMNS},
+            "penalties": {c: row[c] for c in PENALTY_COLUMNS},
+            "notes": json.loads(row["notes"]) if row["notes"] else [],
+        }
+
+    def points(self, url: str, start: float | None = None, end: float | None = None, limit: int = 1000) -> list:
+        """Points for `url` with start <= ts < end (epoch seconds), oldest first."""
+        url_id = self._lookup(url)
+        if url_id is None:
+            return []
+        rows = self._connections.get().execute(
+            "SELECT * FROM points WHERE url_id = ? AND ts >= ? AND ts < ? ORDER BY ts LIMIT ?",
+            (
+                url_id,
+                int(start * 1000) if start is not None else 0,
+                int(end * 1000) if end is not None else 2**62,
+                limit,
+            ),
+        ).fetchall()
+        return [self._point(row) for row in rows]
+
+    def latest(self, url: str, n: int = 10) -> list:
+        """The `n` most recent points for `url`, newest first."""
+        url_id = self._lookup(url)
+        if url_id is None:
+            return []
+        rows = self._connections.get().execute(
+            "SELECT * FROM points WHERE url_id = ? ORDER BY ts DESC LIMIT ?", (url_id, n)
+        ).fetchall()
+        return [self._point(row) for row in rows]
+
+    def series(self, url: str, period: str = "day", start: float | None = None, end: float | None = None) -> list:
+        """Daily / weekly aggregates of complete points (avg, min, max per metric), oldest first."""
+        url_id = self._lookup(url)
+        if url_id is None:
+            return []
+        rows = self._connections.get().execute(
+            "SELECT * FROM rollups WHERE url_id = ? AND period = ? AND bucket >= ? AND bucket < ? ORDER BY bucket",
+            (
+                url_id,
+                period,
+                bucket_start(start, period) if start is not None else 0,
+                int(end) if end is not None else 2**62,
+            ),
+        ).fetchall()
+        return [
+            {
+                "start": _utc(row["bucket"]),
+                "count": row["n"],
+                "metrics": {
+                    m: {
+                        "avg": round(row[f"{m}_sum"] / row[f"{m}_n"], 2),
+                        "min": row[f"{m}_min"],
+                        "max": row[f"{m}_max"],
+                    }
+                    for m in ROLLUP_METRICS
+                    if row[f"{m}_n"]
+                },
+            }
+            for row in rows
+        ]
+
+
+_history: ScoreHistory | None = None
+_history_lock = threading.Lock()
+
+
+def get_history() -> ScoreHistory:
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = ScoreHistory(
+                settings.HISTORY_DB_PATH,
+                batch_size=settings.HISTORY_BATCH_SIZE,
+                queue_size=settings.HISTORY_QUEUE_SIZE,
+                retention_days={
+                    "raw": settings.HISTORY_RAW_RETENTION_DAYS,
+                    "day": settings.HISTORY_DAILY_RETENTION_DAYS,
+                    "week": settings.HISTORY_WEEKLY_RETENTION_DAYS,
+                },
+            )
+    return _history
+
+
+def record_analysis(url: str, payload: dict, source: str):
+    """Queue a point for a finished AnalyzeResponse dump (no-op when disabled)."""
+    if not settings.HISTORY_ENABLED:
+        return
+    try:
+        get_history().add(
+            url,
+            flatten_response(payload),
+            analysis_id=payload.get("analysis_id"),
+            source=source,
+            partial=bool(payload.get("partial")),
+        )
+    except Exception as e:
+        print(f"Score history record failed: {e}")
+
+
+def close_history():
+    """Flush and stop the writer (process shutdown)."""
+    if _history is not None:
+        _history.close()
@@ -5,6 +5,24 @@ from app.services.location_benchmarks import adjust_score_with_location
 def clamp(x: int, lo: int = 0, hi: int = 100) -> int:
     return max(lo, min(hi, x))
 
+def to_int(value):
+    """Normalize many possible LLM numeric formats to int (0-100)."""
+    try:
+        if value is None:
+            return 50
+        if isinstance(value, int):
+            return value
+        if isinstance(value, float):
+            return int(value)
+        if isinstance(value, str):
+            clean = value.strip().replace("%", "")
+            if "-" in clean:
+                clean = clean.split("-")[0]
+            return int(float(clean))
+    except Exception:
+        pass
+    return 50
+
 def score_onpage(onpage: dict) -> int:
     score = 0
     checks = 0
@@ -1,8 +1,30 @@
 # app/services/search.py
 
-from serpapi import GoogleSearch
+from app.core.cache import cache
 from app.core.config import settings
+from app.core.deadline import timeout_for
+from app.core.resilience import dependency
 
+SERPAPI = dependency("serpapi")
+SERP_CACHE = cache("serp", ttl=settings.CACHE_TTL_SERP_SECS)
+
+
+def _fetch_results(params: dict) -> dict:
+    import httpx
+
+    response = httpx.get(
+        f"{settings.SERPAPI_BASE_URL.rstrip('/')}/search.json",
+        params=params,
+        timeout=timeout_for(settings.TIMEOUT_SECS),
+    )
+    # Throttling / outages count against the breaker; "no results" does not
+    if response.status_code == 429 or response.status_code >= 500:
+        raise RuntimeError(f"SerpAPI HTTP {response.status_code}")
+    return response.json()
+
+
+# Failures return [] and are not cached
+@SERP_CACHE.memoize(key=lambda query, num_results=5: f"{num_results}:{query.strip().lower()}")
 def get_serp_competitors(query: str, num_results: int = 5):
     """Return top organic competitors from Google Search using SerpAPI."""
     params = {
@@ -10,11 +32,11 @@ def get_serp_competitors(query: str, num_results: int = 5):
         "q": query,
         "api_key": settings.SERPAPI_KEY,
         "num": num_results,
+        "output": "json",
     }
 
     try:
-        search = GoogleSearch(params)
-        results = search.get_dict()
+        results = SERPAPI.call(_fetch_results, params)
 
         organic = results.get("organic_results", [])
 
@@ -0,0 +1,315 @@
+# app/services/site_crawler.py
+"""
+Multi-page site crawl.
+
+Starts from the submitted URL (plus sitemap.xml), follows internal links
+through a bounded async frontier and scores every page with the same
+on-page / keyword engines used by /api/analyze. The crawl stays on the
+start URL's host (or the host it redirects to): pages that redirect
+anywhere else are dropped.
+
+Memory stays bounded regardless of site size:
+  - the frontier queue has a fixed capacity (overflow links are dropped),
+  - dedup sets hold 8-byte digests, capped at 2 * max_pages URLs,
+  - HTML is discarded after parsing; only running aggregates and the
+    weakest pages are kept (per-page rows only if include_pages=True).
+"""
+
+import asyncio
+import hashlib
+import heapq
+from contextlib import aclosing
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
+
+from app.core.config import settings
+from app.services.crawler import get_shared_client, parse_onpage
+from app.services.content_extractor import page_text
+from app.services.keyword_engine import keyword_contextual_score
+from app.services.politeness import PoliteFetcher, RobotsDisallowed, url_origin
+from app.services.scoring import score_onpage
+from app.services.sitemap import iter_sitemap_urls
+
+
+TRACKING_PARAMS = ("utm_", "gclid", "fbclid", "mc_cid", "mc_eid")
+
+SKIP_EXTENSIONS = (
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".svg", ".ico",
+    ".pdf", ".zip", ".gz", ".mp4", ".mp3", ".avi", ".mov",
+    ".css", ".js", ".json", ".xml", ".woff", ".woff2", ".ttf",
+)
+
+WEAKEST_PAGES = 10
+
+
+# ---------------------------------------------------------
+#  URL HELPERS
+# ---------------------------------------------------------
+def normalize_url(url: str) -> str:
+    """Canonical form used for dedup: lowercase host, no fragment, no tracking params."""
+    parts = urlparse(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and not (
+        (scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)
+    ):
+        host = f"{host}:{parts.port}"
+    path = parts.path or "/"
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(TRACKING_PARAMS)
+    ))
+    return urlunparse((scheme, host, path, "", query, ""))
+
+
+def _digest(value: str) -> bytes:
+    return hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest()
+
+
+def _is_crawlable(url: str, host: str) -> bool:
+    parts = urlparse(url)
+    if parts.scheme not in ("http", "https"):
+        return False
+    if (parts.hostname or "").lower() != host:
+        return False
+    return not parts.path.lower().endswith(SKIP_EXTENSIONS)
+
+
+def extract_links(html: str, base_url: str) -> tuple[list, str | None]:
+    """Return (absolute hrefs, canonical URL) for a page."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "lxml")
+    canonical = None
+    link = soup.find("link", rel="canonical")
+    if link and link.get("href"):
+        canonical = urljoin(base_url, link["href"].strip())
+    links = [
+        urljoin(base_url, a["href"].strip())
+        for a in soup.find_all("a", href=True)
+        if not a["href"].startswith(("#", "mailto:", "tel:", "javascript:"))
+    ]
+    return links, canonical
+
+
+# ---------------------------------------------------------
+#  SITEMAP DISCOVERY
+# ---------------------------------------------------------
+async def discover_sitemap_urls(client, sitemap_urls: list, limit: int) -> list:
+    """Collect up to `limit` page URLs from sitemap(s) via the streaming parser."""
+    found = []
+    for sm_url in sitemap_urls:
+        try:
+            async with aclosing(iter_sitemap_urls(client, sm_url)) as entries:
+                async for url, _ in entries:
+                    found.append(url)
+                    if len(found) >= limit:
+                        return found
+        except Exception as e:
+            print(f"Sitemap discovery failed for {sm_url}: {e}")
+    return found
+
+
+# ---------------------------------------------------------
+#  SITE CRAWL
+# ---------------------------------------------------------
+async def crawl_site(
+    start_url: str,
+    industry: str = "",
+    product: str = "",
+    company: str = "",
+    max_pages: int | None = None,
+    concurrency: int | None = None,
+    rate_per_host: float | None = None,
+    use_sitemap: bool = True,
+    include_pages: bool = False,
+) -> dict:
+    """Crawl one site and return an aggregated site-level report dict."""
+    max_pages = max_pages or settings.SITE_CRAWL_MAX_PAGES
+    concurrency = concurrency or settings.SITE_CRAWL_CONCURRENCY
+    rate_per_host = rate_per_host if rate_per_host is not None else settings.SITE_CRAWL_RATE_PER_HOST
+
+    client = get_shared_client(settings.TIMEOUT_SECS)
+    fetcher = PoliteFetcher(client, rate_per_host)
+
+    start = normalize_url(start_url)
+    host = (urlparse(start).hostname or "").lower()
+    origin = url_origin(start)
+
+    frontier: asyncio.Queue = asyncio.Queue(maxsize=max(concurrency * 4, min(max_pages, 5000)))
+    seen_urls: set = set()
+    seen_content: set = set()
+    max_enqueued = max_pages * 2
+
+    stats = {
+        "pages_crawled": 0,
+        "duplicates_skipped": 0,
+        "blocked_by_robots": 0,
+        "errors": 0,
+        "links_dropped": 0,
+        "seo_total": 0,
+        "keyword_total": 0,
+        "with_schema": 0,
+        "with_meta": 0,
+        "with_h1": 0,
+    }
+    weakest: list = []   # max-heap of (-seo_score, url, summary) limited to WEAKEST_PAGES
+    pages: list = []
+    done = asyncio.Event()
+
+    def enqueue(url: str):
+        norm = normalize_url(url)
+        if not _is_crawlable(norm, host):
+            return
+        key = _digest(norm)
+        if key in seen_urls:
+            return
+        if len(seen_urls) >= max_enqueued:
+            stats["links_dropped"] += 1
+            return
+        try:
+            frontier.put_nowait(norm)
+        except asyncio.QueueFull:
+            stats["links_dropped"] += 1
+            return
+        seen_urls.add(key)
+
+    def record(summary: dict):
+        stats["pages_crawled"] += 1
+        stats["seo_total"] += summary["seo_score"]
+        stats["keyword_total"] += summary["keyword_coverage"]
+        stats["with_schema"] += int(summary["schema_present"])
+        stats["with_meta"] += int(summary["has_meta_description"])
+        stats["with_h1"] += int(summary["has_h1"])
+        entry = (-summary["seo_score"], summary["url"], summary)
+        if len(weakest) < WEAKEST_PAGES:
+            heapq.heappush(weakest, entry)
+        elif entry > weakest[0]:
+            heapq.heapreplace(weakest, entry)
+        if include_pages:
+            pages.append(summary)
+        if stats["pages_crawled"] >= max_pages:
+            done.set()
+
+    async def process(url: str):
+        nonlocal host
+        try:
+            resp, html = await fetcher.get(url)
+        except RobotsDisallowed:
+            stats["blocked_by_robots"] += 1
+            return
+        except Exception:
+            stats["errors"] += 1
+            return
+        if resp.status_code >= 400:
+            stats["errors"] += 1
+            return
+        if resp.status_code != 200 or "html" not in resp.headers.get("content-type", "html"):
+            return
+
+        final_url = normalize_url(str(resp.url))
+        final_host = (urlparse(final_url).hostname or "").lower()
+        if final_host != host:
+            if url != start:
+                return
+            host = final_host  # e.g. example.com → www.example.com
+        if final_url != url:
+            key = _digest(final_url)
+            if key in seen_urls:
+                stats["duplicates_skipped"] += 1
+                return
+            seen_urls.add(key)
+
+        links, canonical = await asyncio.to_thread(extract_links, html, final_url)
+        for link in links:
+            enqueue(link)
+
+        if canonical:
+            canonical = normalize_url(canonical)
+            if canonical != final_url:
+                key = _digest(canonical)
+                if key in seen_urls:
+                    stats["duplicates_skipped"] += 1
+                    return
+                seen_urls.add(key)
+
+        onpage = await asyncio.to_thread(parse_onpage, html)
+        text_key = _digest(onpage.get("content_text") or "")
+        if text_key in seen_content:
+            stats["duplicates_skipped"] += 1
+            return
+        seen_content.add(text_key)
+
+        keywords = keyword_contextual_score(
+            content_text=page_text(onpage),
+            industry=industry,
+            product=product,
+            company=company,
+            onpage=onpage,
+            url=final_url,
+        )
+        record({
+            "url": final_url,
+            "title": onpage.get("title"),
+            "seo_score": score_onpage(onpage),
+            "keyword_coverage": keywords.coverage,
+            "schema_present": bool(onpage.get("schema_present")),
+            "has_meta_description": bool(onpage.get("meta_description")),
+            "has_h1": bool(onpage.get("h1")),
+        })
+
+    async def worker():
+        while not done.is_set():
+            url = await frontier.get()
+            try:
+                await process(url)
+            except Exception as e:
+                stats["errors"] += 1
+                print(f"Site crawl error on {url}: {e}")
+            finally:
+                frontier.task_done()
+
+    enqueue(start)
+    if use_sitemap:
+        sitemap_urls = await fetcher.robots.sitemaps(origin) or [f"{origin}/sitemap.xml"]
+        for url in await discover_sitemap_urls(client, sitemap_urls, limit=max_pages):
+            enqueue(url)
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    finished = asyncio.create_task(frontier.join())
+    stopped = asyncio.create_task(done.wait())
+    await asyncio.wait([finished, stopped], return_when=asyncio.FIRST_COMPLETED)
+    for task in workers + [finished, stopped]:
+        task.cancel()
+    await asyncio.gather(*workers, finished, stopped, return_exceptions=True)
+
+    return build_site_report(start, stats, weakest, pages if include_pages else None)
+
+
+def build_site_report(start_url: str, stats: dict, weakest: list, pages: list | None) -> dict:
+    crawled = stats["pages_crawled"]
+
+    def avg(total):
+        return round(total / crawled, 1) if crawled else 0.0
+
+    def pct(count):
+        return round(100 * count / crawled, 1) if crawled else 0.0
+
+    seo_avg = avg(stats["seo_total"])
+    keyword_avg = avg(stats["keyword_total"])
+
+    return {
+        "start_url": start_url,
+        "pages_crawled": crawled,
+        "duplicates_skipped": stats["duplicates_skipped"],
+        "blocked_by_robots": stats["blocked_by_robots"],
+        "errors": stats["errors"],
+        "links_dropped": stats["links_dropped"],
+        "seo_score_avg": seo_avg,
+        "keyword_coverage_avg": keyword_avg,
+        "schema_coverage": pct(stats["with_schema"]),
+        "meta_description_coverage": pct(stats["with_meta"]),
+        "h1_coverage": pct(stats["with_h1"]),
+        "site_score": round(0.6 * seo_avg + 0.4 * keyword_avg),
+        "weakest_pages": [entry[2] for entry in sorted(weakest, reverse=True)],
+        "pages": pages,
+    }
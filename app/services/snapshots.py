@@ -0,0 +1,172 @@
+# app/services/snapshots.py
+"""
+On-disk snapshot store for analyses.
+
+Each analysis is one gzip-compressed JSON file holding the raw HTML,
+the parsed onpage dict, the performance dict, llm_raw and the request
+fields — everything the scoring stages need, so weights/benchmarks can
+be re-tuned without crawling again.
+
+The final API response is also kept as ready-to-send gzip bytes with an
+ETag, so GET /api/analyze/{id} never re-serializes a stored result.
+
+Layout:
+    <SNAPSHOT_DIR>/<id[:2]>/<id>.json.gz     snapshot
+    <SNAPSHOT_DIR>/<id[:2]>/<id>.response.gz serialized AnalyzeResponse (gzip)
+    <SNAPSHOT_DIR>/<id[:2]>/<id>.etag        ETag of the response body
+    <SNAPSHOT_DIR>/by_url/<sha1(url)>        id of the latest snapshot for a URL
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+from pathlib import Path
+
+import orjson
+
+from app.core.config import settings
+
+
+ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+def _root() -> Path:
+    return Path(settings.SNAPSHOT_DIR)
+
+
+def _url_key(url: str) -> str:
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+
+def is_valid_id(analysis_id: str) -> bool:
+    return bool(ID_RE.match(analysis_id or ""))
+
+
+def snapshot_path(analysis_id: str) -> Path:
+    return _root() / analysis_id[:2] / f"{analysis_id}.json.gz"
+
+
+def _result_path(analysis_id: str, suffix: str) -> Path:
+    return _root() / analysis_id[:2] / f"{analysis_id}{suffix}"
+
+
+def result_etag(body: bytes) -> str:
+    # Weak: the same result is served gzip-encoded or plain
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def _atomic_write(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+# ---------------------------------------------------------
+#  WRITE
+# ---------------------------------------------------------
+def save_snapshot(
+    url: str,
+    request: dict,
+    html: str | None,
+    onpage: dict,
+    performance: dict,
+    llm_raw: dict,
+    **extra,
+) -> str:
+    """Persist one analysis and return its id."""
+    analysis_id = uuid.uuid4().hex
+    snapshot = {
+        "id": analysis_id,
+        "url": url,
+        "created_at": time.time(),
+        "request": request,
+        "html": html,
+        "onpage": onpage,
+        "performance": performance,
+        "llm_raw": llm_raw,
+        **extra,
+    }
+    payload = json.dumps(snapshot, default=str).encode("utf-8")
+    _atomic_write(snapshot_path(analysis_id), gzip.compress(payload, compresslevel=6))
+    _atomic_write(_root() / "by_url" / _url_key(url), analysis_id.encode("ascii"))
+    return analysis_id
+
+
+def save_result(analysis_id: str, body: bytes) -> str:
+    """Store the serialized response for an analysis; returns its ETag."""
+    etag = result_etag(body)
+    _atomic_write(_result_path(analysis_id, ".response.gz"), gzip.compress(body, compresslevel=6, mtime=0))
+    _atomic_write(_result_path(analysis_id, ".etag"), etag.encode("ascii"))
+    return etag
+
+
+# ---------------------------------------------------------
+#  READ
+# ---------------------------------------------------------
+def load_snapshot(analysis_id: str) -> dict | None:
+    if not is_valid_id(analysis_id):
+        return None
+    path = snapshot_path(analysis_id)
+    if not path.exists():
+        return None
+    with gzip.open(path, "rb") as f:
+        return json.loads(f.read())
+
+
+def load_result_etag(analysis_id: str) -> str | None:
+    path = _result_path(analysis_id, ".etag")
+    return path.read_text().strip() if path.exists() else None
+
+
+def load_result(analysis_id: str, compressed: bool = False) -> bytes | None:
+    """Stored response body (gzip bytes if compressed=True)."""
+    path = _result_path(analysis_id, ".response.gz")
+    if not path.exists():
+        return None
+    data = path.read_bytes()
+    return data if compressed else gzip.decompress(data)
+
+
+def ensure_result(analysis_id: str) -> str | None:
+    """
+    ETag of the stored response, materializing the response file from the
+    snapshot for analyses saved before results were stored separately.
+    """
+    etag = load_result_etag(analysis_id)
+    if etag:
+        return etag
+    snap = load_snapshot(analysis_id)
+    if not snap or not snap.get("response"):
+        return None
+    response = dict(snap["response"], analysis_id=analysis_id)
+    return save_result(analysis_id, orjson.dumps(response))
+
+
+def latest_snapshot_id(url: str) -> str | None:
+    path = _root() / "by_url" / _url_key(url)
+    if not path.exists():
+        return None
+    return path.read_text().strip() or None
+
+
+def latest_snapshot(url: str) -> dict | None:
+    analysis_id = latest_snapshot_id(url)
+    return load_snapshot(analysis_id) if analysis_id else None
+
+
+def iter_snapshot_ids():
+    """Yield every stored analysis id (no decompression)."""
+    root = _root()
+    if not root.exists():
+        return
+    for shard in sorted(root.iterdir()):
+        if not shard.is_dir() or shard.name == "by_url":
+            continue
+        for path in sorted(shard.glob("*.json.gz")):
+            yield path.name[: -len(".json.gz")]
@@ -1,13 +1,19 @@
 # app/services/ux.py
 
-from app.schemas.outputs import UXHeuristicInsights
+from app.services.content_extractor import page_text
+from app.services.records import UXRecord
 
-def compute_ux_score(onpage: dict, performance: dict) -> UXHeuristicInsights:
+def compute_ux_score(onpage: dict, performance: dict) -> UXRecord:
     issues = []
+    # CTAs and trust badges mostly live in headers, footers and sidebars,
+    # which the main-content extraction drops: scan the whole page for
+    # those, and judge length on the main text only
+    page = (onpage.get("content_text") or page_text(onpage)).lower()
+    text = page_text(onpage)
 
     # CTA detection - naive text scan
     cta_present = any(
-        kw in (onpage.get("content_text", "").lower())
+        kw in page
         for kw in ["contact", "buy", "book", "call", "enquire", "get started"]
     )
 
@@ -17,7 +23,7 @@ def compute_ux_score(onpage: dict, performance: dict) -> UXHeuristicInsights:
     # Trust signal detection
     trust_keywords = ["testimonials", "reviews", "certified", "awards", "case study"]
     trust_present = any(
-        kw in (onpage.get("content_text", "").lower())
+        kw in page
         for kw in trust_keywords
     )
 
@@ -25,7 +31,7 @@ def compute_ux_score(onpage: dict, performance: dict) -> UXHeuristicInsights:
         issues.append("Missing trust signals (reviews, testimonials, certifications).")
 
     readability_ok = True
-    if len(onpage.get("content_text", "")) < 300:
+    if len(text) < 300:
         readability_ok = False
         issues.append("Content too short — may not satisfy user intent.")
 
@@ -39,7 +45,7 @@ def compute_ux_score(onpage: dict, performance: dict) -> UXHeuristicInsights:
     if not readability_ok: ux_score -= 10
     if not mobile_friendly: ux_score -= 10
 
-    return UXHeuristicInsights(
+    return UXRecord(
         ux_score=max(0, ux_score),
         cta_present=cta_present,
         trust_signals_present=trust_present,
@@ -0,0 +1,53 @@
+# app/services/warmup.py
+"""
+Optional warm start.
+
+Service modules import their heavy dependencies (openai, reportlab,
+bs4/lxml, httpx, numpy) on first use so cold start stays fast. With
+WARM_START=true the app pays that cost once at startup instead of on
+the first request.
+"""
+
+import importlib
+import time
+
+from app.core.config import settings
+
+PRELOAD_MODULES = [
+    "httpx",
+    "bs4",
+    "lxml.etree",
+    "numpy",
+    "reportlab.platypus",
+    "openai",
+]
+
+
+def preload() -> dict:
+    """Import heavy modules and build shared clients. Returns timings in ms."""
+    timings = {}
+    for name in PRELOAD_MODULES:
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            print(f"Warm start: {name} unavailable ({e})")
+            continue
+        timings[name] = round((time.perf_counter() - started) * 1000, 1)
+
+    started = time.perf_counter()
+    if settings.OPENAI_API_KEY:
+        from app.services.llm import get_client
+        get_client()
+    from app.services.fetch_strategy import get_strategy_table
+    from app.services.proxy_pool import get_proxy_pool
+    get_strategy_table()
+    get_proxy_pool()
+    timings["clients"] = round((time.perf_counter() - started) * 1000, 1)
+
+    # tiktoken may download its BPE file on first use: do it now, not mid-request
+    started = time.perf_counter()
+    from app.services.prompt_builder import count_tokens
+    count_tokens("warm start")
+    timings["tokenizer"] = round((time.perf_counter() - started) * 1000, 1)
+    return timings
@@ -0,0 +1,82 @@
+# benchmarks/bench_history.py
+"""
+Score history write throughput.
+
+Two measurements into a fresh SQLite file:
+
+  write   ScoreHistory.write() in batches of --batch points (the writer
+          thread's transaction size), rollups included
+  queued  add() from the caller's side, then flush(): what a batch run
+          sees end to end, writer thread and URL normalisation included
+
+Points are spread over --urls URLs and a month of timestamps, half of
+them with penalty notes. Reports points per minute.
+Run from the repo root:
+
+    python benchmarks/bench_history.py [--points 200000] [--urls 5000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.score_history import DAY, VALUE_COLUMNS, ScoreHistory  # noqa: E402
+
+
+def synthetic_points(n: int, urls: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    start = time.time() - 30 * DAY
+    points = []
+    for i in range(n):
+        values = {c: round(rng.uniform(0, 100), 1) for c in VALUE_COLUMNS}
+        if i % 2:
+            values["notes"] = ["Missing meta description", "Low alt-text coverage"]
+        url = f"https://example.com/page/{rng.randrange(urls)}"
+        points.append((url, start + i * (30 * DAY / n), None, "bench", False, values))
+    return points
+
+
+def run_write(points: list, batch: int) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        history = ScoreHistory(os.path.join(tmp, "history.sqlite3"))
+        started = time.perf_counter()
+        for i in range(0, len(points), batch):
+            history.write(points[i:i + batch])
+        return time.perf_counter() - started
+
+
+def run_queued(points: list, batch: int) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        history = ScoreHistory(os.path.join(tmp, "history.sqlite3"), batch_size=batch, queue_size=len(points))
+        started = time.perf_counter()
+        for url, ts, analysis_id, source, partial, values in points:
+            history.add(url, values, ts=ts, source=source)
+        history.flush()
+        elapsed = time.perf_counter() - started
+        history.close()
+        return elapsed
+
+
+def report(name: str, n: int, elapsed: float):
+    print(f"{name:7} {n} points in {elapsed:6.2f}s  {n / elapsed * 60:12,.0f} points/min")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=200000)
+    parser.add_argument("--urls", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    points = synthetic_points(args.points, args.urls)
+    report("write", args.points, run_write(points, args.batch))
+    report("queued", args.points, run_queued(points, args.batch))
+
+
+if __name__ == "__main__":
+    main()
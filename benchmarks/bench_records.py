@@ -0,0 +1,155 @@
+# benchmarks/bench_records.py
+"""
+Slotted pipeline records vs Pydantic models / dicts at every hop.
+
+Two measurements over synthetic pages:
+
+  stages   penalties / UX / weighted / benchmark stages of analyze(),
+           returning slotted records vs building a Pydantic model per stage
+  rescore  offline rescore rows: RescoredRecord built column-wise vs the
+           per-row dicts produced by batch_scoring.rescore_records()
+
+Reports CPU time per page and bytes retained per page (tracemalloc).
+Run from the repo root:
+
+    python benchmarks/bench_records.py [--pages 20000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.batch_scoring import rescore_records  # noqa: E402
+from app.services.benchmarks_v2 import compute_benchmark_deltas  # noqa: E402
+from app.services.penalties import compute_penalties  # noqa: E402
+from app.services.rescore import RESULT_FIELDS, score_rows  # noqa: E402
+from app.services.score_engine import compute_weighted_score  # noqa: E402
+from app.services.ux import compute_ux_score  # noqa: E402
+
+WORDS = "contact buy reviews certified pricing features support online service quality".split()
+
+
+def synthetic_records(n: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    records = []
+    for i in range(n):
+        text = " ".join(rng.choices(WORDS, k=rng.randint(10, 120)))
+        records.append({
+            "id": f"{i:032x}",
+            "url": f"https://example.com/page/{i}",
+            "onpage": {
+                "title": "Title " * rng.randint(0, 12),
+                "meta_description": "Meta " * rng.randint(0, 40),
+                "h1": rng.choice([None, "Heading"]),
+                "schema_present": rng.random() < 0.5,
+                "images_with_alt_ratio": rng.choice([None, rng.random()]),
+                "content_text": text,
+            },
+            "performance": {
+                "performance_score": rng.randint(20, 100),
+                "core_web_vitals": rng.choice([{}, {"lcp": 2.1}]),
+                "mobile_friendly": rng.random() < 0.7,
+            },
+            "llm_raw": {
+                "intent_coverage": rng.randint(0, 100),
+                "expertise_score": rng.randint(0, 100),
+                "readability_grade": rng.choice(["A", "B", "C", "D", None]),
+            },
+            "industry": rng.choice(["electronics", "healthcare", "finance", ""]),
+            "location": "",
+        })
+    return records
+
+
+def measure(fn):
+    """(seconds, bytes retained by the result) for one call of fn()."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, retained
+
+
+# ---------------------------------------------------------
+#  STAGES (analyze steps 13–16)
+# ---------------------------------------------------------
+def _stage_records(records: list, to_models: bool) -> list:
+    out = []
+    for r in records:
+        scores = {
+            "seo_score": 60,
+            "technical_score": r["performance"]["performance_score"],
+            "content_score": r["llm_raw"]["intent_coverage"],
+            "aeo_score": 55,
+        }
+        ux = compute_ux_score(r["onpage"], r["performance"])
+        penalties = compute_penalties(r["onpage"], r["performance"], r["llm_raw"])
+        weighted = compute_weighted_score(scores, penalties, ux)
+        bench = compute_benchmark_deltas(scores, r["industry"])
+        stages = (ux, penalties, weighted, bench)
+        if to_models:
+            # Previous behaviour: every stage materialised a validated model
+            stages = tuple(s.to_model() for s in stages)
+        out.append(stages)
+    return out
+
+
+# ---------------------------------------------------------
+#  RESCORE ROWS
+# ---------------------------------------------------------
+def _legacy_rows(records: list) -> list:
+    rows = []
+    for record, scored in zip(records, rescore_records(records)):
+        out = {"id": record["id"], "url": record["url"]}
+        out.update({k: scored[k] for k in RESULT_FIELDS})
+        out["penalties"] = scored["penalty_notes"]
+        rows.append(out)
+    return rows
+
+
+def report(name: str, n: int, old: tuple, new: tuple):
+    (old_t, old_b), (new_t, new_b) = old, new
+    print(
+        f"{name:8} old {old_t / n * 1e6:7.1f} us/page {old_b / n:8.0f} B/page | "
+        f"new {new_t / n * 1e6:7.1f} us/page {new_b / n:8.0f} B/page | "
+        f"cpu x{old_t / new_t:.2f} mem x{old_b / new_b:.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=20000)
+    args = parser.parse_args()
+
+    records = synthetic_records(args.pages)
+    rescore_records(records[:10])  # warm numpy
+
+    # Same numbers either way
+    new_rows = score_rows(records)
+    assert [r.to_dict() for r in new_rows] == _legacy_rows(records)
+    del new_rows
+
+    report(
+        "stages",
+        args.pages,
+        measure(lambda: _stage_records(records, to_models=True)),
+        measure(lambda: _stage_records(records, to_models=False)),
+    )
+    report(
+        "rescore",
+        args.pages,
+        measure(lambda: _legacy_rows(records)),
+        measure(lambda: score_rows(records)),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# benchmarks/bench_startup.py
+"""
+Cold-start benchmark for the FastAPI app.
+
+Imports app.main in fresh interpreters and reports wall time, plus the
+slowest imports from `python -X importtime`. Run from the repo root:
+
+    python benchmarks/bench_startup.py [--runs 10] [--warm]
+
+--warm also times app.services.warmup.preload(), i.e. what WARM_START=true
+adds to startup.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+WARM_SNIPPET = (
+    "import time; import app.main; from app.services.warmup import preload; "
+    "t = time.perf_counter(); preload(); print(time.perf_counter() - t)"
+)
+
+
+def run_python(snippet: str, *flags) -> subprocess.CompletedProcess:
+    # Any non-empty PYTHONDONTWRITEBYTECODE (even "0") disables .pyc writes,
+    # which would time a cold compile on every run
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return subprocess.run(
+        [sys.executable, *flags, "-c", snippet],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+
+
+def time_runs(snippet: str, runs: int) -> list:
+    samples = []
+    for _ in range(runs):
+        proc = run_python(snippet)
+        if proc.returncode != 0:
+            raise SystemExit(proc.stderr)
+        samples.append(float(proc.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def slowest_imports(top: int = 15) -> list:
+    proc = run_python("import app.main", "-X", "importtime")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def fmt(samples: list) -> str:
+    return (
+        f"min {min(samples) * 1000:.0f} ms | median {statistics.median(samples) * 1000:.0f} ms"
+        f" | max {max(samples) * 1000:.0f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--warm", action="store_true")
+    args = parser.parse_args()
+
+    print(f"import app.main ({args.runs} cold runs): {fmt(time_runs(IMPORT_SNIPPET, args.runs))}")
+    if args.warm:
+        print(f"warmup.preload() ({args.runs} runs):   {fmt(time_runs(WARM_SNIPPET, args.runs))}")
+
+    print("\nSlowest imports (cumulative / self, ms):")
+    for cumulative, self_us, name in slowest_imports():
+        print(f"  {cumulative / 1000:8.1f} {self_us / 1000:8.1f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
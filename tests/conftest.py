@@ -0,0 +1,74 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+
+class FakeServer:
+    """
+    Local stand-in for an external HTTP API. `respond(path, query)` returns
+    (status, body) or (status, body, headers): bytes / str are sent as-is,
+    anything else as JSON. Every request is kept in `requests`.
+    """
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.requests: list = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                server.requests.append((parsed.path, query))
+                status, body, *headers = server.respond(parsed.path, query)
+                if isinstance(body, (bytes, str)):
+                    payload = body.encode() if isinstance(body, str) else body
+                    content_type = "text/html" if isinstance(body, str) else "application/octet-stream"
+                else:
+                    payload = json.dumps(body).encode()
+                    content_type = "application/json"
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers[0] if headers else {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def fake_server():
+    servers = []
+
+    def start(respond) -> FakeServer:
+        server = FakeServer(respond)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path, monkeypatch):
+    from app.core.config import settings
+
+    path = tmp_path / "snapshots"
+    monkeypatch.setattr(settings, "SNAPSHOT_DIR", str(path))
+    return path
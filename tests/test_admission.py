@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+from app.core.admission import AdmissionController, AdmissionRejected, resolve_caller
+from app.core.config import settings
+
+
+def controller(**kwargs) -> AdmissionController:
+    options = dict(
+        max_concurrent=1,
+        class_limits={"interactive": 1, "bulk": 1, "scheduled": 1},
+        max_queue={"interactive": 10, "bulk": 10, "scheduled": 10},
+        queue_timeout=5,
+    )
+    options.update(kwargs)
+    return AdmissionController(**options)
+
+
+async def admit_order(ctrl: AdmissionController, requests: list) -> list:
+    """Hold the only slot, queue `requests` (tenant, class), release, and return admission order."""
+    order = []
+    gate = asyncio.Event()
+
+    async def blocker():
+        async with ctrl.slot("blocker", "interactive"):
+            await gate.wait()
+
+    async def one(tenant, cls):
+        async with ctrl.slot(tenant, cls):
+            order.append(tenant)
+
+    held = asyncio.create_task(blocker())
+    await asyncio.sleep(0)
+    tasks = []
+    for tenant, cls in requests:
+        tasks.append(asyncio.create_task(one(tenant, cls)))
+        await asyncio.sleep(0)
+    gate.set()
+    await asyncio.gather(held, *tasks)
+    return order
+
+
+def test_higher_class_admitted_first():
+    order = asyncio.run(admit_order(controller(), [("a", "scheduled"), ("b", "bulk"), ("c", "interactive")]))
+    assert order == ["c", "b", "a"]
+
+
+def test_tenants_take_turns():
+    requests = [("big", "bulk")] * 4 + [("small", "bulk")]
+    order = asyncio.run(admit_order(controller(), requests))
+    assert order.index("small") <= 1
+
+
+async def with_anchor(ctrl: AdmissionController, body):
+    """Run `body()` while another tenant holds a bulk slot, so the class never goes idle."""
+    gate = asyncio.Event()
+
+    async def anchor():
+        async with ctrl.slot("anchor", "bulk"):
+            await gate.wait()
+
+    held = asyncio.create_task(anchor())
+    await asyncio.sleep(0)
+    try:
+        return await body()
+    finally:
+        gate.set()
+        await held
+
+
+def test_fast_path_does_not_penalize_earlier_tenant():
+    ctrl = controller(max_concurrent=2, class_limits={"interactive": 2, "bulk": 2, "scheduled": 1})
+
+    async def body():
+        # "busy" runs 20 requests while nothing else waits
+        for _ in range(20):
+            async with ctrl.slot("busy", "bulk"):
+                pass
+        return await admit_order(ctrl, [("newcomer", "bulk"), ("busy", "bulk"), ("newcomer", "bulk")])
+
+    order = asyncio.run(with_anchor(ctrl, body))
+    # Fair: busy gets the second turn, not the last
+    assert order == ["newcomer", "busy", "newcomer"]
+
+
+def test_idle_tenants_are_forgotten():
+    ctrl = controller(max_concurrent=2, class_limits={"interactive": 2, "bulk": 2, "scheduled": 1})
+
+    async def body():
+        for i in range(3000):
+            async with ctrl.slot(f"10.0.{i // 256}.{i % 256}", "bulk"):
+                pass
+        return len(ctrl.last_finish["bulk"])
+
+    assert asyncio.run(with_anchor(ctrl, body)) <= 1025
+    # Once the class is idle nothing is remembered
+    assert ctrl.last_finish["bulk"] == {}
+
+
+def test_queue_full_rejects_with_retry_after():
+    async def main():
+        ctrl = controller(max_queue={"interactive": 0, "bulk": 0, "scheduled": 0})
+        async with ctrl.slot("a", "bulk"):
+            with pytest.raises(AdmissionRejected) as exc:
+                await ctrl.acquire("b", "bulk")
+        return exc.value
+
+    rejected = asyncio.run(main())
+    assert rejected.reason == "queue_full"
+    assert rejected.retry_after >= 1
+
+
+def test_queue_timeout_rejects_and_frees_the_place():
+    async def main():
+        ctrl = controller(queue_timeout=0.05)
+        async with ctrl.slot("a", "bulk"):
+            with pytest.raises(AdmissionRejected) as exc:
+                await ctrl.acquire("b", "bulk")
+        return ctrl, exc.value
+
+    ctrl, rejected = asyncio.run(main())
+    assert rejected.reason == "queue_timeout"
+    assert ctrl.snapshot()["bulk"] == {"running": 0, "queued": 0, "limit": 1}
+
+
+def test_untrusted_callers_cannot_raise_class_or_pick_tenant(monkeypatch):
+    monkeypatch.setattr(settings, "ADMISSION_TRUSTED_PROXIES", ["10.0.0.1"])
+    assert resolve_caller("1.2.3.4", "interactive", "acme", default_class="bulk") == ("bulk", "1.2.3.4")
+    assert resolve_caller("1.2.3.4", "scheduled", "acme", default_class="bulk") == ("scheduled", "1.2.3.4")
+    assert resolve_caller("1.2.3.4", None, None) == ("interactive", "1.2.3.4")
+    assert resolve_caller("10.0.0.1", "interactive", "acme", default_class="bulk") == ("interactive", "acme")
+    with pytest.raises(ValueError):
+        resolve_caller("1.2.3.4", "urgent", None)
@@ -0,0 +1,160 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.core.cache import (
+    Cache,
+    CacheBackend,
+    DiskBackend,
+    MemoryBackend,
+    RedisBackend,
+    decode,
+    encode,
+    make_key,
+)
+
+
+class BrokenBackend(CacheBackend):
+    name = "broken"
+
+    def get(self, key):
+        raise ConnectionError("down")
+
+    def set(self, key, payload, ttl=None):
+        raise ConnectionError("down")
+
+    def delete(self, key):
+        raise ConnectionError("down")
+
+
+def test_codec_round_trip():
+    value = {"title": "Acme", "scores": [1, 2.5, None], "pdf": b"%PDF-1.4", "nested": {"ok": True}}
+    payload = encode(value)
+    assert isinstance(payload, bytes)
+    assert decode(payload) == value
+
+
+def test_make_key_is_stable():
+    assert make_key("f", (1, "a"), {"x": 2}) == make_key("f", (1, "a"), {"x": 2})
+    assert make_key("f", (1,), {}) != make_key("f", (2,), {})
+
+
+def test_memory_ttl_and_lru():
+    backend = MemoryBackend(max_items=2)
+    backend.set("a", b"1", ttl=0.01)
+    backend.set("b", b"2")
+    time.sleep(0.02)
+    assert backend.get("a") is None
+    backend.set("c", b"3")
+    backend.get("b")
+    backend.set("d", b"4")
+    assert backend.get("b") == b"2"
+    assert backend.get("c") is None
+
+
+def test_memory_byte_budget():
+    backend = MemoryBackend(max_items=100, max_bytes=10)
+    backend.set("a", b"12345")
+    backend.set("b", b"12345")
+    backend.set("c", b"12345")
+    assert backend.get("a") is None
+    assert backend.bytes == 10
+    backend.set("huge", b"x" * 11)
+    assert backend.get("huge") is None
+    backend.set("b", b"1")
+    assert backend.bytes == 6
+
+
+def test_disk_ttl(tmp_path):
+    backend = DiskBackend(str(tmp_path), sweep_secs=3600)
+    backend.set("k", b"payload", ttl=0.01)
+    backend.set("forever", b"payload")
+    assert backend.get("k") == b"payload"
+    time.sleep(0.02)
+    assert backend.get("k") is None
+    assert backend.get("forever") == b"payload"
+
+
+def test_disk_sweep_removes_expired_and_oldest(tmp_path):
+    backend = DiskBackend(str(tmp_path), max_bytes=3000, sweep_secs=3600)
+    backend.set("expired", b"x" * 100, ttl=0.01)
+    for i in range(5):
+        backend.set(f"k{i}", b"x" * 1000)
+        path = backend._path(f"k{i}")
+        os.utime(path, (time.time() - 100 + i, time.time() - 100 + i))
+    time.sleep(0.02)
+
+    removed = backend.sweep()
+    assert removed == 1 + 3
+    assert not backend._path("expired").exists()
+    assert backend.get("k0") is None
+    assert backend.get("k4") == b"x" * 1000
+
+
+def test_redis_backend_with_fakeredis():
+    fakeredis = pytest.importorskip("fakeredis")
+    backend = RedisBackend(client=fakeredis.FakeRedis(), prefix="test:")
+    backend.set("k", encode({"a": 1}), ttl=60)
+    assert decode(backend.get("k")) == {"a": 1}
+    assert 0 < backend.client.ttl("test:k") <= 60
+    backend.delete("k")
+    assert backend.get("k") is None
+
+
+def test_l2_hit_fills_l1():
+    l2 = MemoryBackend()
+    writer = Cache("ns", ttl=60, l1=MemoryBackend(), l2=l2)
+    reader = Cache("ns", ttl=60, l1=MemoryBackend(), l2=l2)
+    writer.set("k", {"v": 1})
+    assert reader.l1.get("ns:k") is None
+    assert reader.get("k") == {"v": 1}
+    assert reader.l1.get("ns:k") == {"v": 1}
+
+
+def test_broken_l2_is_a_miss():
+    c = Cache("ns", l1=MemoryBackend(), l2=BrokenBackend())
+    c.set("k", "v")  # logged, not raised
+    c.l1.clear()
+    assert c.get("k", "default") == "default"
+
+
+def test_memoize_skips_empty_results():
+    c = Cache("ns", l1=MemoryBackend(), l2=MemoryBackend())
+    calls = []
+
+    @c.memoize(key=lambda q: q)
+    def lookup(q):
+        calls.append(q)
+        return [] if q == "none" else [q]
+
+    assert lookup("a") == ["a"]
+    assert lookup("a") == ["a"]
+    lookup("none")
+    lookup("none")
+    assert calls == ["a", "none", "none"]
+
+
+def test_memoize_async():
+    c = Cache("ns", l1=MemoryBackend(), l2=MemoryBackend())
+    calls = []
+
+    @c.memoize(key=lambda url: url)
+    async def fetch(url):
+        calls.append(url)
+        return {"url": url}
+
+    async def main():
+        return [await fetch("u"), await fetch("u")]
+
+    assert asyncio.run(main()) == [{"url": "u"}, {"url": "u"}]
+    assert calls == ["u"]
+
+
+def test_pdfs_have_their_own_bounded_l1():
+    from app.core.cache import cache
+    from app.services.pdf_renderer import PDF_CACHE
+
+    assert PDF_CACHE.l1 is not cache("serp").l1
+    assert PDF_CACHE.l1.max_bytes is not None
@@ -0,0 +1,209 @@
+import asyncio
+import uuid
+import zlib
+
+import orjson
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.api.analyze import router as analyze_router
+from app.core import compression
+from app.core.compression import CompressionMiddleware, choose_encoding
+from app.core.responses import etag_matches
+from app.services.snapshots import save_result
+
+BIG = {"items": [{"id": i, "text": "hello world " * 4} for i in range(100)]}
+LINES = [orjson.dumps({"line": i}) + b"\n" for i in range(3)]
+
+app = FastAPI()
+app.include_router(analyze_router)
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+
+@app.get("/big")
+def big():
+    return ORJSONResponse(BIG)
+
+
+@app.get("/small")
+def small():
+    return ORJSONResponse({"ok": True})
+
+
+@app.get("/pdf")
+def pdf():
+    return Response(b"%PDF-1.4 " + b"0" * 4096, media_type="application/pdf")
+
+
+@app.get("/stream")
+def stream():
+    return StreamingResponse(iter(LINES), media_type="application/x-ndjson")
+
+
+client = TestClient(app)
+
+
+def get(path: str, accept: str, **headers):
+    return client.get(path, headers={"Accept-Encoding": accept, **headers})
+
+
+# ---------------------------------------------------------
+#  NEGOTIATION
+# ---------------------------------------------------------
+@pytest.mark.parametrize("accept, expected", [
+    ("gzip", "gzip"),
+    ("gzip;q=0.5, identity", "gzip"),
+    ("gzip;q=0", None),
+    ("GZIP ; q=0.0", None),
+    ("deflate", None),
+    ("gzip;q=nope", None),
+    ("", None),
+])
+def test_choose_encoding_honours_q_values(accept, expected):
+    assert choose_encoding(accept) == expected
+
+
+def test_brotli_preferred_when_installed(monkeypatch):
+    if compression.brotli is None:
+        assert choose_encoding("br, gzip") == "gzip"
+    monkeypatch.setattr(compression, "brotli", object())
+    assert choose_encoding("br, gzip") == "br"
+    assert choose_encoding("br;q=0, gzip") == "gzip"
+    monkeypatch.setattr(compression, "brotli", None)
+    assert choose_encoding("br") is None
+
+
+def test_large_json_is_gzipped():
+    resp = get("/big", "gzip")
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.headers["vary"] == "Accept-Encoding"
+    assert int(resp.headers["content-length"]) < len(orjson.dumps(BIG))
+    assert resp.json() == BIG
+
+
+def test_brotli_round_trip():
+    pytest.importorskip("brotli")
+    resp = get("/big", "br")
+    assert resp.headers["content-encoding"] == "br"
+    assert resp.json() == BIG
+
+
+@pytest.mark.parametrize("path, accept", [
+    ("/big", "gzip;q=0"),
+    ("/big", "identity"),
+    ("/small", "gzip"),
+    ("/pdf", "gzip"),
+])
+def test_passes_through_uncompressed(path, accept):
+    resp = get(path, accept)
+    assert "content-encoding" not in resp.headers
+    assert resp.status_code == 200
+
+
+# ---------------------------------------------------------
+#  STREAMS
+# ---------------------------------------------------------
+async def ndjson_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200,
+                "headers": [(b"content-type", b"application/x-ndjson")]})
+    for line in LINES:
+        await send({"type": "http.response.body", "body": line, "more_body": True})
+    await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def asgi_messages(asgi_app, accept: bytes) -> list:
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/stream", "headers": [(b"accept-encoding", accept)]}
+    asyncio.run(asgi_app(scope, receive, send))
+    return messages
+
+
+def test_streamed_ndjson_is_compressed_whatever_its_size():
+    resp = get("/stream", "gzip")
+    assert resp.headers["content-encoding"] == "gzip"
+    assert "content-length" not in resp.headers
+    assert resp.content == b"".join(LINES)
+
+
+def test_streamed_ndjson_chunks_are_flushed():
+    messages = asgi_messages(CompressionMiddleware(ndjson_app, minimum_size=1024), b"gzip")
+    start, *bodies = messages
+    headers = dict(start["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert b"content-length" not in headers
+
+    # Each line decodes from its own chunk, before the stream ends
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    assert [decoder.decompress(m["body"]) for m in bodies[:len(LINES)]] == LINES
+    assert decoder.decompress(bodies[-1]["body"]) == b""
+    assert decoder.eof
+    assert bodies[-1]["more_body"] is False
+
+
+# ---------------------------------------------------------
+#  STORED RESULTS + ETAGS
+# ---------------------------------------------------------
+@pytest.fixture
+def stored(snapshot_dir):
+    analysis_id = uuid.uuid4().hex
+    body = orjson.dumps({**BIG, "analysis_id": analysis_id, "debug": {"budget_ms": 1}})
+    etag = save_result(analysis_id, body)
+    return analysis_id, body, etag
+
+
+def test_stored_gzip_result_is_not_compressed_twice(stored):
+    analysis_id, body, etag = stored
+    resp = get(f"/api/analyze/{analysis_id}", "gzip")
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.headers["etag"] == etag
+    assert resp.content == body
+    assert resp.json()["analysis_id"] == analysis_id
+
+
+def test_stored_result_without_debug_is_compressed_by_the_middleware(stored):
+    analysis_id, _, _ = stored
+    resp = get(f"/api/analyze/{analysis_id}?debug=false", "gzip")
+    assert resp.headers["content-encoding"] == "gzip"
+    assert "debug" not in resp.json()
+
+
+def test_matching_etag_gets_304(stored):
+    analysis_id, _, etag = stored
+    resp = get(f"/api/analyze/{analysis_id}", "gzip", **{"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.content == b""
+    assert resp.headers["etag"] == etag
+
+
+def test_nodebug_variant_has_its_own_etag(stored):
+    analysis_id, _, etag = stored
+    url = f"/api/analyze/{analysis_id}?debug=false"
+    nodebug = get(url, "gzip").headers["etag"]
+    assert nodebug == etag[:-1] + '-nodebug"'
+
+    assert get(url, "gzip", **{"If-None-Match": nodebug}).status_code == 304
+    assert get(url, "gzip", **{"If-None-Match": etag}).status_code == 200
+    assert get(f"/api/analyze/{analysis_id}", "gzip", **{"If-None-Match": nodebug}).status_code == 200
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ("", False),
+    ("*", True),
+    ('W/"abc"', True),
+    ('"abc"', True),
+    ('"xyz", W/"abc"', True),
+    ('"abcd"', False),
+])
+def test_etag_matches_is_a_weak_comparison(header, expected):
+    assert etag_matches(header, 'W/"abc"') is expected
+
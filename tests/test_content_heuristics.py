@@ -0,0 +1,77 @@
+import pytest
+
+from app.api.analyze import prepare_onpage
+from app.schemas.llm import SCORE_FIELDS, ContentAnalysis
+from app.services.content_heuristics import analyze_content_local, is_heuristic, readability
+from app.services.incremental import plan_incremental
+
+RICH_HTML = """
+<html><head><title>Acme Running Shoes | Pricing, FAQ and Reviews</title>
+<meta name="description" content="Lightweight running shoes, tested by 1,200 runners.">
+<script type="application/ld+json">{"@type": "Product"}</script></head>
+<body>
+<h1>Acme Running Shoes</h1>
+<p>Our running shoes are tested by certified coaches and rated 4.8 by 1,200 customers since 2012.</p>
+<h2>Pricing</h2><p>Plans start at $89 per pair, with a 2 year warranty.</p>
+<h2>How it works</h2><p>Pick a size, try them for 30 days, return them for free.</p>
+<h2>Acme vs other running shoes</h2><p>Compared with the alternatives, they weigh 20% less.</p>
+<h2>Why do runners choose Acme?</h2><p>Research with 3 clinical studies shows fewer injuries.</p>
+<h2>FAQ</h2><p>Q: Do they fit wide feet? A: Yes, every model comes in wide.</p>
+<h2>Contact</h2><p>Email us at help@acme.example or call +1 555 010 0199.</p>
+</body></html>
+"""
+
+THIN_HTML = "<html><head><title>Home</title></head><body><p>Welcome.</p></body></html>"
+
+CONTEXT = {"company": "Acme", "product": "running shoes", "industry": "retail", "location": ""}
+
+
+def analyze(html: str, **context) -> dict:
+    return analyze_content_local(prepare_onpage(html), **context)
+
+
+@pytest.mark.parametrize("html, context", [
+    (RICH_HTML, CONTEXT),
+    (THIN_HTML, CONTEXT),
+    (THIN_HTML, {}),
+    ("<html></html>", {}),
+])
+def test_result_has_the_content_analysis_shape(html, context):
+    result = analyze(html, **context)
+    assert set(result) == set(ContentAnalysis.model_fields) | {"engine"}
+    assert ContentAnalysis.model_validate(result).model_dump() == {
+        k: v for k, v in result.items() if k != "engine"
+    }
+    assert result["engine"] == "heuristic"
+    for field in SCORE_FIELDS:
+        assert isinstance(result[field], int)
+        assert 0 <= result[field] <= 100, field
+
+
+def test_rich_page_outscores_thin_page():
+    rich, thin = analyze(RICH_HTML, **CONTEXT), analyze(THIN_HTML, **CONTEXT)
+    assert rich["missing_sections"] == []
+    assert thin["missing_sections"] == ["FAQ", "Pricing", "Process", "Comparisons", "Contact"]
+    for field in SCORE_FIELDS:
+        assert rich[field] > thin[field], field
+
+
+def test_short_text_gets_the_neutral_grade():
+    assert readability("Welcome.")["grade"] == "B1"
+    assert analyze(THIN_HTML)["readability_grade"] == "B1"
+
+
+def test_is_heuristic():
+    assert is_heuristic(analyze(THIN_HTML))
+    assert not is_heuristic({"intent_coverage": 80, "content_score": 70})
+    assert not is_heuristic(None)
+
+
+def test_heuristic_result_is_not_reused_by_incremental_runs():
+    onpage = prepare_onpage(RICH_HTML)
+    request = {"url": "https://acme.example/", "company_name": "Acme"}
+    prev = {"id": "prev", "request": request, "onpage": onpage, "llm_raw": analyze(RICH_HTML)}
+    assert not plan_incremental(prev, dict(onpage), request)["reuse_llm"]
+
+    prev["llm_raw"] = {k: v for k, v in prev["llm_raw"].items() if k != "engine"}
+    assert plan_incremental(prev, dict(onpage), request)["reuse_llm"]
@@ -0,0 +1,127 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.core.deadline import Deadline
+from app.services import crawler
+from app.services.fetch_strategy import StrategyTable
+from app.services.proxy_pool import ProxyPool
+
+ORDER = ["http", "googlebot", "mobile", "playwright", "proxy"]
+
+
+@pytest.fixture
+def table(tmp_path):
+    return StrategyTable(str(tmp_path / "strategies.json"), half_life=3600, save_interval=0)
+
+
+def test_unknown_host_gets_default_order(table):
+    assert table.order("example.com", ORDER) == ORDER
+
+
+def test_last_success_goes_first(table):
+    table.record("example.com", "playwright", True, 3.0)
+    assert table.order("example.com", ORDER)[0] == "playwright"
+
+
+def test_failing_strategy_is_skipped(table):
+    for _ in range(3):
+        table.record("example.com", "http", False, 1.0)
+    assert "http" not in table.order("example.com", ORDER)
+
+
+def test_all_doomed_falls_back_to_full_order(table):
+    for _ in range(3):
+        for name in ORDER:
+            table.record("example.com", name, False, 1.0)
+    assert table.order("example.com", ORDER) == ORDER
+    assert table.order("example.com", ["playwright"]) == ["playwright"]
+
+
+def test_old_failures_are_forgiven(tmp_path):
+    table = StrategyTable(str(tmp_path / "strategies.json"), half_life=0.01, save_interval=0)
+    for _ in range(3):
+        table.record("example.com", "http", False, 1.0)
+    table._hosts["example.com"]["strategies"]["http"]["updated"] -= 10
+    assert table.order("example.com", ORDER) == ORDER
+
+
+def test_table_persists(tmp_path):
+    path = str(tmp_path / "strategies.json")
+    table = StrategyTable(path, half_life=3600, save_interval=0)
+    table.record("example.com", "mobile", True, 2.0)
+    table.save(force=True)
+    reloaded = StrategyTable(path, half_life=3600)
+    assert reloaded.stats("example.com")["example.com"]["last_success"] == "mobile"
+
+
+def test_record_saves_in_the_background_at_most_once_per_interval(tmp_path, monkeypatch):
+    path = tmp_path / "strategies.json"
+    table = StrategyTable(str(path), half_life=3600, save_interval=60)
+    writers = []
+    real_save = table.save
+
+    def save(force=False):
+        writers.append(threading.current_thread())
+        real_save(force)
+
+    monkeypatch.setattr(table, "save", save)
+    for _ in range(5):
+        table.record("example.com", "http", True, 1.0)
+    for thread in threading.enumerate():
+        if thread.name == "strategy-table-save":
+            thread.join()
+    assert len(writers) == 1
+    assert writers[0] is not threading.current_thread()
+    assert path.exists()
+
+def test_fetch_page_never_plans_proxy_without_pool(table, monkeypatch):
+    monkeypatch.setattr(crawler, "get_strategy_table", lambda: table)
+    monkeypatch.setattr(crawler, "get_proxy_pool", lambda: ProxyPool([]))
+    for _ in range(3):
+        for name in ORDER:
+            table.record("example.com", name, False, 1.0)
+
+    tried = []
+
+    async def fake_run_strategy(name, url, timeout, collect_metrics=False):
+        tried.append(name)
+        return ("<html></html>", None) if name == "playwright" else (None, None)
+
+    monkeypatch.setattr(crawler, "run_strategy", fake_run_strategy)
+    page = asyncio.run(
+        crawler.fetch_page("https://example.com/", strategies=crawler.BROWSER_STRATEGIES)
+    )
+    assert tried == ["playwright"]
+    assert page["strategy"] == "playwright"
+
+
+def test_rejected_attempts_are_not_recorded(table, monkeypatch):
+    monkeypatch.setattr(crawler, "get_strategy_table", lambda: table)
+
+    async def rejected(name, url, timeout, collect_metrics=False):
+        raise crawler.FetchNotAttempted("playwright unavailable (circuit open)")
+
+    monkeypatch.setattr(crawler, "run_strategy", rejected)
+    with pytest.raises(Exception):
+        asyncio.run(crawler.fetch_page("https://example.com/", strategies={"playwright"}))
+    assert table.stats("example.com")["example.com"]["strategies"] == {}
+
+
+def test_attempts_cut_short_by_deadline_are_not_recorded(table, monkeypatch):
+    monkeypatch.setattr(crawler, "get_strategy_table", lambda: table)
+
+    async def slow(name, url, timeout, collect_metrics=False):
+        await asyncio.sleep(timeout)
+        return None, None
+
+    monkeypatch.setattr(crawler, "run_strategy", slow)
+
+    async def main():
+        crawler.current_deadline.set(Deadline(100))
+        await crawler.fetch_page("https://example.com/")
+
+    with pytest.raises(Exception):
+        asyncio.run(main())
+    assert table.stats("example.com")["example.com"]["strategies"] == {}
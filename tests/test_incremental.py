@@ -0,0 +1,118 @@
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.incremental import context_changes, diff_onpage, plan_incremental
+
+ONPAGE = {
+    "title": "Acme Widgets",
+    "meta_description": "Hand-made widgets.",
+    "h1": "Acme Widgets",
+    "headings": ["Acme Widgets", "Pricing"],
+    "schema_present": False,
+    "images_with_alt_ratio": 0.5,
+    "content_text": "Menu Acme Widgets Pricing Widgets from $5. Footer",
+    "main_text": "# Acme Widgets\n## Pricing\nWidgets from $5.",
+}
+REQUEST = {"url": "https://acme.example/", "company_name": "Acme", "industry": "retail"}
+LLM = {"intent_coverage": 80, "content_score": 70, "aeo_score": 60}
+
+
+def snapshot(**overrides) -> dict:
+    snap = {
+        "id": "prev",
+        "created_at": time.time(),
+        "request": dict(REQUEST),
+        "onpage": dict(ONPAGE),
+        "performance": {"performance_score": 80, "core_web_vitals": None},
+        "llm_raw": dict(LLM),
+        "competitors": [],
+    }
+    snap.update(overrides)
+    return snap
+
+
+@pytest.mark.parametrize("field, value", [
+    ("title", "Acme Widgets — now in blue"),
+    ("meta_description", "Hand-made widgets, shipped worldwide."),
+    ("headings", ["Acme Widgets", "Pricing", "FAQ"]),
+    ("main_text", ONPAGE["main_text"] + "\nNow in blue."),
+])
+def test_llm_rerun_when_its_prompt_changes(field, value):
+    plan = plan_incremental(snapshot(), {**ONPAGE, field: value}, REQUEST)
+    assert field in plan["changed"]
+    assert not plan["reuse_llm"]
+
+
+@pytest.mark.parametrize("field, value", [
+    ("h1", "Widgets by Acme"),
+    ("schema_present", True),
+    ("images_with_alt_ratio", 1.0),
+])
+def test_llm_reused_for_edits_outside_its_prompt(field, value):
+    plan = plan_incremental(snapshot(), {**ONPAGE, field: value}, REQUEST)
+    assert plan["changed"] == [field]
+    assert plan["reuse_llm"]
+
+
+def test_nothing_is_reused_without_a_previous_run():
+    plan = plan_incremental(None, ONPAGE, REQUEST)
+    assert plan["base_analysis_id"] is None
+    assert not (plan["reuse_performance"] or plan["reuse_llm"] or plan["reuse_competitors"])
+
+
+def test_unchanged_page_reuses_everything():
+    plan = plan_incremental(snapshot(), dict(ONPAGE), REQUEST)
+    assert plan["changed"] == []
+    assert plan["reuse_performance"] and plan["reuse_llm"] and plan["reuse_competitors"]
+
+
+def test_nav_only_edit_changes_content_text_but_not_main_text():
+    new = {**ONPAGE, "content_text": ONPAGE["content_text"].replace("Menu", "Menu Blog")}
+    assert diff_onpage(ONPAGE, new) == ["content_text"]
+    assert plan_incremental(snapshot(), new, REQUEST)["reuse_llm"]
+
+
+def test_headings_are_compared_flattened():
+    prev = {**ONPAGE, "headings": {"h1": ["Acme Widgets"], "h2": ["Pricing"]}}
+    assert diff_onpage(prev, ONPAGE) == []
+    assert diff_onpage(prev, {**ONPAGE, "headings": ["Acme Widgets"]}) == ["headings"]
+
+
+def test_context_changes_treat_missing_and_empty_alike():
+    prev = snapshot(request={**REQUEST, "product": None})
+    assert context_changes(prev, {**REQUEST, "product": ""}) == []
+    assert context_changes(prev, {**REQUEST, "industry": "wholesale", "location": "Berlin"}) == [
+        "industry",
+        "location",
+    ]
+
+
+def test_context_change_reruns_llm_and_serp():
+    plan = plan_incremental(snapshot(), dict(ONPAGE), {**REQUEST, "company_name": "Acme Inc"})
+    assert plan["changed"] == ["company_name"]
+    assert not plan["reuse_llm"]
+    assert not plan["reuse_competitors"]
+    assert plan["reuse_performance"]
+
+
+def test_heuristic_results_are_never_reused():
+    plan = plan_incremental(snapshot(llm_raw={**LLM, "engine": "heuristic"}), dict(ONPAGE), REQUEST)
+    assert not plan["reuse_llm"]
+
+
+def test_fallback_performance_is_not_reused():
+    prev = snapshot(performance={"performance_score": 0, "fallback": True})
+    assert not plan_incremental(prev, dict(ONPAGE), REQUEST)["reuse_performance"]
+
+
+def test_performance_is_remeasured_past_max_age(monkeypatch):
+    monkeypatch.setattr(settings, "INCREMENTAL_PERFORMANCE_MAX_AGE_SECS", 3600)
+    stale = time.time() - 7200
+    assert not plan_incremental(snapshot(created_at=stale), dict(ONPAGE), REQUEST)["reuse_performance"]
+    # Reused performance keeps its original timestamp, not the snapshot's
+    carried = snapshot(performance_measured_at=stale)
+    assert not plan_incremental(carried, dict(ONPAGE), REQUEST)["reuse_performance"]
+    fresh = snapshot(created_at=stale, performance_measured_at=time.time() - 60)
+    assert plan_incremental(fresh, dict(ONPAGE), REQUEST)["reuse_performance"]
@@ -0,0 +1,153 @@
+import asyncio
+import time
+
+import pytest
+
+from app.schemas.inputs import AnalyzeRequest
+from app.services import crawler, job_worker
+from app.services.fetch_strategy import StrategyTable
+from app.services.job_queue import JobQueue, QueueFull
+from app.services.proxy_pool import ProxyPool
+
+PAYLOAD = {"request": {"url": "https://example.com/"}, "tier": "full"}
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(
+        str(tmp_path / "jobs.sqlite3"),
+        max_attempts=2,
+        backoff_secs=0.05,
+        visibility_secs={"crawl": 0.05},
+    )
+
+
+def test_priority_then_age(queue):
+    bulk = queue.enqueue(PAYLOAD, priority="bulk")
+    interactive = queue.enqueue(PAYLOAD, priority="interactive")
+    assert queue.lease(["crawl"], "w")["job_id"] == interactive
+    assert queue.lease(["crawl"], "w")["job_id"] == bulk
+    assert queue.lease(["crawl"], "w") is None
+
+
+def test_max_queued(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), max_queued=1)
+    queue.enqueue(PAYLOAD)
+    with pytest.raises(QueueFull):
+        queue.enqueue(PAYLOAD)
+
+
+def test_expired_lease_is_taken_over_and_stale_ack_rejected(queue):
+    job_id = queue.enqueue(PAYLOAD)
+    first = queue.lease(["crawl"], "w1")
+    assert queue.lease(["crawl"], "w2") is None  # still invisible
+
+    time.sleep(0.06)
+    second = queue.lease(["crawl"], "w2")
+    assert second["id"] == first["id"]
+    assert second["attempts"] == 2
+
+    assert not queue.ack(first, artifacts={"page": "stale"}, then=["llm"])
+    assert not queue.nack(first, "stale")
+    assert queue.artifacts(job_id) == {}
+    assert queue.ack(second, artifacts={"page": "fresh"}, then=["llm"])
+    assert queue.artifacts(job_id) == {"page": "fresh"}
+
+
+def test_lease_expiring_on_last_attempt_fails_the_job(queue):
+    job_id = queue.enqueue(PAYLOAD)
+    queue.lease(["crawl"], "w1")
+    time.sleep(0.06)
+    queue.lease(["crawl"], "w2")
+    time.sleep(0.06)
+    assert queue.lease(["crawl"], "w3") is None
+    job = queue.get_job(job_id)
+    assert job["status"] == "failed"
+    assert "lease expired" in job["error"]
+
+
+def test_nack_backs_off_then_fails(queue):
+    job_id = queue.enqueue(PAYLOAD)
+    task = queue.lease(["crawl"], "w")
+    assert queue.nack(task, "boom")
+    assert queue.lease(["crawl"], "w") is None  # backing off
+
+    time.sleep(0.06)
+    task = queue.lease(["crawl"], "w")
+    assert task["attempts"] == 2
+    assert queue.nack(task, "boom again")
+
+    job = queue.get_job(job_id)
+    assert job["status"] == "failed"
+    assert job["stages"]["crawl"] == {"status": "failed", "attempts": 2, "error": "boom again"}
+    assert queue.pending() == 0
+
+
+def test_score_waits_for_both_prerequisites(queue):
+    job_id = queue.enqueue(PAYLOAD)
+    crawl = queue.lease(["crawl"], "w")
+    queue.ack(crawl, artifacts={"onpage": {"title": "T"}}, then=["lighthouse", "llm"])
+
+    lighthouse = queue.lease(["lighthouse"], "w")
+    queue.ack(lighthouse, artifacts={"performance": {"score": 90}}, then=["score"])
+    assert queue.lease(["score"], "w") is None
+
+    llm = queue.lease(["llm"], "w")
+    queue.ack(llm, artifacts={"llm": {"engine": "llm"}}, then=["score"])
+    score = queue.lease(["score"], "w")
+    assert score["job_id"] == job_id
+    assert set(queue.artifacts(job_id)) == {"onpage", "performance", "llm"}
+
+    queue.ack(score, analysis_id="a1")
+    job = queue.get_job(job_id)
+    assert (job["status"], job["analysis_id"]) == ("done", "a1")
+    assert queue.artifacts(job_id) == {}
+    assert queue.purge(-1) == 1
+    assert queue.get_job(job_id) is None
+
+
+def test_failed_stage_cancels_queued_siblings(queue):
+    job_id = queue.enqueue(PAYLOAD)
+    queue.ack(queue.lease(["crawl"], "w"), then=["lighthouse", "llm"])
+    queue.nack(queue.lease(["llm"], "w"), "fatal", retry=False)
+    assert queue.get_job(job_id)["stages"]["lighthouse"]["status"] == "cancelled"
+    assert queue.lease(["lighthouse"], "w") is None
+
+
+def test_process_acks_outcome_and_nacks_errors(queue, monkeypatch):
+    async def crawl_ok(queue, task, req, final):
+        return {"artifacts": {"competitors": []}, "then": ["llm"]}
+
+    async def llm_fails(queue, task, req, final):
+        raise RuntimeError("model down")
+
+    monkeypatch.setitem(job_worker.HANDLERS, "crawl", crawl_ok)
+    monkeypatch.setitem(job_worker.HANDLERS, "llm", llm_fails)
+    job_id = queue.enqueue(PAYLOAD)
+
+    assert asyncio.run(job_worker.process(queue, queue.lease(["crawl"], "w")))
+    assert not asyncio.run(job_worker.process(queue, queue.lease(["llm"], "w")))
+    stages = queue.get_job(job_id)["stages"]
+    assert stages["crawl"]["status"] == "done"
+    assert stages["llm"]["status"] == "queued"
+    assert stages["llm"]["error"] == "llm: RuntimeError: model down"
+
+
+def test_render_stage_recovers_after_every_browser_strategy_failed(queue, tmp_path, monkeypatch):
+    table = StrategyTable(str(tmp_path / "strategies.json"), half_life=3600, save_interval=0)
+    for _ in range(3):
+        for name in crawler.BROWSER_STRATEGIES:
+            table.record("example.com", name, False, 1.0)
+    monkeypatch.setattr(crawler, "get_strategy_table", lambda: table)
+    monkeypatch.setattr(crawler, "get_proxy_pool", lambda: ProxyPool([]))
+
+    async def run_strategy(name, url, timeout, collect_metrics=False):
+        assert name != "proxy"
+        return "<html><head><title>Back</title></head><body><p>Up again.</p></body></html>", None
+
+    monkeypatch.setattr(crawler, "run_strategy", run_strategy)
+    req = AnalyzeRequest(**PAYLOAD["request"])
+    outcome = asyncio.run(job_worker.render_stage(queue, {"job_id": "j"}, req, final=False))
+    assert outcome["then"] == ["lighthouse", "llm"]
+    assert outcome["artifacts"]["page"]["strategy"] == "playwright"
+    assert outcome["artifacts"]["onpage"]["title"] == "Back"
@@ -0,0 +1,109 @@
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+from pydantic import ValidationError
+
+from app.core.cache import Cache, MemoryBackend
+from app.core.config import settings
+from app.core.deadline import Deadline, current_deadline
+from app.schemas.llm import ContentAnalysis
+from app.services import llm, prompt_builder
+
+VALID = {
+    "intent_coverage": "85%",
+    "readability_grade": "b2",
+    "expertise_score": 70.0,
+    "missing_sections": ["FAQ"],
+    "recommendations": ["Add pricing"],
+    "content_score": 140,
+    "aeo_score": "60",
+}
+
+
+def reply(score) -> str:
+    return json.dumps({**VALID, "aeo_score": score})
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    monkeypatch.setattr(prompt_builder, "_get_encoding", lambda: None)
+    monkeypatch.setattr(llm, "LLM_CACHE", Cache("llm-test", l1=MemoryBackend(), l2=MemoryBackend()))
+
+
+def fake_openai(monkeypatch, replies: list, delay: float = 0.0) -> list:
+    """OPENAI.call returns `replies` in order; returns the kwargs of each call."""
+    calls = []
+
+    def call(fn, **kwargs):
+        calls.append({**kwargs, "messages": list(kwargs["messages"])})
+        time.sleep(delay)
+        message = SimpleNamespace(content=replies[len(calls) - 1], refusal=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+    monkeypatch.setattr(llm.OPENAI, "call", call)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=None)))
+    monkeypatch.setattr(llm, "get_client", lambda: client)
+    return calls
+
+
+def test_scores_are_coerced_and_clamped():
+    analysis = ContentAnalysis.model_validate_json(json.dumps(VALID))
+    assert (analysis.intent_coverage, analysis.expertise_score, analysis.content_score, analysis.aeo_score) == (85, 70, 100, 60)
+    assert analysis.readability_grade == "B2"
+
+
+@pytest.mark.parametrize("score", [None, [80], {"value": 80}, "NaN", "high"])
+def test_non_numeric_scores_are_validation_errors(score):
+    with pytest.raises(ValidationError):
+        llm.parse_content_analysis(reply(score))
+
+
+@pytest.mark.parametrize("score", [None, [80], {"value": 80}])
+def test_non_numeric_score_is_retried(monkeypatch, score):
+    calls = fake_openai(monkeypatch, [reply(score), reply(75)])
+    retried = llm.LLM_PARSE_FAILURES.value(call="analyze", outcome="retried")
+
+    analysis = llm.analyze_content_llm(f"Body {score!r}", "Acme", "Widgets", "Retail", "Berlin")
+    assert analysis["aeo_score"] == 75
+    assert len(calls) == 2
+    assert "aeo_score" in calls[1]["messages"][-1]["content"]
+    assert llm.LLM_PARSE_FAILURES.value(call="analyze", outcome="retried") == retried + 1
+
+
+def test_repeated_bad_score_fails_and_is_counted(monkeypatch):
+    fake_openai(monkeypatch, [reply(None), reply(None)])
+    failed = llm.LLM_PARSE_FAILURES.value(call="analyze", outcome="failed")
+
+    with pytest.raises(llm.LLMOutputError):
+        llm.analyze_content_llm("Body", "Acme", "Widgets", "Retail", "Berlin")
+    assert llm.LLM_PARSE_FAILURES.value(call="analyze", outcome="failed") == failed + 1
+
+
+def test_client_does_not_retry_on_its_own(monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(llm, "_client", None)
+    client = llm.get_client()
+    monkeypatch.setattr(llm, "_client", None)
+    assert client.max_retries == 0
+
+
+def test_call_timeout_is_capped_by_the_request_budget(monkeypatch):
+    calls = fake_openai(monkeypatch, [reply(75)])
+    token = current_deadline.set(Deadline(2000))
+    try:
+        llm.analyze_content_llm("Budgeted body", "Acme", "Widgets", "Retail", "Berlin")
+    finally:
+        current_deadline.reset(token)
+    assert 0 < calls[0]["timeout"] <= 2
+
+
+def test_no_retry_once_llm_timeout_is_spent(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_TIMEOUT_SECS", 0.05)
+    calls = fake_openai(monkeypatch, [reply(None), reply(75)], delay=0.06)
+
+    with pytest.raises(llm.LLMOutputError):
+        llm.analyze_content_llm("Slow body", "Acme", "Widgets", "Retail", "Berlin")
+    assert len(calls) == 1
+    assert calls[0]["timeout"] <= 0.05
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services import performance
+
+
+def test_concurrent_lighthouse_runs_keep_their_own_reports(monkeypatch):
+    paths = []
+    both_running = threading.Barrier(2)
+
+    def fake_run(cmd, check, timeout):
+        url = cmd[1]
+        path = next(arg.split("=", 1)[1] for arg in cmd if arg.startswith("--output-path="))
+        paths.append(path)
+        both_running.wait(timeout=5)
+        with open(path, "w") as f:
+            json.dump({"requestedUrl": url}, f)
+
+    monkeypatch.setattr(performance.subprocess, "run", fake_run)
+    urls = ["https://one.example/", "https://two.example/"]
+    with ThreadPoolExecutor(2) as pool:
+        reports = list(pool.map(performance.run_lighthouse, urls))
+
+    assert [r["requestedUrl"] for r in reports] == urls
+    assert len(set(paths)) == 2
+    assert not any(os.path.exists(p) for p in paths)
+
+
+def test_lighthouse_timeout_leaves_nothing_behind(monkeypatch):
+    paths = []
+
+    def fake_run(cmd, check, timeout):
+        paths.append(next(arg.split("=", 1)[1] for arg in cmd if arg.startswith("--output-path=")))
+        raise performance.subprocess.TimeoutExpired(cmd, timeout)
+
+    monkeypatch.setattr(performance.subprocess, "run", fake_run)
+    assert performance.run_lighthouse("https://slow.example/", timeout=1) is None
+    assert not os.path.exists(os.path.dirname(paths[0]))
+
+
+# ---------------------------------------------------------
+#  RENDERED METRICS
+# ---------------------------------------------------------
+AT_MEDIAN = {"fcp": 1600, "lcp": 2400, "cls": 0.25}
+AT_P10 = {"fcp": 934, "lcp": 1200, "cls": 0.1}
+
+
+@pytest.mark.parametrize("metrics", [None, {}, {"lcp": 1200, "cls": 0.0}, {"fcp": 900, "lcp": None}])
+def test_sparse_rendered_metrics_are_ignored(metrics):
+    assert performance.performance_from_rendered(metrics) is None
+
+
+@pytest.mark.parametrize("metrics, score", [
+    (AT_P10, 90),
+    (AT_MEDIAN, 50),
+    ({"fcp": 1600, "lcp": 2400}, 50),  # no CLS: weights renormalized
+    ({"fcp": 1, "lcp": 1, "cls": 0}, 100),
+    ({"fcp": 60000, "lcp": 60000, "cls": 5}, 0),
+])
+def test_rendered_score_follows_lighthouse_curves(metrics, score):
+    assert performance.performance_from_rendered(metrics)["performance_score"] == score
+
+
+def test_rendered_metrics_map_to_the_performance_dict():
+    metrics = {**AT_P10, "viewport_meta": True, "ttfb": 120, "load": 1800, "dom_size": 900, "extra": 1}
+    result = performance.performance_from_rendered(metrics)
+    assert result["core_web_vitals"] == AT_P10
+    assert result["mobile_friendly"] is True
+    assert result["source"] == "rendered"
+    assert result["rendered"] == {
+        "ttfb": 120, "dom_content_loaded": None, "load": 1800,
+        "transfer_bytes": None, "resource_count": None, "dom_size": 900,
+    }
+    assert "fallback" not in result
+    assert performance.performance_from_rendered(AT_P10)["mobile_friendly"] is False
+
+
+def test_rendered_metrics_skip_lighthouse(monkeypatch):
+    def no_lighthouse(*args):
+        raise AssertionError("Lighthouse should not run")
+
+    monkeypatch.setattr(performance, "run_lighthouse", no_lighthouse)
+    result = asyncio.run(performance.get_performance("https://acme.example/", rendered_metrics=AT_MEDIAN))
+    assert result["performance_score"] == 50
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("playwright_stealth")
+
+from app.services import playwright_worker  # noqa: E402
+from app.services.playwright_worker import wait_until_ready  # noqa: E402
+
+NEVER = 10.0
+
+
+class FakePage:
+    """Readiness signals fire after the given delays (seconds)."""
+
+    def __init__(self, dom_quiet=NEVER, dom_has_content=True, network_idle=NEVER, main_content=NEVER):
+        self.delays = {"dom_quiet": dom_quiet, "network_idle": network_idle, "main_content": main_content}
+        self.dom_has_content = dom_has_content
+        self.quiet_args = None
+
+    async def evaluate(self, js, args):
+        self.quiet_args = args
+        await asyncio.sleep(self.delays["dom_quiet"])
+        return self.dom_has_content  # false = the JS gave up at its cap
+
+    async def wait_for_load_state(self, state, timeout):
+        await asyncio.sleep(self.delays["network_idle"])
+
+    async def wait_for_function(self, js, arg, timeout):
+        await asyncio.sleep(self.delays["main_content"])
+        return object()
+
+
+def test_quiet_dom_with_content_is_ready():
+    page = FakePage(dom_quiet=0.01)
+    assert asyncio.run(wait_until_ready(page)) == "dom_quiet"
+    assert page.quiet_args == [
+        playwright_worker.DOM_QUIET_MS, playwright_worker.READY_CAP_MS, playwright_worker.DOM_QUIET_MIN_BODY_CHARS,
+    ]
+
+
+def test_empty_quiet_shell_keeps_waiting_for_hydration():
+    page = FakePage(dom_quiet=0.01, dom_has_content=False, main_content=0.05)
+    assert asyncio.run(wait_until_ready(page)) == "main_content"
+
+
+def test_first_signal_wins():
+    page = FakePage(network_idle=0.01, main_content=0.05)
+    assert asyncio.run(wait_until_ready(page)) == "network_idle"
+
+
+def test_cap_bounds_the_wait():
+    page = FakePage(dom_quiet=0.01, dom_has_content=False)
+    assert asyncio.run(wait_until_ready(page, cap_ms=50)) == "cap"
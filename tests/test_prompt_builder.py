@@ -0,0 +1,48 @@
+import pytest
+
+from app.core.config import settings
+from app.services import prompt_builder
+from app.services.prompt_builder import allocate, count_tokens, fit_lines, truncate_to_tokens
+from app.services.rewriter import fit_content
+
+
+@pytest.fixture(autouse=True)
+def offline_tokenizer(monkeypatch):
+    # The regex estimate: no BPE download in tests
+    monkeypatch.setattr(prompt_builder, "_get_encoding", lambda: None)
+
+
+def test_rewrite_input_is_kept_as_written():
+    content = "A.\n\nB.\n\nB.\n    - x"
+    assert fit_content(content) == (content, False)
+
+
+def test_rewrite_input_over_budget_is_cut(monkeypatch):
+    monkeypatch.setattr(settings, "REWRITE_INPUT_TOKEN_BUDGET", 10)
+    content = "word " * 50
+    fitted, trimmed = fit_content(content)
+    assert trimmed
+    assert content.startswith(fitted)
+    assert count_tokens(fitted) <= 10
+
+
+def test_truncate_to_tokens():
+    text = "alpha beta gamma delta"
+    assert truncate_to_tokens(text, 100) == text
+    assert count_tokens(truncate_to_tokens(text, 2)) <= 2
+    assert truncate_to_tokens(text, 0) == ""
+
+
+def test_fit_lines_cuts_only_the_last_line():
+    lines = ["one two three", "four five six", "seven eight nine ten eleven twelve thirteen fourteen fifteen"]
+    text, used, trimmed = fit_lines(lines, 20)
+    assert trimmed
+    assert text.startswith("one two three\nfour five six\n")
+    assert used <= 20
+
+
+def test_allocate_hands_unused_share_to_body():
+    budgets = allocate({"brand": 10, "meta": 10, "headings": 1000, "body": 5000}, 1000)
+    assert budgets["brand"] == 10 and budgets["meta"] == 10
+    assert budgets["body"] > 650
+    assert sum(budgets.values()) <= 1000
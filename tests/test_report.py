@@ -0,0 +1,59 @@
+import io
+import zipfile
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import report
+from app.api.report import router
+from app.core.config import settings
+from app.services import pdf_renderer
+from app.services.snapshots import save_snapshot
+
+app = FastAPI()
+app.include_router(router)
+client = TestClient(app)
+
+
+def test_bulk_rejects_path_traversal(snapshot_dir):
+    resp = client.post("/api/report/bulk", json={"analysis_ids": ["../../outside"]})
+    assert resp.status_code == 422
+
+
+def test_bulk_missing_snapshot_gets_placeholder(snapshot_dir):
+    resp = client.post("/api/report/bulk", json={"analysis_ids": ["0" * 32]})
+    assert resp.status_code == 200
+    names = zipfile.ZipFile(io.BytesIO(resp.content)).namelist()
+    assert names == ["0001_missing.txt"]
+
+
+def test_bulk_renders_stored_responses(snapshot_dir, monkeypatch):
+    loaded = []
+
+    def load_snapshot(analysis_id):
+        loaded.append(analysis_id)
+        return real_load(analysis_id)
+
+    async def render_pdf(data):
+        return b"%PDF-1.4 " + data["input_echo"]["url"].encode()
+
+    real_load = report.load_snapshot
+    monkeypatch.setattr(report, "load_snapshot", load_snapshot)
+    monkeypatch.setattr(pdf_renderer, "render_pdf", render_pdf)
+    analysis_id = save_snapshot(
+        "https://acme.example/", {}, None, {}, {}, {},
+        response={"input_echo": {"url": "https://acme.example/"}},
+    )
+
+    resp = client.post("/api/report/bulk", json={"analysis_ids": [analysis_id, "f" * 32]})
+    assert resp.status_code == 200
+    archive = zipfile.ZipFile(io.BytesIO(resp.content))
+    assert sorted(archive.namelist()) == ["0001_acme_example.pdf", "0002_missing.txt"]
+    assert archive.read("0001_acme_example.pdf") == b"%PDF-1.4 https://acme.example/"
+    assert sorted(loaded) == sorted([analysis_id, "f" * 32])
+
+
+def test_bulk_caps_the_number_of_ids(snapshot_dir):
+    ids = ["0" * 32] * (settings.PDF_BULK_MAX_ITEMS + 1)
+    resp = client.post("/api/report/bulk", json={"analysis_ids": ids})
+    assert resp.status_code == 422
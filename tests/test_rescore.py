@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.analyze import build_response, prepare_onpage
+from app.api.rescore import router
+from app.schemas.inputs import AnalyzeRequest
+from app.services.batch_scoring import compute_benchmark_deltas_batch, rescore_records
+from app.services.benchmarks_v2 import compute_benchmark_deltas
+from app.services.content_extractor import page_text
+from app.services.crawler import parse_onpage
+from app.services.performance import FALLBACK_PERFORMANCE
+from app.services.snapshots import save_snapshot
+
+HTML = """
+<html><head><title>Acme Widgets</title>
+<meta name="description" content="Hand-made widgets shipped worldwide."></head>
+<body><h1>Acme Widgets</h1><h2>Pricing</h2><p>Widgets from $5. Contact us to buy.</p>
+<img src="a.png" alt="A widget"></body></html>
+"""
+
+app = FastAPI()
+app.include_router(router)
+client = TestClient(app)
+
+
+def test_rescore_stored_snapshot(snapshot_dir):
+    analysis_id = save_snapshot(
+        "https://acme.example/",
+        {"url": "https://acme.example/", "industry": "ecommerce", "location": "India"},
+        HTML,
+        parse_onpage(HTML),
+        {"performance_score": 80},
+        {"content_score": 70, "aeo_score": 60},
+    )
+    resp = client.post("/api/rescore", json={"analysis_ids": [analysis_id]})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["count"] == 1
+    assert body["results"][0]["id"] == analysis_id
+
+
+def test_rescore_rejects_path_traversal(snapshot_dir):
+    resp = client.post("/api/rescore", json={"analysis_ids": ["../../etc/secret"]})
+    assert resp.status_code == 422
+
+
+def test_rescore_requires_ids(snapshot_dir):
+    assert client.post("/api/rescore", json={"analysis_ids": []}).status_code == 422
+    assert client.post("/api/rescore", json={}).status_code == 422
+
+
+THIN_HTML = "<html><head><title>Hi</title></head><body><p>Short page.</p></body></html>"
+LONG_HTML = (
+    "<html><head><title>Espresso machines hand-built in Milan since 1952</title>"
+    '<meta name="description" content="' + "Lever and pump espresso machines, serviced for life. " * 2 + '">'
+    '<script type="application/ld+json">{"@type": "Organization"}</script></head>'
+    "<body><nav>Shop Contact</nav><main><h1>Espresso machines</h1>"
+    + "<p>Each machine is assembled, tested and tuned by one technician, then certified.</p>" * 6
+    + '<img src="a.png" alt="Lever machine"><img src="b.png"><img src="c.png"></main>'
+    "<footer>Customer reviews and awards</footer></body></html>"
+)
+CWV = {"performance_score": 83, "core_web_vitals": {"lcp": 2.1}, "mobile_friendly": True}
+
+# (html, performance, llm_raw, industry, location)
+SNAPSHOTS = [
+    (HTML, {"performance_score": 80, "core_web_vitals": None}, {"content_score": 70, "aeo_score": 60}, "electronics", "India"),
+    (LONG_HTML, CWV, {"intent_coverage": "85%", "expertise_score": 72.9, "readability_grade": "B2",
+                      "content_score": "50", "aeo_score": None, "missing_sections": ["FAQ"]}, "healthcare", "us"),
+    (LONG_HTML, dict(FALLBACK_PERFORMANCE), {"intent_coverage": [90], "expertise_score": "high",
+                                             "readability_grade": "C2"}, "", ""),
+    (THIN_HTML, CWV, {"intent_coverage": "60-70", "expertise_score": 40, "content_score": 91,
+                      "aeo_score": "77"}, "finance", "atlantis"),
+    (THIN_HTML, {"performance_score": 35, "core_web_vitals": None, "mobile_friendly": False}, {},
+     "pet food", "uk"),
+]
+
+
+@pytest.mark.parametrize("html, performance, llm_raw, industry, location", SNAPSHOTS)
+def test_batch_rescore_matches_analyze(html, performance, llm_raw, industry, location):
+    onpage = prepare_onpage(html)
+    req = AnalyzeRequest(url="https://acme.example/", industry=industry, location=location)
+    scalar = build_response(
+        req,
+        req.model_dump(mode="json"),
+        onpage=onpage,
+        performance=dict(performance),
+        llm_raw=llm_raw,
+        competitors=[],
+        main_text=page_text(onpage),
+        extracted_keywords=[],
+    )
+    (batch,) = rescore_records([{
+        "onpage": onpage,
+        "performance": performance,
+        "llm_raw": llm_raw,
+        "industry": industry,
+        "location": location,
+    }])
+
+    for key in ("seo_score", "technical_score", "content_score", "aeo_score"):
+        assert batch[key] == getattr(scalar.scores, key), key
+    breakdown = scalar.score_breakdown
+    for key in ("seo_weighted", "technical_weighted", "content_weighted", "brand_weighted", "final_aeo"):
+        assert batch[key] == getattr(breakdown, key), key
+    assert batch["ux_score"] == scalar.ux.ux_score
+    assert batch["ux_issues"] == scalar.ux.issues
+    assert batch["total_penalty"] == scalar.penalties.total_penalty
+    assert batch["penalty_notes"] == scalar.penalties.notes
+    for key in ("seo_delta", "technical_delta", "content_delta", "aeo_delta"):
+        assert batch[key] == getattr(scalar.benchmark, key), key
+    assert (batch["seo_delta"], batch["aeo_delta"]) != (0, 0)
+
+
+def test_batch_deltas_round_halves_like_python():
+    values = [62.5, 63.5, 57.5, 60.49999999999999]
+    scores = {key: np.array(values) for key in ("seo_score", "technical_score", "content_score", "aeo_score")}
+    batch = compute_benchmark_deltas_batch(scores, np.array(["default"] * len(values), dtype=object))
+    for i, value in enumerate(values):
+        scalar = compute_benchmark_deltas({key: value for key in scores}, "default")
+        assert batch["seo_delta"][i] == scalar.seo_delta
+        assert batch["aeo_delta"][i] == scalar.aeo_delta
@@ -0,0 +1,200 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.core.deadline import Deadline, current_deadline, timeout_for
+from app.core.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    Dependency,
+    DependencyUnavailable,
+)
+from app.services import performance, search
+
+
+def fail():
+    raise RuntimeError("boom")
+
+
+def make_dependency(limit: int = 4, open_secs: float = 30.0) -> Dependency:
+    return Dependency("fake", limit, window=4, min_calls=2, failure_rate=0.5, open_secs=open_secs)
+
+
+def test_breaker_opens_at_failure_rate():
+    breaker = CircuitBreaker("fake", window=4, min_calls=2, failure_rate=0.5)
+    breaker.record(False)
+    assert breaker.state == CLOSED
+    breaker.record(True)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_breaker_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker("fake", window=4, min_calls=1, failure_rate=0.5, open_secs=0.01)
+    breaker.record(True)
+    assert breaker.state == OPEN
+    time.sleep(0.02)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_breaker_probe_outcome_closes_or_reopens():
+    breaker = CircuitBreaker("fake", window=4, min_calls=1, failure_rate=0.5, open_secs=0.01)
+    breaker.record(True)
+    time.sleep(0.02)
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.state == OPEN
+
+    time.sleep(0.02)
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_open_circuit_fails_fast():
+    dep = make_dependency()
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            dep.call(fail)
+    with pytest.raises(DependencyUnavailable) as exc:
+        dep.call(lambda: "never called")
+    assert exc.value.reason == "circuit open"
+
+
+def test_bulkhead_rejects_over_limit():
+    dep = make_dependency(limit=1)
+
+    async def main():
+        gate = asyncio.Event()
+
+        async def slow():
+            await gate.wait()
+            return "ok"
+
+        first = asyncio.create_task(dep.acall(slow))
+        await asyncio.sleep(0)
+        with pytest.raises(DependencyUnavailable) as exc:
+            await dep.acall(slow)
+        gate.set()
+        return exc.value.reason, await first
+
+    reason, result = asyncio.run(main())
+    assert reason == "bulkhead full"
+    assert result == "ok"
+    assert dep.bulkhead.in_flight == 0
+    assert dep.breaker.state == CLOSED
+
+
+def test_timeouts_after_the_request_budget_are_not_failures():
+    dep = make_dependency()
+
+    async def main():
+        current_deadline.set(Deadline(50))
+
+        async def slow():
+            # Like the real call sites: the timeout is capped by the budget
+            await asyncio.wait_for(asyncio.sleep(1), timeout_for(30))
+
+        for _ in range(4):
+            with pytest.raises(asyncio.TimeoutError):
+                await dep.acall(slow)
+
+    asyncio.run(main())
+    assert dep.breaker.state == CLOSED
+    assert dep.snapshot()["window_calls"] == 0
+
+
+def test_half_open_probe_cut_off_by_budget_is_released():
+    dep = make_dependency(open_secs=0.01)
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            dep.call(fail)
+    time.sleep(0.02)
+
+    token = current_deadline.set(Deadline(0))
+    try:
+        with pytest.raises(RuntimeError):
+            dep.call(fail)
+    finally:
+        current_deadline.reset(token)
+    assert dep.breaker.state == HALF_OPEN
+    assert dep.breaker.allow()
+
+
+def test_pagespeed_fake_server_trips_breaker(fake_server, monkeypatch):
+    server = fake_server(lambda path, query: (503, {"error": "unavailable"}))
+    dep = make_dependency()
+    monkeypatch.setattr(performance, "PAGESPEED", dep)
+    monkeypatch.setattr(settings, "PAGESPEED_BASE_URL", server.url)
+    monkeypatch.setattr(settings, "GOOGLE_API_KEY", "test-key")
+
+    async def main():
+        return [await performance.run_pagespeed_insights("https://example.com/") for _ in range(3)]
+
+    assert asyncio.run(main()) == [None, None, None]
+    # The third call was rejected by the open circuit without reaching the server
+    assert len(server.requests) == 2
+    assert server.requests[0][0] == "/runPagespeed"
+    assert server.requests[0][1]["url"] == "https://example.com/"
+    assert dep.breaker.state == OPEN
+
+
+def test_pagespeed_client_error_does_not_count(fake_server, monkeypatch):
+    server = fake_server(lambda path, query: (400, {"error": "bad url"}))
+    dep = make_dependency()
+    monkeypatch.setattr(performance, "PAGESPEED", dep)
+    monkeypatch.setattr(settings, "PAGESPEED_BASE_URL", server.url)
+    monkeypatch.setattr(settings, "GOOGLE_API_KEY", "test-key")
+
+    async def main():
+        return [await performance.run_pagespeed_insights("https://example.com/") for _ in range(3)]
+
+    assert asyncio.run(main()) == [None, None, None]
+    assert len(server.requests) == 3
+    assert dep.breaker.state == CLOSED
+
+
+def test_serpapi_fake_server(fake_server, monkeypatch):
+    results = {"organic_results": [
+        {"title": "One", "link": "https://one.example/"},
+        {"title": "No link"},
+        {"title": "Two", "link": "https://two.example/"},
+    ]}
+    server = fake_server(lambda path, query: (200, results))
+    monkeypatch.setattr(search, "SERPAPI", make_dependency())
+    monkeypatch.setattr(settings, "SERPAPI_BASE_URL", server.url)
+    monkeypatch.setattr(settings, "SERPAPI_KEY", "test-key")
+
+    competitors = search.get_serp_competitors("fake serp query one", num_results=3)
+    assert competitors == [
+        {"title": "One", "url": "https://one.example/"},
+        {"title": "Two", "url": "https://two.example/"},
+    ]
+    path, query = server.requests[0]
+    assert path == "/search.json"
+    assert query == {
+        "engine": "google",
+        "q": "fake serp query one",
+        "api_key": "test-key",
+        "num": "3",
+        "output": "json",
+    }
+
+
+def test_serpapi_outage_trips_breaker(fake_server, monkeypatch):
+    server = fake_server(lambda path, query: (500, {"error": "down"}))
+    dep = make_dependency()
+    monkeypatch.setattr(search, "SERPAPI", dep)
+    monkeypatch.setattr(settings, "SERPAPI_BASE_URL", server.url)
+
+    for i in range(3):
+        assert search.get_serp_competitors(f"fake serp outage {i}") == []
+    assert len(server.requests) == 2
+    assert dep.breaker.state == OPEN
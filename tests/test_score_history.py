@@ -0,0 +1,95 @@
+import time
+
+import pytest
+
+from app.services.score_history import DAY, ScoreHistory, bucket_start, normalize_url
+
+NOW = 1_780_000_000.0  # fixed, mid-week
+
+
+@pytest.fixture
+def history(tmp_path):
+    h = ScoreHistory(str(tmp_path / "history.sqlite3"), batch_size=100, queue_size=100)
+    yield h
+    h.close()
+
+
+def point(url, ts, aeo, partial=False, source="analyze"):
+    return (normalize_url(url), ts, None, source, partial, {"aeo_score": aeo, "final_aeo": aeo, "notes": ["x"]})
+
+
+def test_add_is_readable_after_flush(history):
+    assert history.add("https://example.com/", {"aeo_score": 70, "seo_score": 60, "penalty_notes": ["n"]})
+    history.flush()
+    [p] = history.latest("https://example.com/")
+    assert p["scores"]["aeo_score"] == 70
+    assert p["scores"]["seo_score"] == 60
+    assert p["notes"] == ["n"]
+
+
+def test_points_in_range_and_same_millisecond(history):
+    history.write([point("https://example.com/", NOW, 50), point("https://example.com/", NOW, 60)])
+    history.write([point("https://example.com/", NOW + 10, 70)])
+    points = history.points("https://example.com/", start=NOW, end=NOW + 5)
+    assert [p["scores"]["aeo_score"] for p in points] == [50, 60]
+    assert len(history.points("https://example.com/")) == 3
+
+
+def test_daily_and_weekly_rollups(history):
+    history.write([
+        point("https://example.com/", NOW, 40),
+        point("https://example.com/", NOW + 60, 80),
+        point("https://example.com/", NOW + DAY, 60),
+    ])
+    days = history.series("https://example.com/", "day")
+    assert [d["count"] for d in days] == [2, 1]
+    assert days[0]["metrics"]["aeo_score"] == {"avg": 60.0, "min": 40.0, "max": 80.0}
+    [week] = history.series("https://example.com/", "week")
+    assert week["count"] == 3
+    assert week["start"].weekday() == 0
+
+
+def test_partial_points_stay_out_of_rollups(history):
+    history.write([
+        point("https://example.com/", NOW, 80),
+        point("https://example.com/", NOW + 1, 20, partial=True, source="sitemap"),
+    ])
+    [day] = history.series("https://example.com/", "day")
+    assert day["count"] == 1
+    assert day["metrics"]["aeo_score"]["avg"] == 80.0
+    assert [p["partial"] for p in history.points("https://example.com/")] == [False, True]
+
+
+def test_urls_are_normalised_on_write_and_lookup(history):
+    history.add("HTTPS://Example.com", {"aeo_score": 70}, source="sitemap")
+    history.add("https://example.com/", {"aeo_score": 72}, source="analyze")
+    history.flush()
+    assert len(history.latest("https://EXAMPLE.com")) == 2
+
+
+def test_retention(history):
+    history.retention_days = {"raw": 30, "day": 60, "week": 0}
+    history.write([
+        point("https://example.com/", NOW - 90 * DAY, 10),
+        point("https://example.com/", NOW - 45 * DAY, 20),
+        point("https://example.com/", NOW, 30),
+    ])
+    removed = history.prune(now=NOW)
+    assert removed == {"raw": 2, "day": 1}
+    assert [p["scores"]["aeo_score"] for p in history.points("https://example.com/")] == [30]
+    assert len(history.series("https://example.com/", "day")) == 2
+    assert len(history.series("https://example.com/", "week")) == 3
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    h = ScoreHistory(str(tmp_path / "h.sqlite3"), queue_size=1)
+    h._writer = object()  # no writer thread draining the queue
+    assert h.add("https://example.com/", {"aeo_score": 1})
+    started = time.monotonic()
+    assert not h.add("https://example.com/", {"aeo_score": 2})
+    assert time.monotonic() - started < 0.1
+
+
+def test_bucket_start_week_is_monday():
+    assert bucket_start(0, "week") == -3 * DAY  # 1970-01-01 was a Thursday
+    assert bucket_start(DAY + 5, "day") == DAY
@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.crawler import close_shared_client
+from app.services.site_crawler import crawl_site, normalize_url
+
+
+def page(title: str, links=(), canonical: str | None = None) -> str:
+    head = f"<title>{title}</title>"
+    if canonical:
+        head += f'<link rel="canonical" href="{canonical}">'
+    anchors = "".join(f'<a href="{href}">{href}</a>' for href in links)
+    return f"<html><head>{head}</head><body><h1>{title}</h1><p>About {title}.</p>{anchors}</body></html>"
+
+
+@pytest.fixture
+def site(fake_server):
+    docs = {}
+    times = []
+
+    def respond(path, query):
+        if path != "/robots.txt":
+            times.append(time.monotonic())
+        return docs[path] if isinstance(docs.get(path), tuple) else (200, docs[path]) if path in docs else (404, "missing")
+
+    server = fake_server(respond)
+    server.docs = docs
+    server.times = times
+    return server
+
+
+def crawl(server, **kwargs) -> dict:
+    async def main():
+        try:
+            return await crawl_site(f"{server.url}/", use_sitemap=False, **{"rate_per_host": 1000, **kwargs})
+        finally:
+            await close_shared_client()
+    return asyncio.run(main())
+
+
+def fetched(server) -> list:
+    return [path for path, _ in server.requests if path != "/robots.txt"]
+
+
+def test_normalize_url_drops_tracking_params_and_fragment():
+    assert normalize_url("HTTPS://Acme.example:443/a?utm_source=x&b=2&a=1#top") == "https://acme.example/a?a=1&b=2"
+
+
+def test_frontier_is_bounded_by_max_pages(site):
+    site.docs["/"] = page("Home", [f"/p{i}" for i in range(50)])
+    for i in range(50):
+        site.docs[f"/p{i}"] = page(f"Page {i}")
+
+    report = crawl(site, max_pages=3, concurrency=1)
+    assert report["pages_crawled"] == 3
+    assert report["links_dropped"] > 0
+    assert len(fetched(site)) <= 3 * 2
+
+
+def test_robots_disallow_and_crawl_delay(site):
+    site.docs["/robots.txt"] = "User-agent: *\nDisallow: /private\nCrawl-delay: 1\n"
+    site.docs["/"] = page("Home", ["/a", "/private/b"])
+    site.docs["/a"] = page("A")
+    site.docs["/private/b"] = page("B")
+
+    report = crawl(site, concurrency=4)
+    assert report["pages_crawled"] == 2
+    assert report["blocked_by_robots"] == 1
+    assert "/private/b" not in fetched(site)
+    assert site.times[1] - site.times[0] >= 0.9  # robotparser only takes whole seconds
+
+
+def test_duplicates_are_skipped_by_canonical_url(site):
+    site.docs["/"] = page("Home", ["/a", "/a?ref=nav", "/a?utm_source=mail"])
+    site.docs["/a"] = page("A", canonical="/a")
+
+    report = crawl(site, concurrency=1)
+    assert report["pages_crawled"] == 2
+    assert report["duplicates_skipped"] == 1
+    assert fetched(site).count("/a") == 2  # /a and /a?ref=nav; the utm_ link is the same URL
+
+
+def test_crawl_stays_on_the_start_host(site):
+    port = site.url.rsplit(":", 1)[1]
+    site.docs["/"] = page("Home", ["/a", "/away", f"http://localhost:{port}/b"])
+    site.docs["/a"] = page("A")
+    site.docs["/b"] = page("B")
+    site.docs["/away"] = (302, "", {"Location": f"http://localhost:{port}/b"})
+
+    report = crawl(site, concurrency=1, include_pages=True)
+    assert sorted(p["url"] for p in report["pages"]) == [f"{site.url}/", f"{site.url}/a"]
+    assert fetched(site).count("/b") == 1  # followed the redirect, then dropped the page
+
+
+def test_start_url_redirect_moves_the_crawl_host(site):
+    port = site.url.rsplit(":", 1)[1]
+    other = f"http://localhost:{port}"
+    site.docs["/"] = (301, "", {"Location": f"{other}/home"})
+    site.docs["/home"] = page("Home", ["/a"])
+    site.docs["/a"] = page("A")
+
+    report = crawl(site, concurrency=1, include_pages=True)
+    assert sorted(p["url"] for p in report["pages"]) == [f"{other}/a", f"{other}/home"]
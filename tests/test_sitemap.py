@@ -0,0 +1,146 @@
+import asyncio
+import gzip
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services import sitemap
+from app.services.crawler import close_shared_client, get_shared_client
+from app.services.politeness import PoliteFetcher
+from app.services.site_crawler import discover_sitemap_urls
+
+PAGE = "<html><head><title>Page</title></head><body><h1>Page</h1><p>Hello.</p></body></html>"
+
+
+def urlset(base: str, paths: list, lastmod: str = "2026-01-01") -> str:
+    entries = "".join(f"<url><loc>{base}{p}</loc><lastmod>{lastmod}</lastmod></url>" for p in paths)
+    return f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>'
+
+
+@pytest.fixture
+def site(fake_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "HISTORY_ENABLED", False)
+    monkeypatch.setattr(settings, "SITEMAP_STATE_PATH", str(tmp_path / "sitemap_state.json"))
+    monkeypatch.setattr(settings, "SITEMAP_RATE_PER_HOST", 1000.0)
+    docs = {}
+    server = fake_server(lambda path, query: docs[path] if isinstance(docs.get(path), tuple)
+                         else (200, docs[path]) if path in docs else (404, "missing"))
+    server.docs = docs
+    base = server.url
+    docs["/sitemap.xml"] = (
+        '<?xml version="1.0"?><sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        f"<sitemap><loc>{base}/a.xml.gz</loc><lastmod>2026-01-01</lastmod></sitemap>"
+        f"<sitemap><loc>{base}/b.xml</loc><lastmod>2024-01-01</lastmod></sitemap>"
+        "</sitemapindex>"
+    )
+    docs["/a.xml.gz"] = gzip.compress(urlset(base, [f"/p{i}" for i in range(20)]).encode())
+    docs["/b.xml"] = urlset(base, ["/old"], lastmod="2024-01-01")
+    for i in range(20):
+        docs[f"/p{i}"] = PAGE
+    docs["/old"] = PAGE
+    docs["/bad.xml"] = "<urlset><url><loc>broken</url></urlset>"
+    docs["/down.xml"] = (503, "unavailable")
+    docs["/partly-down.xml"] = (
+        '<?xml version="1.0"?><sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        f"<sitemap><loc>{base}/b.xml</loc></sitemap><sitemap><loc>{base}/down.xml</loc></sitemap>"
+        "</sitemapindex>"
+    )
+    return server
+
+
+def run(coro):
+    async def main():
+        try:
+            return await coro
+        finally:
+            await close_shared_client()
+    return asyncio.run(main())
+
+
+async def collect(gen) -> list:
+    return [item async for item in gen]
+
+
+def test_iter_sitemap_urls_filters_by_lastmod(site):
+    since = sitemap.parse_lastmod("2025-01-01")
+    urls = run(collect(sitemap.iter_sitemap_urls(get_shared_client(), f"{site.url}/sitemap.xml", since=since)))
+    assert [u for u, _ in urls] == [f"{site.url}/p{i}" for i in range(20)]
+    assert not any(path == "/b.xml" for path, _ in site.requests)
+
+
+def test_ingest_sitemap_scores_every_page(site):
+    items = run(collect(sitemap.ingest_sitemap(
+        f"{site.url}/sitemap.xml", workers=2, queue_size=2, persist=False,
+    )))
+    summary = items[-1]["summary"]
+    assert summary["discovered"] == summary["analyzed"] == 21
+    assert "sitemap_error" not in summary
+    assert all("final_aeo" in item for item in items[:-1])
+    assert sitemap.load_last_run(f"{site.url}/sitemap.xml") is not None
+
+
+def test_ingest_sitemap_stops_cleanly_when_abandoned(site):
+    async def first_result():
+        gen = sitemap.ingest_sitemap(f"{site.url}/sitemap.xml", workers=1, queue_size=1, persist=False)
+        item = await gen.__anext__()
+        # Queues are full and the reader is gone: closing must not hang
+        await asyncio.wait_for(gen.aclose(), 5)
+        return item
+
+    assert "final_aeo" in run(first_result())
+
+
+def test_ingest_sitemap_reports_unreadable_sitemap(site):
+    url = f"{site.url}/bad.xml"
+    items = run(collect(sitemap.ingest_sitemap(url, workers=2, queue_size=1, persist=False)))
+    summary = items[-1]["summary"]
+    assert summary["sitemap_error"].startswith("ParseError")
+    # An incomplete run must not advance the lastmod watermark
+    assert sitemap.load_last_run(url) is None
+
+
+@pytest.mark.parametrize("path", ["/down.xml", "/partly-down.xml"])
+def test_ingest_sitemap_reports_unavailable_sitemap(site, path):
+    url = f"{site.url}{path}"
+    items = run(collect(sitemap.ingest_sitemap(url, workers=2, queue_size=1, persist=False)))
+    summary = items[-1]["summary"]
+    assert summary["sitemap_error"].startswith("HTTPStatusError")
+    assert "503" in summary["sitemap_error"]
+    assert sitemap.load_last_run(url) is None
+
+
+def test_ingest_sitemap_honours_robots(site):
+    site.docs["/robots.txt"] = "User-agent: *\nDisallow: /p1\n"
+    items = run(collect(sitemap.ingest_sitemap(
+        f"{site.url}/sitemap.xml", workers=4, queue_size=2, persist=False, incremental=False,
+    )))
+    errors = {item["url"]: item["error"] for item in items[:-1] if "error" in item}
+    # /p1 and /p10–/p19 are disallowed and never requested
+    assert len(errors) == 11
+    assert all("robots.txt" in e for e in errors.values())
+    assert not any(path.startswith("/p1") for path, _ in site.requests)
+    assert items[-1]["summary"]["analyzed"] == 10
+
+
+def test_ingest_sitemap_spaces_requests_per_host(site, monkeypatch):
+    monkeypatch.setattr(settings, "SITEMAP_RATE_PER_HOST", 20.0)
+    started = time.monotonic()
+    items = run(collect(sitemap.ingest_sitemap(
+        f"{site.url}/sitemap.xml", workers=8, queue_size=8, persist=False, max_urls=6,
+    )))
+    assert items[-1]["summary"]["analyzed"] == 6
+    # 6 pages at 20/s: at least 5 intervals of 50 ms, even with 8 workers
+    assert time.monotonic() - started >= 0.25
+
+
+def test_polite_fetcher_caps_the_body(site):
+    fetcher = PoliteFetcher(get_shared_client(), 1000, max_bytes=10)
+    resp, text = run(fetcher.get(f"{site.url}/p0"))
+    assert resp.status_code == 200
+    assert text == PAGE[:10]
+
+
+def test_discover_sitemap_urls_stops_at_limit(site):
+    urls = run(discover_sitemap_urls(get_shared_client(), [f"{site.url}/sitemap.xml"], limit=5))
+    assert len(urls) == 5
@@ -0,0 +1,51 @@
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.core.config import settings
+from app.main import app
+
+# No `with TestClient(...)`: startup would preload heavy modules and
+# shutdown would write the strategy table to the real data directory
+client = TestClient(app)
+
+
+def test_health():
+    resp = client.get("/health")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["status"] in ("ok", "degraded")
+    assert set(body["admission"]) == {"interactive", "bulk", "scheduled"}
+
+
+def test_metrics_are_prometheus_text():
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+
+
+def test_every_router_is_mounted():
+    paths = client.get("/openapi.json").json()["paths"]
+    for prefix in ("/api/analyze", "/api/rescore", "/api/jobs", "/api/history", "/api/sitemap"):
+        assert any(p.startswith(prefix) for p in paths), prefix
+
+
+def test_lifespan_warms_up_and_closes_everything(monkeypatch):
+    calls = []
+
+    async def close_shared_client():
+        calls.append("client")
+
+    monkeypatch.setattr(settings, "WARM_START", True)
+    monkeypatch.setattr(main, "preload", lambda: calls.append("preload") or {})
+    monkeypatch.setattr(main, "shutdown_executor", lambda: calls.append("executor"))
+    monkeypatch.setattr(main, "close_shared_client", close_shared_client)
+    table = SimpleNamespace(save=lambda force=False: calls.append(f"strategies force={force}"))
+    monkeypatch.setattr(main, "get_strategy_table", lambda: table)
+    monkeypatch.setattr(main, "close_history", lambda: calls.append("history"))
+
+    with TestClient(app) as lifespan_client:
+        assert calls == ["preload"]
+        assert lifespan_client.get("/health").status_code == 200
+    assert calls == ["preload", "executor", "client", "strategies force=True", "history"]
@@ -0,0 +1,44 @@
+from app.services.ux import compute_ux_score
+
+BODY = "Our espresso machines are built by hand in Milan. " * 8
+
+
+def test_cta_and_trust_found_outside_main_content():
+    onpage = {
+        "main_text": BODY,
+        "content_text": "Menu Contact us " + BODY + " Customer reviews Certified dealer",
+    }
+    ux = compute_ux_score(onpage, {"mobile_friendly": True})
+    assert ux.cta_present and ux.trust_signals_present
+    assert ux.readability_ok
+    assert ux.ux_score == 80
+
+
+def test_length_is_judged_on_main_content():
+    onpage = {"main_text": "Short product blurb.", "content_text": "Contact " + BODY}
+    ux = compute_ux_score(onpage, {"mobile_friendly": True})
+    assert ux.cta_present
+    assert not ux.readability_ok
+    assert not ux.trust_signals_present
+
+
+def test_older_snapshots_without_main_text():
+    ux = compute_ux_score({"content_text": "Book now. " + BODY}, {})
+    assert ux.cta_present and ux.readability_ok
+    assert not ux.mobile_friendly
+
+
+def test_batch_scoring_matches():
+    from app.services.batch_scoring import rescore_records
+
+    onpages = [
+        {"main_text": BODY, "content_text": "Contact us " + BODY + " reviews"},
+        {"main_text": "Short.", "content_text": "Book a call. " + BODY},
+        {"content_text": BODY},
+    ]
+    performance = {"mobile_friendly": True, "performance_score": 70}
+    rows = rescore_records([{"onpage": o, "performance": performance} for o in onpages])
+    for onpage, row in zip(onpages, rows):
+        ux = compute_ux_score(onpage, performance)
+        assert row["ux_score"] == ux.ux_score
+        assert row["ux_issues"] == ux.issues